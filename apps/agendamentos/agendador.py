@@ -0,0 +1,227 @@
+"""
+Agendador em processo: inicia e encerra agendamentos na hora certa.
+
+Os eventos (início em data_inicio, fim em data_fim) ficam em um heap
+ordenado pelo instante. Só a janela dos próximos HORIZONTE_SEGUNDOS é
+mantida em memória, recarregada do banco a cada RECARGA_SEGUNDOS, então o
+heap não cresce com o total de agendamentos pendentes e o estado é
+reconstruído do banco após um restart.
+
+Todos os eventos que vencem no mesmo ciclo são aplicados com um UPDATE por
+tipo; na mesma transação os comandos aos robôs são criados como
+ComandoRobo (entrega e ack pelo mesmo caminho dos demais comandos,
+inclusive para robôs que só consultam /comandos ou estão desconectados) e
+publicados após o commit, apenas para as linhas que este processo de fato
+mudou (select_for_update com skip_locked e filtro de status), de modo que
+duas instâncias não disparam o mesmo agendamento.
+
+O modo suportado é rodar dentro do servidor (AGENDADOR['NO_PROCESSO']):
+agendamentos salvos no processo são programados na hora (notificar_agendador)
+e os comandos chegam aos RoboConsumer pela camada de canais local. O comando
+executar_agendador, em processo separado, não recebe essas notificações (vê
+agendamentos novos só na recarga seguinte) e só entrega push pelo WebSocket
+com uma camada de canais compartilhada (Redis); sem ela os robôs recebem os
+comandos ao reconectar ou por /comandos.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.robos.models import ComandoRobo
+from apps.robos.services import publicar_comando
+from .models import Agendamento
+
+logger = logging.getLogger(__name__)
+
+INICIO = "inicio"
+FIM = "fim"
+
+
+def _config():
+    return getattr(settings, "AGENDADOR", {})
+
+
+class Agendador:
+    def __init__(self, horizonte=None, recarga=None):
+        self.horizonte = timedelta(seconds=horizonte or _config().get("HORIZONTE_SEGUNDOS", 600))
+        self.recarga = recarga or _config().get("RECARGA_SEGUNDOS", 30)
+        self._heap = []
+        self._sequencia = itertools.count()
+        # agendamento_id -> (evento, instante) vigente; entradas do heap que não batem são descartadas
+        self._programados = {}
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._thread = None
+        self._proxima_recarga = None
+
+    # --- Programação ---
+    def _programar(self, agendamento_id, evento, instante):
+        if self._programados.get(agendamento_id) == (evento, instante):
+            return
+        self._programados[agendamento_id] = (evento, instante)
+        heapq.heappush(self._heap, (instante, next(self._sequencia), agendamento_id, evento))
+
+    def notificar(self, agendamentos):
+        """
+        Informa agendamentos criados/alterados neste processo (sinal ou
+        bulk_create) para que não esperem a próxima recarga.
+        """
+        limite = timezone.now() + self.horizonte
+        with self._condicao:
+            for agendamento in agendamentos:
+                if agendamento.pk is None:
+                    continue
+                if agendamento.status == "aguardando" and agendamento.data_inicio <= limite:
+                    self._programar(agendamento.pk, INICIO, agendamento.data_inicio)
+                elif agendamento.status == "em_andamento" and agendamento.data_fim <= limite:
+                    self._programar(agendamento.pk, FIM, agendamento.data_fim)
+                else:
+                    self._programados.pop(agendamento.pk, None)
+            self._condicao.notify()
+
+    def recarregar(self):
+        """Lê do banco os eventos da janela [agora, agora + horizonte] (inclui atrasados)."""
+        agora = timezone.now()
+        limite = agora + self.horizonte
+        self._marcar_perdidos(agora)
+
+        inicios = Agendamento.objects.filter(
+            status="aguardando", data_inicio__lte=limite
+        ).values_list("id", "data_inicio")
+        fins = Agendamento.objects.filter(
+            status="em_andamento", data_fim__lte=limite
+        ).values_list("id", "data_fim")
+
+        with self._condicao:
+            for agendamento_id, instante in inicios:
+                self._programar(agendamento_id, INICIO, instante)
+            for agendamento_id, instante in fins:
+                self._programar(agendamento_id, FIM, instante)
+            self._proxima_recarga = agora + timedelta(seconds=self.recarga)
+            self._condicao.notify()
+
+    def _marcar_perdidos(self, agora):
+        """Agendamentos cujo período inteiro passou sem início (ex.: servidor parado) viram 'problema'."""
+        perdidos = Agendamento.objects.filter(status="aguardando", data_fim__lte=agora).update(status="problema")
+        if perdidos:
+            logger.warning("%s agendamentos expiraram sem serem iniciados", perdidos)
+
+    # --- Execução ---
+    def _vencidos(self, agora):
+        devidos = {INICIO: [], FIM: []}
+        while self._heap and self._heap[0][0] <= agora:
+            instante, _, agendamento_id, evento = heapq.heappop(self._heap)
+            if self._programados.get(agendamento_id) != (evento, instante):
+                continue
+            del self._programados[agendamento_id]
+            devidos[evento].append(agendamento_id)
+        return devidos
+
+    def executar_ciclo(self):
+        """Aplica os eventos vencidos. Retorna quantos agendamentos mudaram de status."""
+        with self._condicao:
+            devidos = self._vencidos(timezone.now())
+        iniciados = self._iniciar(devidos[INICIO]) if devidos[INICIO] else []
+        finalizados = self._finalizar(devidos[FIM]) if devidos[FIM] else []
+        return len(iniciados) + len(finalizados)
+
+    def _aplicar(self, ids, status_atual, novo_status, montar_comando):
+        """
+        Muda o status e grava os comandos na mesma transação: se a gravação
+        falhar, o agendamento continua no status anterior e é retomado na
+        próxima recarga. A publicação aos robôs só ocorre após o commit.
+        """
+        with transaction.atomic():
+            linhas = list(
+                Agendamento.objects.select_for_update(skip_locked=True)
+                .filter(id__in=ids, status=status_atual)
+                .values_list("id", "robo_id", "tipo", "cidades", "data_fim")
+            )
+            if linhas:
+                Agendamento.objects.filter(id__in=[linha[0] for linha in linhas]).update(
+                    status=novo_status, atualizado_em=timezone.now()
+                )
+                for comando in ComandoRobo.objects.bulk_create([montar_comando(*linha) for linha in linhas]):
+                    publicar_comando(comando)
+        return linhas
+
+    def _iniciar(self, ids):
+        linhas = self._aplicar(
+            ids, "aguardando", "em_andamento",
+            lambda agendamento_id, robo_id, tipo, cidades, data_fim: ComandoRobo(
+                robo_id=robo_id, tipo="iniciar_inventario", dados={
+                    "agendamento_id": agendamento_id,
+                    "tipo": tipo,
+                    "cidades": cidades,
+                    "data_fim": data_fim.isoformat(),
+                },
+            ),
+        )
+        with self._condicao:
+            for agendamento_id, _, _, _, data_fim in linhas:
+                if data_fim <= timezone.now() + self.horizonte:
+                    self._programar(agendamento_id, FIM, data_fim)
+        return linhas
+
+    def _finalizar(self, ids):
+        return self._aplicar(
+            ids, "em_andamento", "concluido",
+            lambda agendamento_id, robo_id, *_: ComandoRobo(
+                robo_id=robo_id, tipo="finalizar_inventario", dados={"agendamento_id": agendamento_id}
+            ),
+        )
+
+    def _espera(self):
+        """Segundos até o próximo evento ou recarga."""
+        agora = timezone.now()
+        proximos = [self._proxima_recarga or agora]
+        if self._heap:
+            proximos.append(self._heap[0][0])
+        return max(0.0, (min(proximos) - agora).total_seconds())
+
+    def rodar(self):
+        """Laço principal (bloqueia até parar())."""
+        while not self._parar.is_set():
+            try:
+                if self._proxima_recarga is None or timezone.now() >= self._proxima_recarga:
+                    self.recarregar()
+                self.executar_ciclo()
+            except Exception:
+                logger.exception("Falha no ciclo do agendador")
+                self._proxima_recarga = None
+                self._parar.wait(1)
+            finally:
+                close_old_connections()
+
+            with self._condicao:
+                if not self._parar.is_set():
+                    self._condicao.wait(timeout=self._espera())
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self.rodar, name="agendador", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def parar(self):
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify()
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+agendador = Agendador()
+
+
+def notificar_agendador(agendamentos):
+    """Repassa mudanças ao agendador, se ele estiver rodando neste processo."""
+    if agendador.ativo:
+        agendador.notificar(agendamentos)
@@ -5,8 +5,10 @@ from typing import List
 from datetime import datetime, timedelta
 from ninja.errors import HttpError
 from django.core.exceptions import PermissionDenied, ValidationError
-from . import schemas, models
+from django.db import IntegrityError
+from . import schemas, models, services
 from apps.usuarios.authentication import JWTAuth
+from apps.usuarios.escopo import escopo_do_usuario, filtrar_por_escopo
 from .utils import calcular_percentuais
 
 router = Router()
@@ -56,13 +58,22 @@ def estatisticas_agendamentos(request):
 def criar_agendamento(request, payload: schemas.AgendamentoIn):
     """
     Cria um novo agendamento - Acessível por Admin e Master
+    Sem `robo_id`, o servidor escolhe o robô livre de menor carga do armazém
     """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
     try:
         # Verifica se o usuário tem permissão para o armazém
         if request.user.tipo == "Admin":
-            if payload.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+            if payload.armazem_id not in escopo_do_usuario(request.user):
                 raise PermissionDenied("Acesso não autorizado a este armazém")
 
+        if payload.robo_id is None:
+            dados = payload.dict(exclude={"robo_id"})
+            dados["cidades"] = dados["cidades"] or []
+            return 201, services.criar_com_atribuicao(request.user, dados)
+
         agendamento = models.Agendamento.objects.create(
             **payload.dict(),
             usuario=request.user
@@ -74,16 +85,129 @@ def criar_agendamento(request, payload: schemas.AgendamentoIn):
         raise HttpError(400, "Erro ao criar agendamento")
 
 
+@admin_router.post("/agendamentos/lote", response={200: schemas.AgendamentoLoteOut})
+def criar_agendamentos_lote(request, payload: schemas.AgendamentoLoteIn):
+    """
+    Cria vários agendamentos de uma vez - Acessível por Admin e Master
+    Os itens são validados entre si e contra os agendamentos existentes;
+    o retorno traz o resultado de cada item, na ordem recebida
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    return services.agendar_lote(request.user, payload.itens)
+
+
+@admin_router.post("/agendamentos/recorrencias", response={201: schemas.RegraRecorrenciaOut, 400: dict})
+def criar_regra_recorrencia(request, payload: schemas.RegraRecorrenciaIn):
+    """
+    Cria uma regra diária/semanal e já gera suas ocorrências até o horizonte
+    configurado - Acessível por Admin e Master
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    if request.user.tipo == "Admin":
+        if payload.armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+
+    robo = get_object_or_404(models.Robo.objects.only("id", "armazem_id"), id=payload.robo_id)
+    if robo.armazem_id != payload.armazem_id:
+        raise HttpError(400, "O robô selecionado não pertence a este armazém")
+    if payload.frequencia == "semanal" and not payload.dias_semana:
+        raise HttpError(400, "Informe dias_semana para regras semanais")
+    if any(not 0 <= dia <= 6 for dia in payload.dias_semana):
+        raise HttpError(400, "dias_semana aceita valores de 0 (segunda) a 6 (domingo)")
+    if payload.duracao <= timedelta(0):
+        raise HttpError(400, "A duração deve ser positiva")
+    if payload.vigencia_fim is not None and payload.vigencia_fim < payload.vigencia_inicio:
+        raise HttpError(400, "vigencia_fim não pode ser anterior a vigencia_inicio")
+
+    dados = payload.dict()
+    dados["excecoes"] = [dia.isoformat() for dia in payload.excecoes]
+    regra = models.RegraRecorrencia.objects.create(**dados, usuario=request.user)
+    services.expandir_regras([regra])
+    return 201, regra
+
+
+@admin_router.get("/agendamentos/recorrencias", response=List[schemas.RegraRecorrenciaOut])
+def listar_regras_recorrencia(request, ativa: bool = True):
+    """
+    Lista regras de recorrência - Acessível por Admin e Master
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    queryset = models.RegraRecorrencia.objects.filter(ativa=ativa)
+    if request.user.tipo == "Admin":
+        queryset = filtrar_por_escopo(queryset, request.user)
+    return queryset
+
+
+@admin_router.post("/agendamentos/recorrencias/expandir", response=schemas.ExpansaoRecorrenciaOut)
+def expandir_recorrencias(request, regra_id: int = None, horizonte_dias: int = None):
+    """
+    Gera as ocorrências que faltam até o horizonte (idempotente) - Acessível por Admin e Master
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    regras = models.RegraRecorrencia.objects.filter(ativa=True)
+    if regra_id is not None:
+        regras = regras.filter(id=regra_id)
+    if request.user.tipo == "Admin":
+        regras = filtrar_por_escopo(regras, request.user)
+    return services.expandir_regras(regras, horizonte_dias)
+
+
+@admin_router.delete("/agendamentos/recorrencias/{regra_id}", response={204: None})
+def desativar_regra_recorrencia(request, regra_id: int):
+    """
+    Desativa a regra e cancela as ocorrências futuras ainda aguardando - Acessível por Admin e Master
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    regra = get_object_or_404(models.RegraRecorrencia, id=regra_id)
+    if request.user.tipo == "Admin":
+        if regra.armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a esta regra")
+
+    services.cancelar_ocorrencias_futuras(regra, request.user)
+    return 204, None
+
+
+@admin_router.get("/agendamentos/disponibilidade", response=schemas.DisponibilidadeOut)
+def disponibilidade_robos(request, armazem_id: int, inicio: datetime, fim: datetime,
+                          duracao_minima: int = 0):
+    """
+    Intervalos livres de cada robô do armazém entre `inicio` e `fim`
+    - duracao_minima: em minutos; lacunas menores são omitidas
+    Acessível por Admin e Master
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    if request.user.tipo == "Admin":
+        if armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+
+    return services.janelas_livres(armazem_id, inicio, fim, timedelta(minutes=max(0, duracao_minima)))
+
+
 @admin_router.put("/agendamentos/{agendamento_id}", response={200: schemas.AgendamentoOut, 400: dict})
 def atualizar_agendamento(request, agendamento_id: int, payload: schemas.AgendamentoUpdate):
     """
     Atualiza um agendamento existente - Acessível por Admin e Master
     """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
     agendamento = get_object_or_404(models.Agendamento, id=agendamento_id)
 
     # Verifica permissão
     if request.user.tipo == "Admin":
-        if agendamento.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este agendamento")
 
     try:
@@ -101,11 +225,14 @@ def cancelar_agendamento(request, agendamento_id: int):
     """
     Cancela um agendamento - Acessível por Admin e Master
     """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
     agendamento = get_object_or_404(models.Agendamento, id=agendamento_id)
 
     # Verifica permissão
     if request.user.tipo == "Admin":
-        if agendamento.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este agendamento")
 
     # Só pode cancelar se não estiver em andamento ou concluído
@@ -138,9 +265,7 @@ def listar_agendamentos(request, status: str = None, tipo: str = None):
 
     # Filtra por armazéns permitidos se não for Master/Admin
     if request.user.tipo not in ["Master", "Admin"]:
-        queryset = queryset.filter(
-            armazem_id__in=request.user.armazens_permitidos.values_list('id')
-        )
+        queryset = filtrar_por_escopo(queryset, request.user)
 
     return queryset.order_by('-data_inicio')
 
@@ -154,7 +279,7 @@ def visualizar_agendamento(request, agendamento_id: int):
 
     # Verifica permissão
     if request.user.tipo not in ["Master", "Admin"]:
-        if agendamento.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este agendamento")
 
     return agendamento
@@ -175,9 +300,7 @@ def listar_proximos_agendamentos(request, dias: int = 7):
 
     # Filtra por armazéns permitidos se não for Master/Admin
     if request.user.tipo not in ["Master", "Admin"]:
-        queryset = queryset.filter(
-            armazem_id__in=request.user.armazens_permitidos.values_list('id')
-        )
+        queryset = filtrar_por_escopo(queryset, request.user)
 
     return queryset.order_by('data_inicio')
 
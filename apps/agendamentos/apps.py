@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AgendamentosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.agendamentos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from sistema_sia.processo import eh_processo_servidor
+
+        # Só no servidor (não em migrate/shell): é onde estão os RoboConsumer e os sinais dos agendamentos
+        if getattr(settings, "AGENDADOR", {}).get("NO_PROCESSO", True) and eh_processo_servidor():
+            from .agendador import agendador
+            agendador.iniciar()
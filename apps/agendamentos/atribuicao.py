@@ -0,0 +1,75 @@
+"""
+Escolha automática de robô para agendamentos sem robo_id.
+
+Candidatos: robôs habilitados do armazém, fora de manutenção/erro e com
+bateria (sensores['bateria']) acima do mínimo. Entre os que estão livres
+no período, vence o de menor carga (tempo já agendado na janela em torno do
+período) e, no empate, o de maior bateria. Em lotes os itens são atendidos
+em ordem de início (guloso) e a carga é atualizada a cada escolha, o que
+distribui os agendamentos de forma equilibrada pela frota.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from apps.robos.frota import bateria_dos_sensores
+from apps.robos.models import Robo
+
+STATUS_INDISPONIVEIS = ("manutencao", "erro")
+
+
+def _config():
+    return getattr(settings, "AGENDAMENTOS_ATRIBUICAO", {})
+
+
+def janela_de_carga():
+    return timedelta(hours=_config().get("JANELA_CARGA_HORAS", 24))
+
+
+def robos_elegiveis():
+    """Robôs habilitados e fora de manutenção/erro (a bateria é conferida com bateria_suficiente)."""
+    return Robo.objects.filter(habilitado=True).exclude(status__in=STATUS_INDISPONIVEIS)
+
+
+def bateria_suficiente(bateria):
+    """Sem leitura de bateria o robô não é descartado."""
+    return bateria is None or bateria >= _config().get("BATERIA_MINIMA", 20)
+
+
+def carregar_candidatos(armazem_ids, bloquear=False):
+    """
+    armazem_id -> [(robo_id, bateria), ...]. Com `bloquear`, os robôs ficam
+    travados (select_for_update, em ordem de id) até o fim da transação.
+    """
+    robos = robos_elegiveis().filter(armazem_id__in=list(armazem_ids)).order_by("id")
+    if bloquear:
+        robos = robos.select_for_update()
+
+    candidatos = defaultdict(list)
+    for robo_id, armazem_id, sensores in robos.values_list("id", "armazem_id", "sensores"):
+        bateria = bateria_dos_sensores(sensores)
+        if bateria_suficiente(bateria):
+            candidatos[armazem_id].append((robo_id, bateria))
+    return candidatos
+
+
+def calcular_cargas(indice, robo_ids, inicio, fim):
+    """Segundos já ocupados de cada robô dentro de [inicio, fim)."""
+    cargas = {}
+    for robo_id in robo_ids:
+        total = 0.0
+        for de, ate, _ in indice.periodos(robo_id):
+            sobreposicao = min(ate, fim) - max(de, inicio)
+            if sobreposicao > timedelta(0):
+                total += sobreposicao.total_seconds()
+        cargas[robo_id] = total
+    return cargas
+
+
+def escolher_robo(candidatos, indice, cargas, inicio, fim):
+    """Melhor robô livre em [inicio, fim) ou None."""
+    livres = [
+        (cargas.get(robo_id, 0.0), -(bateria if bateria is not None else 0.0), robo_id)
+        for robo_id, bateria in candidatos
+        if indice.conflito(robo_id, inicio, fim) is None
+    ]
+    return min(livres)[2] if livres else None
@@ -1,10 +1,11 @@
 from ninja.security import APIKeyHeader
 from ninja import NinjaAPI
-from jose import JWTError, jwt
+import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from typing import Optional
+from apps.usuarios.authentication import claims_da_requisicao, resolver_principal
 
 User = get_user_model()
 
@@ -18,22 +19,14 @@ class JWTAuth(APIKeyHeader):
             if key.startswith("Bearer "):
                 key = key[7:]
 
-            # Decodifica o token JWT
-            payload = jwt.decode(
-                key,
-                settings.SECRET_KEY,
-                algorithms=["HS256"]
-            )
-
-            # Obtém o usuário do payload
-            user_id = payload.get("user_id")
-            if not user_id:
+            # Reaproveita as claims já verificadas pelo middleware
+            claims = claims_da_requisicao(request, key)
+            if not claims.user_id:
                 return None
 
-            user = User.objects.get(id=user_id)
-            return user
+            return resolver_principal(claims)
 
-        except (JWTError, User.DoesNotExist):
+        except (jwt.InvalidTokenError, User.DoesNotExist):
             return None
 
 
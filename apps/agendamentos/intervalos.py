@@ -0,0 +1,55 @@
+"""
+Índice em memória dos períodos ocupados de cada robô.
+
+Os agendamentos ativos de um mesmo robô nunca se sobrepõem (garantido pela
+exclusion constraint do banco), então por robô basta uma lista ordenada por
+início: a busca de conflito é um bisect seguido da comparação com os dois
+vizinhos, O(log n), e cada período aceito é inserido na posição certa.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from .models import Agendamento, STATUS_ATIVOS
+
+
+class IndiceIntervalos:
+    def __init__(self):
+        # robo_id -> [(inicio, fim, referencia), ...] ordenada por início
+        self._por_robo = defaultdict(list)
+
+    @classmethod
+    def carregar(cls, robo_ids, inicio, fim):
+        """Carrega, em uma consulta, os agendamentos ativos dos robôs que tocam [inicio, fim)."""
+        indice = cls()
+        ocupados = (
+            Agendamento.objects.filter(
+                robo_id__in=list(robo_ids),
+                status__in=STATUS_ATIVOS,
+                data_inicio__lt=fim,
+                data_fim__gt=inicio,
+            )
+            .order_by()
+            .values_list("robo_id", "data_inicio", "data_fim", "id")
+        )
+        for robo_id, data_inicio, data_fim, agendamento_id in ocupados:
+            indice.inserir(robo_id, data_inicio, data_fim, f"agendamento {agendamento_id}")
+        return indice
+
+    def conflito(self, robo_id, inicio, fim):
+        """Referência do período que se sobrepõe a [inicio, fim), ou None."""
+        periodos = self._por_robo.get(robo_id)
+        if not periodos:
+            return None
+        posicao = bisect_left(periodos, (inicio,))
+        # Anterior: começa antes e ainda não terminou
+        if posicao > 0 and periodos[posicao - 1][1] > inicio:
+            return periodos[posicao - 1][2]
+        # Seguinte: começa antes do fim do novo período
+        if posicao < len(periodos) and periodos[posicao][0] < fim:
+            return periodos[posicao][2]
+        return None
+
+    def inserir(self, robo_id, inicio, fim, referencia):
+        insort(self._por_robo[robo_id], (inicio, fim, referencia))
+
+    def periodos(self, robo_id):
+        return list(self._por_robo.get(robo_id, ()))
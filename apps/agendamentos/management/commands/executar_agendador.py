@@ -0,0 +1,26 @@
+import signal
+from django.core.management.base import BaseCommand
+from apps.agendamentos.agendador import Agendador
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa o agendador: muda o status dos agendamentos em data_inicio/data_fim "
+        "e envia os comandos de início/fim aos robôs. Alternativa ao agendador dentro do "
+        "servidor (AGENDADOR['NO_PROCESSO']): agendamentos novos só são vistos na recarga e "
+        "o push pelo WebSocket exige uma camada de canais compartilhada (Redis)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizonte", type=int, help="Segundos à frente mantidos em memória")
+        parser.add_argument("--recarga", type=int, help="Intervalo de recarga do banco, em segundos")
+
+    def handle(self, *args, **options):
+        agendador = Agendador(horizonte=options["horizonte"], recarga=options["recarga"])
+        signal.signal(signal.SIGTERM, lambda *_: agendador.parar())
+        self.stdout.write(self.style.SUCCESS("Agendador iniciado."))
+        try:
+            agendador.rodar()
+        except KeyboardInterrupt:
+            agendador.parar()
+        self.stdout.write("Agendador encerrado.")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.agendamentos.services import expandir_regras
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os agendamentos das regras de recorrência ativas até o horizonte. "
+        "Idempotente: pode rodar várias vezes ao dia (ex.: cron noturno)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizonte", type=int, help="Dias à frente (padrão: AGENDAMENTOS_RECORRENCIA)")
+
+    def handle(self, *args, **options):
+        resumo = expandir_regras(horizonte_dias=options["horizonte"])
+        for conflito in resumo["conflitos"]:
+            self.stderr.write(
+                f"Regra {conflito['regra_id']} em {conflito['data_inicio']:%Y-%m-%d %H:%M}: "
+                f"conflito com {conflito['conflito']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumo['criados']} agendamentos criados, {resumo['existentes']} já existentes, "
+            f"{len(resumo['conflitos'])} conflitos."
+        ))
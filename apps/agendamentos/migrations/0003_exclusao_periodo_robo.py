@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:31
+
+import apps.agendamentos.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_initial'),
+        ('armazens', '0001_initial'),
+        ('robos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Necessária para combinar igualdade (robo) e sobreposição (tstzrange) no mesmo índice GiST
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='agendamento',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['aguardando', 'em_andamento'])), expressions=[(apps.agendamentos.models.TsTzRange('data_inicio', 'data_fim'), '&&'), ('robo', '=')], name='excl_agendamento_robo_periodo'),
+        ),
+    ]
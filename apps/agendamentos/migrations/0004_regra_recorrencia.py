@@ -0,0 +1,54 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0003_exclusao_periodo_robo'),
+        ('armazens', '0001_initial'),
+        ('robos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegraRecorrencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(default='parcial', max_length=20)),
+                ('descricao', models.TextField(blank=True, null=True)),
+                ('cidades', models.JSONField(blank=True, default=list)),
+                ('frequencia', models.CharField(choices=[('diaria', 'Diária'), ('semanal', 'Semanal')], default='diaria', max_length=10)),
+                ('dias_semana', models.JSONField(blank=True, default=list)),
+                ('hora_inicio', models.TimeField()),
+                ('duracao', models.DurationField()),
+                ('vigencia_inicio', models.DateField()),
+                ('vigencia_fim', models.DateField(blank=True, null=True)),
+                ('excecoes', models.JSONField(blank=True, default=list)),
+                ('ativa', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('armazem', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='armazens.armazem')),
+                ('robo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='robos.robo')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia_criadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Regra de Recorrência',
+                'verbose_name_plural': 'Regras de Recorrência',
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='agendamento',
+            name='regra',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ocorrencias', to='agendamentos.regrarecorrencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='agendamento',
+            constraint=models.UniqueConstraint(fields=('regra', 'data_inicio'), name='unique_ocorrencia_regra'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0004_regra_recorrencia'),
+        ('armazens', '0001_initial'),
+        ('robos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['robo', 'data_inicio'], name='agend_robo_inicio_idx'),
+        ),
+    ]
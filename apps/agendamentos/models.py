@@ -1,10 +1,58 @@
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from apps.usuarios.models import Usuario
 from apps.robos.models import Robo
 from apps.armazens.models import Armazem
 
+# Status em que o robô está de fato reservado para o período
+STATUS_ATIVOS = ['aguardando', 'em_andamento']
+CONSTRAINT_CONFLITO = 'excl_agendamento_robo_periodo'
+MENSAGEM_CONFLITO = "Conflito de agendamento: o robô já está agendado neste período"
+
+
+class TsTzRange(models.Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class RegraRecorrencia(models.Model):
+    """
+    Regra diária/semanal que é expandida em Agendamentos concretos dentro
+    de um horizonte (services.expandir_regras).
+    """
+    FREQUENCIA_CHOICES = [
+        ('diaria', 'Diária'),
+        ('semanal', 'Semanal'),
+    ]
+
+    robo = models.ForeignKey(Robo, on_delete=models.PROTECT, related_name='regras_recorrencia')
+    armazem = models.ForeignKey(Armazem, on_delete=models.PROTECT, related_name='regras_recorrencia')
+    usuario = models.ForeignKey(Usuario, on_delete=models.PROTECT, related_name='regras_recorrencia_criadas')
+    tipo = models.CharField(max_length=20, default='parcial')
+    descricao = models.TextField(blank=True, null=True)
+    cidades = models.JSONField(default=list, blank=True)
+    frequencia = models.CharField(max_length=10, choices=FREQUENCIA_CHOICES, default='diaria')
+    dias_semana = models.JSONField(default=list, blank=True)  # 0 = segunda ... 6 = domingo (regra semanal)
+    hora_inicio = models.TimeField()
+    duracao = models.DurationField()
+    vigencia_inicio = models.DateField()
+    vigencia_fim = models.DateField(null=True, blank=True)
+    excecoes = models.JSONField(default=list, blank=True)  # Datas (AAAA-MM-DD) sem ocorrência
+    ativa = models.BooleanField(default=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Regra de Recorrência'
+        verbose_name_plural = 'Regras de Recorrência'
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"Regra #{self.id} - {self.get_frequencia_display()} às {self.hora_inicio}"
+
 
 class Agendamento(models.Model):
     STATUS_CHOICES = [
@@ -36,40 +84,67 @@ class Agendamento(models.Model):
     excluido_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True,
                                      related_name='agendamentos_excluidos')
     excluido_em = models.DateTimeField(null=True, blank=True)
+    regra = models.ForeignKey(RegraRecorrencia, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='ocorrencias')
 
     class Meta:
         verbose_name = 'Agendamento'
         verbose_name_plural = 'Agendamentos'
         ordering = ['-data_inicio']
+        indexes = [
+            # Varredura ordenada da agenda por robô (disponibilidade, conflitos)
+            models.Index(fields=['robo', 'data_inicio'], name='agend_robo_inicio_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(data_fim__gt=models.F('data_inicio')),
                 name='check_data_fim_maior_que_inicio'
-            )
+            ),
+            # Um robô não pode ter dois agendamentos ativos sobrepostos ([inicio, fim))
+            ExclusionConstraint(
+                name=CONSTRAINT_CONFLITO,
+                expressions=[
+                    (TsTzRange('data_inicio', 'data_fim'), RangeOperators.OVERLAPS),
+                    ('robo', RangeOperators.EQUAL),
+                ],
+                condition=models.Q(status__in=STATUS_ATIVOS),
+            ),
+            # Uma ocorrência por regra e horário: torna a expansão idempotente
+            models.UniqueConstraint(
+                fields=['regra', 'data_inicio'],
+                name='unique_ocorrencia_regra'
+            ),
         ]
 
     def __str__(self):
         return f"Agendamento #{self.id} - {self.get_status_display()}"
 
     def clean(self):
-        # Validação para garantir que o robô pertence ao armazém
-        if self.robo.armazem != self.armazem:
+        # Validação para garantir que o robô pertence ao armazém (compara ids, sem carregar o armazém)
+        if self.robo.armazem_id != self.armazem_id:
             raise ValidationError("O robô selecionado não pertence a este armazém")
 
-        # Validação de conflito de agendamento
-        conflitos = Agendamento.objects.filter(
-            robo=self.robo,
-            data_inicio__lt=self.data_fim,
-            data_fim__gt=self.data_inicio,
-            status__in=['aguardando', 'em_andamento']
-        ).exclude(pk=self.pk if self.pk else None)
-
-        if conflitos.exists():
-            raise ValidationError("Conflito de agendamento: o robô já está agendado neste período")
+        if self.data_inicio and self.data_fim and self.data_fim <= self.data_inicio:
+            raise ValidationError("A data de fim deve ser posterior à data de início")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+        # Conflitos de período ficam com a exclusion constraint do banco,
+        # em vez de uma consulta de sobreposição a cada save
+        self.full_clean(validate_constraints=False)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if eh_conflito_de_periodo(e):
+                raise ValidationError(MENSAGEM_CONFLITO)
+            raise
+
+
+def eh_conflito_de_periodo(erro):
+    """Indica se o IntegrityError veio da constraint de sobreposição por robô."""
+    diag = getattr(erro.__cause__, 'diag', None)
+    nome = getattr(diag, 'constraint_name', None)
+    return nome == CONSTRAINT_CONFLITO if nome else CONSTRAINT_CONFLITO in str(erro)
 
 
 class NotificacaoAgendamento(models.Model):
@@ -1,5 +1,5 @@
 from ninja import Schema
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional, Dict
 from enum import Enum
 
@@ -20,7 +20,7 @@ class TipoAgendamento(str, Enum):
 
 
 class AgendamentoIn(Schema):
-    robo_id: int
+    robo_id: Optional[int] = None  # Sem robô: o servidor escolhe o melhor do armazém
     armazem_id: int
     tipo: TipoAgendamento
     data_inicio: datetime
@@ -76,4 +76,95 @@ class DashboardAgendamento(Schema):
 class EstatisticasAgendamento(Schema):
     total: int
     por_status: List[DashboardAgendamento]
-    proximos: List[AgendamentoOut]
\ No newline at end of file
+    proximos: List[AgendamentoOut]
+
+class AgendamentoLoteIn(Schema):
+    itens: List[AgendamentoIn]
+
+
+class ResultadoAgendamentoLote(Schema):
+    indice: int
+    resultado: str  # criado ou erro
+    id: Optional[int] = None
+    robo_id: Optional[int] = None
+    mensagem: Optional[str] = None
+
+
+class AgendamentoLoteOut(Schema):
+    criados: int
+    rejeitados: int
+    itens: List[ResultadoAgendamentoLote]
+
+
+
+class FrequenciaRecorrencia(str, Enum):
+    diaria = "diaria"
+    semanal = "semanal"
+
+
+class RegraRecorrenciaIn(Schema):
+    robo_id: int
+    armazem_id: int
+    tipo: TipoAgendamento = TipoAgendamento.parcial
+    descricao: Optional[str] = None
+    cidades: List[str] = []
+    frequencia: FrequenciaRecorrencia
+    dias_semana: List[int] = []  # 0 = segunda ... 6 = domingo
+    hora_inicio: time
+    duracao: timedelta
+    vigencia_inicio: date
+    vigencia_fim: Optional[date] = None
+    excecoes: List[date] = []
+
+
+class RegraRecorrenciaOut(Schema):
+    id: int
+    robo_id: int
+    armazem_id: int
+    usuario_id: int
+    tipo: TipoAgendamento
+    descricao: Optional[str] = None
+    cidades: List[str] = []
+    frequencia: FrequenciaRecorrencia
+    dias_semana: List[int] = []
+    hora_inicio: time
+    duracao: timedelta
+    vigencia_inicio: date
+    vigencia_fim: Optional[date] = None
+    excecoes: List[date] = []
+    ativa: bool
+
+    class Config:
+        orm_mode = True
+
+
+class ConflitoRecorrencia(Schema):
+    regra_id: int
+    data_inicio: datetime
+    conflito: str
+
+
+class ExpansaoRecorrenciaOut(Schema):
+    criados: int
+    existentes: int
+    conflitos: List[ConflitoRecorrencia]
+
+
+
+class JanelaLivre(Schema):
+    inicio: datetime
+    fim: datetime
+
+
+class DisponibilidadeRobo(Schema):
+    robo_id: int
+    identificador: str
+    status: str
+    livres: List[JanelaLivre]
+
+
+class DisponibilidadeOut(Schema):
+    armazem_id: int
+    inicio: datetime
+    fim: datetime
+    robos: List[DisponibilidadeRobo]
@@ -0,0 +1,342 @@
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ninja.errors import HttpError
+from apps.robos.frota import bateria_dos_sensores
+from apps.robos.models import Robo
+from apps.usuarios.escopo import escopo_do_usuario
+from . import atribuicao
+from .agendador import notificar_agendador
+from .intervalos import IndiceIntervalos
+from .models import Agendamento, RegraRecorrencia, STATUS_ATIVOS, MENSAGEM_CONFLITO, eh_conflito_de_periodo
+
+
+def _maximo_itens():
+    return getattr(settings, "AGENDAMENTOS_LOTE", {}).get("MAX_ITENS", 1000)
+
+
+def _janela_maxima():
+    return timedelta(days=getattr(settings, "AGENDAMENTOS_DISPONIBILIDADE", {}).get("JANELA_MAXIMA_DIAS", 31))
+
+
+def _validar_item(item, escopo):
+    if escopo is not None and item.armazem_id not in escopo:
+        return "Acesso não autorizado a este armazém"
+    if item.data_fim <= item.data_inicio:
+        return "A data de fim deve ser posterior à data de início"
+    return None
+
+
+def agendar_lote(user, itens):
+    """
+    Valida N agendamentos propostos entre si e contra o banco em uma passada.
+
+    Robôs e períodos já ocupados são carregados com uma consulta cada; os
+    conflitos são verificados no índice em memória (bisect por robô) e os
+    itens aceitos entram no índice, de modo que o lote também é validado
+    contra ele mesmo. Os válidos são gravados com um único bulk_create; a
+    exclusion constraint continua protegendo contra agendamentos concorrentes.
+
+    Itens sem robo_id recebem um robô escolhido pelo servidor (atribuicao):
+    depois dos itens com robô fixo, são atendidos em ordem de início,
+    sempre pelo robô livre de menor carga. Os robôs candidatos ficam
+    travados até o commit para que outra atribuição não escolha o mesmo período.
+    """
+    if len(itens) > _maximo_itens():
+        raise HttpError(400, f"O lote aceita no máximo {_maximo_itens()} agendamentos")
+
+    resultados = [
+        {"indice": i, "resultado": "erro", "id": None, "robo_id": item.robo_id, "mensagem": None}
+        for i, item in enumerate(itens)
+    ]
+    if not itens:
+        return {"criados": 0, "rejeitados": 0, "itens": resultados}
+
+    escopo = escopo_do_usuario(user) if user.tipo == "Admin" else None
+    automaticos = [i for i, item in enumerate(itens) if item.robo_id is None]
+    janela_inicio = min(item.data_inicio for item in itens)
+    janela_fim = max(item.data_fim for item in itens)
+    if automaticos:
+        janela_inicio -= atribuicao.janela_de_carga()
+        janela_fim += atribuicao.janela_de_carga()
+
+    try:
+        with transaction.atomic():
+            robos = Robo.objects.only("id", "armazem_id").in_bulk(
+                {item.robo_id for item in itens if item.robo_id is not None}
+            )
+            candidatos = atribuicao.carregar_candidatos(
+                {itens[i].armazem_id for i in automaticos}, bloquear=True
+            ) if automaticos else {}
+            robo_ids = set(robos) | {robo_id for lista in candidatos.values() for robo_id, _ in lista}
+            ocupados = IndiceIntervalos.carregar(robo_ids, janela_inicio, janela_fim)
+
+            aceitos = []
+            for i, item in enumerate(itens):
+                if item.robo_id is None:
+                    continue
+                robo = robos.get(item.robo_id)
+                if robo is None:
+                    resultados[i]["mensagem"] = "Robô não encontrado"
+                elif robo.armazem_id != item.armazem_id:
+                    resultados[i]["mensagem"] = "O robô selecionado não pertence a este armazém"
+                else:
+                    resultados[i]["mensagem"] = _validar_item(item, escopo)
+                    if resultados[i]["mensagem"] is None:
+                        conflito = ocupados.conflito(item.robo_id, item.data_inicio, item.data_fim)
+                        if conflito is not None:
+                            resultados[i]["mensagem"] = f"{MENSAGEM_CONFLITO} ({conflito})"
+                            continue
+                        ocupados.inserir(item.robo_id, item.data_inicio, item.data_fim, f"item {i} do lote")
+                        aceitos.append(i)
+
+            # Guloso: itens automáticos em ordem de início, robô livre de menor carga
+            cargas = atribuicao.calcular_cargas(ocupados, robo_ids, janela_inicio, janela_fim)
+            for i in sorted(automaticos, key=lambda i: (itens[i].data_inicio, itens[i].data_fim)):
+                item = itens[i]
+                resultados[i]["mensagem"] = _validar_item(item, escopo)
+                if resultados[i]["mensagem"] is not None:
+                    continue
+                robo_id = atribuicao.escolher_robo(
+                    candidatos.get(item.armazem_id, ()), ocupados, cargas, item.data_inicio, item.data_fim
+                )
+                if robo_id is None:
+                    resultados[i]["mensagem"] = "Nenhum robô disponível no período"
+                    continue
+                ocupados.inserir(robo_id, item.data_inicio, item.data_fim, f"item {i} do lote")
+                cargas[robo_id] += (item.data_fim - item.data_inicio).total_seconds()
+                resultados[i]["robo_id"] = robo_id
+                aceitos.append(i)
+
+            aceitos.sort()
+            objetos = [
+                Agendamento(
+                    robo_id=resultados[i]["robo_id"],
+                    armazem_id=itens[i].armazem_id,
+                    usuario=user,
+                    tipo=itens[i].tipo,
+                    data_inicio=itens[i].data_inicio,
+                    data_fim=itens[i].data_fim,
+                    descricao=itens[i].descricao,
+                    cidades=itens[i].cidades or [],
+                )
+                for i in aceitos
+            ]
+            Agendamento.objects.bulk_create(objetos)
+            transaction.on_commit(lambda: notificar_agendador(objetos))
+    except IntegrityError as e:
+        if eh_conflito_de_periodo(e):
+            raise HttpError(409, "Conflito com agendamento criado simultaneamente; reenvie o lote")
+        raise HttpError(400, "Erro ao criar agendamentos")
+
+    for i, objeto in zip(aceitos, objetos):
+        resultados[i]["resultado"] = "criado"
+        resultados[i]["id"] = objeto.pk
+
+    return {
+        "criados": len(aceitos),
+        "rejeitados": len(itens) - len(aceitos),
+        "itens": resultados,
+    }
+
+
+def criar_com_atribuicao(user, dados):
+    """
+    Cria um agendamento escolhendo o robô. Os candidatos são tentados em
+    ordem de preferência; o escolhido é travado com select_for_update
+    (skip_locked: se outra atribuição o está usando, passa ao próximo) e a
+    elegibilidade (status, bateria) e o período são reconferidos no banco
+    antes de gravar.
+    """
+    inicio, fim = dados["data_inicio"], dados["data_fim"]
+    if fim <= inicio:
+        raise HttpError(400, "A data de fim deve ser posterior à data de início")
+
+    janela = atribuicao.janela_de_carga()
+    candidatos = atribuicao.carregar_candidatos([dados["armazem_id"]]).get(dados["armazem_id"], [])
+    robo_ids = [robo_id for robo_id, _ in candidatos]
+    ocupados = IndiceIntervalos.carregar(robo_ids, inicio - janela, fim + janela)
+    cargas = atribuicao.calcular_cargas(ocupados, robo_ids, inicio - janela, fim + janela)
+
+    restantes = list(candidatos)
+    while restantes:
+        robo_id = atribuicao.escolher_robo(restantes, ocupados, cargas, inicio, fim)
+        if robo_id is None:
+            break
+        restantes = [c for c in restantes if c[0] != robo_id]
+
+        with transaction.atomic():
+            robo = atribuicao.robos_elegiveis().select_for_update(skip_locked=True).filter(
+                id=robo_id, armazem_id=dados["armazem_id"]
+            ).first()
+            # Pode ter entrado em manutenção/erro ou descarregado depois da leitura dos candidatos
+            if robo is None or not atribuicao.bateria_suficiente(bateria_dos_sensores(robo.sensores)):
+                continue
+            ocupado = Agendamento.objects.filter(
+                robo_id=robo_id, status__in=STATUS_ATIVOS, data_inicio__lt=fim, data_fim__gt=inicio
+            ).exists()
+            if ocupado:
+                continue
+            return Agendamento.objects.create(**dados, robo=robo, usuario=user)
+
+    raise HttpError(409, "Nenhum robô disponível no período")
+
+
+# --- Recorrência ---
+def _horizonte_padrao():
+    return getattr(settings, "AGENDAMENTOS_RECORRENCIA", {}).get("HORIZONTE_DIAS", 14)
+
+
+def datas_da_regra(regra, inicio, fim):
+    """Datas de ocorrência da regra em [inicio, fim] (datas locais), sem as exceções."""
+    inicio = max(inicio, regra.vigencia_inicio)
+    if regra.vigencia_fim:
+        fim = min(fim, regra.vigencia_fim)
+    excecoes = {date.fromisoformat(d) for d in regra.excecoes or []}
+    dias_semana = set(regra.dias_semana or [])
+
+    dia = inicio
+    while dia <= fim:
+        if dia not in excecoes and (regra.frequencia == "diaria" or dia.weekday() in dias_semana):
+            yield dia
+        dia += timedelta(days=1)
+
+
+def expandir_regras(regras=None, horizonte_dias=None):
+    """
+    Gera os Agendamentos das regras ativas de hoje até o horizonte.
+
+    Idempotente: as ocorrências já existentes (qualquer status, inclusive
+    canceladas) são lidas em uma consulta e puladas; só as que faltam são
+    criadas, com um único bulk_create. Os conflitos são verificados em
+    conjunto contra os períodos ocupados dos robôs (IndiceIntervalos) e
+    contra as próprias ocorrências geradas.
+    """
+    if regras is None:
+        regras = RegraRecorrencia.objects.filter(ativa=True)
+    regras = list(regras)
+    resumo = {"criados": 0, "existentes": 0, "conflitos": []}
+    if not regras:
+        return resumo
+
+    hoje = timezone.localdate()
+    ultimo_dia = hoje + timedelta(days=horizonte_dias or _horizonte_padrao())
+    fuso = timezone.get_current_timezone()
+
+    agora = timezone.now()
+    candidatos = []
+    for regra in regras:
+        for dia in datas_da_regra(regra, hoje, ultimo_dia):
+            inicio = timezone.make_aware(datetime.combine(dia, regra.hora_inicio), fuso)
+            if inicio > agora:
+                candidatos.append((regra, inicio, inicio + regra.duracao))
+    if not candidatos:
+        return resumo
+
+    janela_inicio = min(c[1] for c in candidatos)
+    janela_fim = max(c[2] for c in candidatos)
+    ocorrencias = Agendamento.objects.filter(
+        regra__in=regras, data_inicio__gte=janela_inicio, data_inicio__lte=janela_fim
+    )
+    existentes = set(ocorrencias.values_list("regra_id", "data_inicio"))
+    ocupados = IndiceIntervalos.carregar({regra.robo_id for regra in regras}, janela_inicio, janela_fim)
+
+    novos = []
+    for regra, inicio, fim in candidatos:
+        if (regra.id, inicio) in existentes:
+            resumo["existentes"] += 1
+            continue
+        conflito = ocupados.conflito(regra.robo_id, inicio, fim)
+        if conflito is not None:
+            resumo["conflitos"].append({"regra_id": regra.id, "data_inicio": inicio, "conflito": conflito})
+            continue
+        ocupados.inserir(regra.robo_id, inicio, fim, f"regra {regra.id}")
+        novos.append(Agendamento(
+            regra=regra,
+            robo_id=regra.robo_id,
+            armazem_id=regra.armazem_id,
+            usuario_id=regra.usuario_id,
+            tipo=regra.tipo,
+            descricao=regra.descricao,
+            cidades=regra.cidades,
+            data_inicio=inicio,
+            data_fim=fim,
+        ))
+
+    # ignore_conflicts: expansões concorrentes (unique por regra/horário) e
+    # agendamentos criados no meio tempo (exclusion constraint) são apenas pulados
+    if novos:
+        Agendamento.objects.bulk_create(novos, ignore_conflicts=True)
+        resumo["criados"] = ocorrencias.count() - len(existentes)
+    return resumo
+
+
+def cancelar_ocorrencias_futuras(regra, user):
+    """Desativa a regra e cancela as ocorrências futuras ainda aguardando."""
+    with transaction.atomic():
+        regra.ativa = False
+        regra.save(update_fields=["ativa", "atualizado_em"])
+        return Agendamento.objects.filter(
+            regra=regra, status="aguardando", data_inicio__gt=timezone.now()
+        ).update(status="cancelado", excluido_por=user, excluido_em=timezone.now())
+
+
+# --- Disponibilidade ---
+def janelas_livres(armazem_id, inicio, fim, duracao_minima=None):
+    """
+    Intervalos livres de cada robô habilitado do armazém em [inicio, fim).
+
+    Uma consulta traz os robôs e outra os períodos ocupados de todos eles,
+    já ordenados por (robo, data_inicio) (índice agend_robo_inicio_idx); uma
+    varredura única (sweep line) funde os períodos de cada robô e emite as
+    lacunas com pelo menos `duracao_minima`.
+    """
+    inicio, fim = [timezone.make_aware(d) if timezone.is_naive(d) else d for d in (inicio, fim)]
+    if fim <= inicio:
+        raise HttpError(400, "O fim da janela deve ser posterior ao início")
+    if fim - inicio > _janela_maxima():
+        raise HttpError(400, f"A janela consultada pode ter no máximo {_janela_maxima().days} dias")
+    duracao_minima = duracao_minima or timedelta(0)
+
+    robos = list(
+        Robo.objects.filter(armazem_id=armazem_id, habilitado=True)
+        .order_by("id")
+        .values_list("id", "identificador", "status")
+    )
+    ocupados = (
+        Agendamento.objects.filter(
+            robo_id__in=[robo_id for robo_id, _, _ in robos],
+            status__in=STATUS_ATIVOS,
+            data_inicio__lt=fim,
+            data_fim__gt=inicio,
+        )
+        .order_by("robo_id", "data_inicio")
+        .values_list("robo_id", "data_inicio", "data_fim")
+    )
+
+    livres = {robo_id: [] for robo_id, _, _ in robos}
+    cursores = {}  # robo_id -> fim do último período ocupado visto
+
+    def emitir(robo_id, de, ate):
+        if ate - de >= duracao_minima and ate > de:
+            livres[robo_id].append({"inicio": de, "fim": ate})
+
+    for robo_id, data_inicio, data_fim in ocupados:
+        cursor = cursores.get(robo_id, inicio)
+        if data_inicio > cursor:
+            emitir(robo_id, cursor, data_inicio)
+        cursores[robo_id] = max(cursor, data_fim)
+
+    for robo_id in livres:
+        emitir(robo_id, cursores.get(robo_id, inicio), fim)
+
+    return {
+        "armazem_id": armazem_id,
+        "inicio": inicio,
+        "fim": fim,
+        "robos": [
+            {"robo_id": robo_id, "identificador": identificador, "status": status, "livres": livres[robo_id]}
+            for robo_id, identificador, status in robos
+        ],
+    }
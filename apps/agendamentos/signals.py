@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Agendamento
+from .agendador import notificar_agendador
+
+
+# --- Agendador em processo ---
+@receiver(post_save, sender=Agendamento)
+def reprogramar_agendamento(sender, instance, **kwargs):
+    transaction.on_commit(lambda: notificar_agendador([instance]))
@@ -7,6 +7,7 @@ from django.http import JsonResponse
 from django.core.exceptions import PermissionDenied
 from . import schemas, models, exceptions
 from apps.usuarios.authentication import JWTAuth
+from apps.usuarios.escopo import escopo_do_usuario, filtrar_por_escopo
 
 # Criação dos roteadores principais
 router = Router()  # Rotas públicas
@@ -123,11 +124,7 @@ def visualizar_armazem(request, armazem_id: int):
     # Master e Admin têm acesso livre
     if request.user.tipo not in ["Master", "Admin"]:
         # Verifica permissão para usuários comuns
-        if not models.Armazem.objects.filter(
-                id=armazem_id,
-                ativo=True,
-                id__in=request.user.armazens_permitidos.values_list('id')
-        ).exists():
+        if armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este armazém")
 
     armazem = get_object_or_404(models.Armazem, id=armazem_id, ativo=True)
@@ -144,10 +141,7 @@ def listar_meus_armazens(request):
     if request.user.tipo in ["Master", "Admin"]:
         return models.Armazem.objects.filter(ativo=True)
 
-    return models.Armazem.objects.filter(
-        ativo=True,
-        id__in=request.user.armazens_permitidos.values_list('id')
-    )
+    return filtrar_por_escopo(models.Armazem.objects.filter(ativo=True), request.user, 'id')
 
 
 # --- Montagem da hierarquia de roteadores ---
@@ -1,7 +1,9 @@
 from ninja.security import APIKeyHeader
 from django.contrib.auth import get_user_model
-from jose import jwt
-from django.conf import settings
+import jwt
+from apps.usuarios.authentication import claims_da_requisicao, resolver_principal
+from apps.usuarios.escopo import escopo_do_usuario
+from .exceptions import PermissionDenied
 
 User = get_user_model()
 
@@ -12,10 +14,13 @@ class JWTAuth(APIKeyHeader):
     def authenticate(self, request, key):
         try:
             token = key.split(" ")[1]  # Remove "Bearer "
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user = User.objects.get(id=payload['user_id'])
-            return user
-        except (IndexError, jwt.JWTError, User.DoesNotExist):
+            # Reaproveita as claims já verificadas pelo middleware
+            claims = claims_da_requisicao(request, token)
+            if not claims.user_id:
+                return None
+
+            return resolver_principal(claims)
+        except (IndexError, jwt.InvalidTokenError, User.DoesNotExist):
             return None
 
 
@@ -39,7 +44,7 @@ def user_has_armazem_access(armazem_id):
             return True
 
         # Verifica se usuário comum tem acesso ao armazém
-        if not user.armazens_permitidos.filter(id=armazem_id).exists():
+        if armazem_id not in escopo_do_usuario(user):
             raise PermissionDenied("Acesso não autorizado a este armazém")
 
     return decorator
\ No newline at end of file
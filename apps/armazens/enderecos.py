@@ -0,0 +1,122 @@
+"""
+Chave numérica ordenável para endereços `cidade:bairro:rua:predio:nivel:apto`.
+
+Cada componente ocupa BITS_COMPONENTE bits, do mais significativo (cidade)
+para o menos significativo (apto). Assim a ordem da chave é a ordem
+hierárquica do endereço, e "tudo da cidade X / bairro Y / rua Z" vira um
+intervalo contíguo [inicio, fim), resolvido por um range scan no índice.
+"""
+from django.db.models import Q
+
+COMPONENTES = ("cidade", "bairro", "rua", "predio", "nivel", "apto")
+BITS_COMPONENTE = 10
+MAXIMO_COMPONENTE = (1 << BITS_COMPONENTE) - 1
+SEPARADOR = ":"
+
+
+def _valor_componente(parte):
+    """Componente numérico ('07' -> 7) ou uma letra ('B' -> 2, para níveis)."""
+    parte = parte.strip()
+    if parte.isdigit():
+        valor = int(parte)
+    elif len(parte) == 1 and parte.isalpha() and parte.isascii():
+        valor = ord(parte.upper()) - ord("A") + 1
+    else:
+        return None
+    return valor if valor <= MAXIMO_COMPONENTE else None
+
+
+def decompor(codigo, minimo=1):
+    """
+    Converte o código nos valores inteiros de cada componente.
+    Retorna None se o código não for um endereço válido.
+    """
+    if not codigo:
+        return None
+    partes = codigo.split(SEPARADOR)
+    if not minimo <= len(partes) <= len(COMPONENTES):
+        return None
+    valores = [_valor_componente(parte) for parte in partes]
+    if None in valores:
+        return None
+    return valores
+
+
+def _empacotar(valores):
+    chave = 0
+    for valor in valores:
+        chave = (chave << BITS_COMPONENTE) | valor
+    return chave << BITS_COMPONENTE * (len(COMPONENTES) - len(valores))
+
+
+def chave_endereco(codigo):
+    """Chave empacotada de um endereço completo (6 componentes) ou None."""
+    valores = decompor(codigo, minimo=len(COMPONENTES))
+    return None if valores is None else _empacotar(valores)
+
+
+def faixa_prefixo(prefixo):
+    """
+    Intervalo [inicio, fim) das chaves cujo endereço começa com `prefixo`
+    (ex.: '3', '3:12', '3:12:5'). Retorna None se o prefixo for inválido.
+    """
+    valores = decompor(prefixo.rstrip(SEPARADOR) if prefixo else prefixo)
+    if valores is None:
+        return None
+    inicio = _empacotar(valores)
+    return inicio, inicio + (1 << BITS_COMPONENTE * (len(COMPONENTES) - len(valores)))
+
+
+def q_prefixo(prefixo, campo="chave_endereco"):
+    """Q para `campo` dentro da faixa do prefixo, ou None se o prefixo for inválido."""
+    faixa = faixa_prefixo(prefixo)
+    if faixa is None:
+        return None
+    return Q(**{f"{campo}__gte": faixa[0], f"{campo}__lt": faixa[1]})
+
+
+def filtrar_por_prefixo(queryset, prefixo, campo="chave_endereco"):
+    """Filtra o queryset pelo prefixo de endereço; prefixo inválido não retorna nada."""
+    filtro = q_prefixo(prefixo, campo)
+    return queryset.none() if filtro is None else queryset.filter(filtro)
+
+
+def componente(chave, nome):
+    """Extrai um componente (ex.: 'cidade') de uma chave empacotada."""
+    deslocamento = BITS_COMPONENTE * (len(COMPONENTES) - 1 - COMPONENTES.index(nome))
+    return (chave >> deslocamento) & MAXIMO_COMPONENTE
+
+
+def preencher_chave(instancia, campo_codigo, kwargs):
+    """
+    Usado no save() dos modelos: recalcula `chave_endereco` a partir de
+    `campo_codigo` e inclui a chave em update_fields quando o código é salvo.
+    """
+    instancia.chave_endereco = chave_endereco(getattr(instancia, campo_codigo))
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and campo_codigo in update_fields:
+        kwargs["update_fields"] = {*update_fields, "chave_endereco"}
+    return kwargs
+
+
+def preencher_chaves_existentes(modelo, campo_codigo, lote=2000):
+    """
+    Backfill de `chave_endereco` para linhas antigas, em lotes com bulk_update.
+    Aceita modelos históricos (usado nas migrações).
+    """
+    pendentes = modelo.objects.filter(chave_endereco__isnull=True).order_by("pk")
+    ultimo_pk = None
+    while True:
+        pagina = pendentes if ultimo_pk is None else pendentes.filter(pk__gt=ultimo_pk)
+        linhas = list(pagina.values_list("pk", campo_codigo)[:lote])
+        if not linhas:
+            return
+        objetos = []
+        for pk, codigo in linhas:
+            chave = chave_endereco(codigo)
+            if chave is not None:
+                objeto = modelo(pk=pk)
+                objeto.chave_endereco = chave
+                objetos.append(objeto)
+        modelo.objects.bulk_update(objetos, ["chave_endereco"])
+        ultimo_pk = linhas[-1][0]
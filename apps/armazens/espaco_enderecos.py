@@ -0,0 +1,130 @@
+"""
+Espaço de endereços de um armazém.
+
+As dimensões do armazém (cidades, bairros por cidade, ruas por bairro,
+prédios por rua e níveis) definem uma grade; cada endereço válido
+`cidade:bairro:rua:predio:nivel[:apto]` recebe um índice denso em
+[0, total) em base mista, com a cidade como dígito mais significativo.
+O apartamento não tem dimensão no armazém e é ignorado.
+
+Os componentes são numerados a partir de 1 (nível também aceita letra:
+A = 1), como em apps.armazens.enderecos.
+"""
+from .enderecos import decompor
+
+NIVEIS_ENDERECO = ("cidade", "bairro", "rua", "predio", "nivel")
+
+
+def _quantidade_niveis(qtd_niveis):
+    valores = decompor(str(qtd_niveis or "").strip())
+    return valores[0] if valores and len(valores) == 1 else 0
+
+
+class EspacoEnderecos:
+    def __init__(self, cidades, bairros, ruas, predios, niveis):
+        self.dimensoes = tuple(max(0, int(d)) for d in (cidades, bairros, ruas, predios, niveis))
+        # Peso de cada componente no índice (base mista)
+        pesos, peso = [], 1
+        for dimensao in reversed(self.dimensoes):
+            pesos.append(peso)
+            peso *= dimensao
+        self.pesos = tuple(reversed(pesos))
+        self.total = peso
+
+    @classmethod
+    def do_armazem(cls, armazem):
+        return cls(
+            armazem.qtd_cidades,
+            armazem.qtd_bairros_por_cidade,
+            armazem.qtd_ruas_por_bairro,
+            armazem.qtd_predios_por_rua,
+            _quantidade_niveis(armazem.qtd_niveis),
+        )
+
+    def __len__(self):
+        return self.total
+
+    def indice(self, codigo):
+        """Índice denso do endereço, ou None se estiver fora da grade do armazém."""
+        valores = decompor(codigo, minimo=len(NIVEIS_ENDERECO))
+        if valores is None:
+            return None
+        indice = 0
+        for valor, dimensao, peso in zip(valores, self.dimensoes, self.pesos):
+            if not 1 <= valor <= dimensao:
+                return None
+            indice += (valor - 1) * peso
+        return indice
+
+    def endereco(self, indice):
+        """Endereço `cidade:bairro:rua:predio:nivel` do índice."""
+        if not 0 <= indice < self.total:
+            raise IndexError(indice)
+        partes = []
+        for peso in self.pesos:
+            valor, indice = divmod(indice, peso)
+            partes.append(str(valor + 1))
+        return ":".join(partes)
+
+    def faixa_cidade(self, cidade):
+        """Índices [inicio, fim) da cidade: contíguos, pois a cidade é o dígito mais significativo."""
+        inicio = (cidade - 1) * self.pesos[0]
+        return inicio, inicio + self.pesos[0]
+
+
+class MapaCobertura:
+    """Bitmap (bytearray) com um bit por endereço do espaço."""
+
+    def __init__(self, espaco, dados=None):
+        self.espaco = espaco
+        tamanho = (espaco.total + 7) // 8
+        self.dados = bytearray(dados or b"")
+        if len(self.dados) != tamanho:
+            self.dados = bytearray(tamanho)
+
+    def marcar(self, indice):
+        """Marca o endereço; retorna True se ele ainda não estava coberto."""
+        byte, bit = divmod(indice, 8)
+        mascara = 1 << bit
+        if self.dados[byte] & mascara:
+            return False
+        self.dados[byte] |= mascara
+        return True
+
+    def __contains__(self, indice):
+        byte, bit = divmod(indice, 8)
+        return bool(self.dados[byte] >> bit & 1)
+
+    def _inteiro(self):
+        return int.from_bytes(self.dados, "little")
+
+    def cobertos(self):
+        return self._inteiro().bit_count()
+
+    def cobertos_na_faixa(self, inicio, fim, inteiro=None):
+        inteiro = self._inteiro() if inteiro is None else inteiro
+        return (inteiro >> inicio & ((1 << (fim - inicio)) - 1)).bit_count()
+
+    def cobertura_por_cidade(self):
+        inteiro = self._inteiro()
+        resultado = []
+        for cidade in range(1, self.espaco.dimensoes[0] + 1):
+            inicio, fim = self.espaco.faixa_cidade(cidade)
+            resultado.append((cidade, self.cobertos_na_faixa(inicio, fim, inteiro), fim - inicio))
+        return resultado
+
+    def faltantes(self, limite=None):
+        """Índices ainda não cobertos, em ordem; pula bytes cheios."""
+        encontrados = []
+        for byte, valor in enumerate(self.dados):
+            if valor == 0xFF:
+                continue
+            for bit in range(8):
+                indice = byte * 8 + bit
+                if indice >= self.espaco.total:
+                    return encontrados
+                if not valor >> bit & 1:
+                    encontrados.append(indice)
+                    if limite is not None and len(encontrados) >= limite:
+                        return encontrados
+        return encontrados
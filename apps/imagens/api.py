@@ -2,8 +2,11 @@ from ninja import Router
 from django.shortcuts import get_object_or_404
 from typing import List
 from django.core.exceptions import PermissionDenied
+from django.db.models import Q
 from . import schemas, models
 from apps.usuarios.authentication import JWTAuth
+from apps.armazens.enderecos import q_prefixo
+from apps.usuarios.escopo import filtrar_por_escopo
 
 router = Router()
 auth_router = Router(auth=JWTAuth())
@@ -56,9 +59,8 @@ def visualizar_imagem(request, imagem_id: int):
     imagem = get_object_or_404(models.ImagemCapturada, id=imagem_id)
 
     if request.user.tipo not in ["Master", "Admin"]:
-        if not models.Agendamento.objects.filter(
-                robo=imagem.robo,
-                armazem_id__in=request.user.armazens_permitidos.values_list('id')
+        if not filtrar_por_escopo(
+                models.Agendamento.objects.filter(robo_id=imagem.robo_id), request.user
         ).exists():
             raise PermissionDenied("Acesso não autorizado a esta imagem")
 
@@ -68,16 +70,17 @@ def visualizar_imagem(request, imagem_id: int):
 @user_router.get("/imagens/por-endereco/{codigo_endereco}", response=List[schemas.ImagemOut])
 def listar_imagens_por_endereco(request, codigo_endereco: str):
     """
-    Lista imagens por código de endereço (formato: cidade:bairro:rua:predio:nivel:apto)
+    Lista imagens por código de endereço (formato: cidade:bairro:rua:predio:nivel:apto).
+    Aceita prefixos (ex.: `3:12` para todo o bairro 12 da cidade 3), resolvidos
+    como faixa de `chave_endereco`; códigos que não são endereço caem na busca textual.
     """
-    queryset = models.ImagemCapturada.objects.filter(
-        codigo_lido__contains=codigo_endereco
-    ).order_by('-data_hora')
+    filtro = q_prefixo(codigo_endereco)
+    if filtro is None:
+        filtro = Q(codigo_lido__contains=codigo_endereco)
+    queryset = models.ImagemCapturada.objects.filter(filtro).order_by('-data_hora')
 
     if request.user.tipo not in ["Master", "Admin"]:
-        queryset = queryset.filter(
-            robo__armazem_id__in=request.user.armazens_permitidos.values_list('id')
-        )
+        queryset = filtrar_por_escopo(queryset, request.user, 'robo__armazem_id')
 
     return queryset
 
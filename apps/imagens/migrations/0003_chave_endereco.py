@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from apps.armazens.enderecos import preencher_chaves_existentes
+
+
+def preencher_chaves(apps, schema_editor):
+    preencher_chaves_existentes(apps.get_model('imagens', 'ImagemCapturada'), 'codigo_lido')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imagens', '0002_initial'),
+        ('robos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemcapturada',
+            name='chave_endereco',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Preenchida quando codigo_lido é um endereço (apps.armazens.enderecos)', null=True, verbose_name='Chave do Endereço'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='imagemcapturada',
+            index=models.Index(fields=['chave_endereco', '-data_hora'], name='img_chave_endereco_idx'),
+        ),
+    ]
@@ -1,21 +1,36 @@
 from django.db import models
 from apps.robos.models import Robo
 from apps.agendamentos.models import Agendamento
+from apps.armazens.enderecos import preencher_chave
 
 class ImagemCapturada(models.Model):
     robo = models.ForeignKey(Robo, on_delete=models.CASCADE, related_name='imagens')
     url_imagem = models.TextField(verbose_name='URL da Imagem')
     codigo_lido = models.CharField(max_length=50, verbose_name='Código Identificado')
+    chave_endereco = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Chave do Endereço',
+        help_text='Preenchida quando codigo_lido é um endereço (apps.armazens.enderecos)'
+    )
     data_hora = models.DateTimeField(auto_now_add=True, verbose_name='Data/Hora da Captura')
 
     class Meta:
         verbose_name = 'Imagem Capturada'
         verbose_name_plural = 'Imagens Capturadas'
         ordering = ['-data_hora']
+        indexes = [
+            models.Index(fields=['chave_endereco', '-data_hora'], name='img_chave_endereco_idx'),
+        ]
 
     def __str__(self):
         return f"Imagem {self.id} - Robô {self.robo.identificador}"
 
+    def save(self, *args, **kwargs):
+        preencher_chave(self, 'codigo_lido', kwargs)
+        super().save(*args, **kwargs)
+
 class LogProcessamentoImagem(models.Model):
     imagem = models.ForeignKey(ImagemCapturada, on_delete=models.CASCADE, related_name='logs_processamento')
     status = models.CharField(max_length=20, choices=[
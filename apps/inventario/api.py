@@ -1,10 +1,18 @@
 from ninja import Router
 from django.shortcuts import get_object_or_404
-from typing import List
 from django.core.exceptions import PermissionDenied
-
-from . import schemas, models
+from django.core.handlers.asgi import ASGIRequest
+from ninja.errors import HttpError
+from django.db.models import Max, Sum
+
+from . import schemas, models, services
+from .paginacao import paginar_inventario
+from .exportacao import exportar_inventario
+from .cobertura import resumo_cobertura
+from .heatmap import heatmap_armazem
+from apps.armazens.enderecos import q_prefixo
 from apps.usuarios.authentication import JWTAuth
+from apps.usuarios.escopo import escopo_do_usuario, filtrar_por_escopo
 
 router = Router()
 auth_router = Router(auth=JWTAuth())
@@ -25,13 +33,14 @@ def estatisticas_inventario(request):
         raise PermissionDenied("Acesso restrito a usuários Master")
 
     total_armazens = models.Armazem.objects.count()
-    total_registros = models.Inventario.objects.count()
-    ultimo_inventario = models.Inventario.objects.order_by('-data_hora').first()
+    totais = models.ContadorInventarioArmazem.objects.aggregate(
+        total=Sum('total_itens'), ultimo=Max('ultimo_registro')
+    )
 
     return {
         "total_armazens": total_armazens,
-        "total_registros": total_registros,
-        "ultimo_inventario": ultimo_inventario.data_hora if ultimo_inventario else None
+        "total_registros": totais['total'] or 0,
+        "ultimo_inventario": totais['ultimo']
     }
 
 
@@ -49,7 +58,7 @@ def registrar_inventario(request, payload: schemas.InventarioIn):
 
     # Para Admin, verifica se o armazém está nos permitidos
     if request.user.tipo == "Admin":
-        if agendamento.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este armazém")
 
     inventario = models.Inventario.objects.create(
@@ -61,48 +70,126 @@ def registrar_inventario(request, payload: schemas.InventarioIn):
     return 201, inventario
 
 
-@admin_router.get("/inventario/por-armazem/{armazem_id}", response=List[schemas.InventarioOut])
-def listar_inventario_armazem(request, armazem_id: int):
+@admin_router.post("/inventario/registrar-lote", response={200: schemas.InventarioLoteOut})
+def registrar_inventario_lote(request, payload: schemas.InventarioLoteIn):
+    """
+    Registra paletes em lote (ex.: varredura de um corredor) - Acessível por Admin e Master
+    Paletes já existentes são atualizados; o resultado de cada item é devolvido
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+
+    return 200, services.registrar_lote(request.user, payload.itens)
+
+
+@admin_router.get("/inventario/por-armazem/{armazem_id}", response=schemas.PaginaInventarioOut)
+def listar_inventario_armazem(request, armazem_id: int, cursor: str = None, limite: int = None,
+                              endereco: str = None):
     """
     Lista itens do inventário por armazém - Acessível por Admin e Master
+    Paginado por cursor: envie `proximo_cursor` da página anterior em `cursor`
+    `endereco` filtra por prefixo (ex.: `3`, `3:12`, `3:12:5` = cidade/bairro/rua)
     """
     if request.user.tipo == "Admin":
-        if armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este armazém")
 
-    return models.Inventario.objects.filter(
-        agendamento__armazem_id=armazem_id
-    ).order_by('-data_hora')
+    queryset = models.Inventario.objects.filter(armazem_id=armazem_id)
+    if endereco:
+        filtro = q_prefixo(endereco)
+        if filtro is None:
+            raise HttpError(400, "Prefixo de endereço inválido")
+        queryset = queryset.filter(filtro)
+
+    return paginar_inventario(queryset, cursor, limite)
 
 
 # --- ROTAS USUÁRIO (Todos autenticados) ---
-@user_router.get("/inventario/meus", response=List[schemas.InventarioOut])
-def listar_meu_inventario(request):
+@user_router.get("/inventario/meus", response=schemas.PaginaInventarioOut)
+def listar_meu_inventario(request, cursor: str = None, limite: int = None):
     """
-    Lista itens do inventário nos armazéns permitidos ao usuário
+    Lista itens do inventário nos armazéns permitidos ao usuário (paginado por cursor)
     """
     if request.user.tipo in ["Master", "Admin"]:
-        return models.Inventario.objects.all().order_by('-data_hora')
+        return paginar_inventario(models.Inventario.objects.all(), cursor, limite)
 
-    return models.Inventario.objects.filter(
-        agendamento__armazem_id__in=request.user.armazens_permitidos.values_list('id')
-    ).order_by('-data_hora')
+    return paginar_inventario(
+        filtrar_por_escopo(models.Inventario.objects.all(), request.user), cursor, limite
+    )
+
+
+@admin_router.get("/inventario/heatmap/{armazem_id}", response=schemas.HeatmapArmazemOut)
+def heatmap_inventario(request, armazem_id: int, nivel: str = "rua"):
+    """
+    Heatmap de atualidade (último registro) e divergência por cidade, bairro
+    ou rua do armazém - Acessível por Admin e Master
+    """
+    if request.user.tipo == "Admin":
+        if armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+
+    return heatmap_armazem(armazem_id, nivel)
 
 
-@user_router.get("/inventario/por-agendamento/{agendamento_id}", response=List[schemas.InventarioOut])
-def listar_inventario_agendamento(request, agendamento_id: int):
+@user_router.get("/inventario/por-agendamento/{agendamento_id}", response=schemas.PaginaInventarioOut)
+def listar_inventario_agendamento(request, agendamento_id: int, cursor: str = None, limite: int = None):
     """
-    Lista itens do inventário por agendamento
+    Lista itens do inventário por agendamento (paginado por cursor)
     """
     agendamento = get_object_or_404(models.Agendamento, id=agendamento_id)
 
     if request.user.tipo not in ["Master", "Admin"]:
-        if agendamento.armazem_id not in request.user.armazens_permitidos.values_list('id'):
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este agendamento")
 
-    return models.Inventario.objects.filter(
-        agendamento_id=agendamento_id
-    ).order_by('-data_hora')
+    return paginar_inventario(
+        models.Inventario.objects.filter(agendamento_id=agendamento_id), cursor, limite
+    )
+
+
+@user_router.get("/inventario/cobertura/{agendamento_id}", response=schemas.CoberturaAgendamentoOut)
+def cobertura_agendamento(request, agendamento_id: int, limite_faltantes: int = 100):
+    """
+    Cobertura de endereços do agendamento: percentual geral, por cidade e
+    os primeiros `limite_faltantes` endereços ainda não inventariados
+    """
+    agendamento = get_object_or_404(models.Agendamento.objects.select_related("armazem"), id=agendamento_id)
+
+    if request.user.tipo != "Master":
+        if agendamento.armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este agendamento")
+
+    return resumo_cobertura(agendamento, max(0, min(limite_faltantes, 1000)))
+
+
+@user_router.get("/inventario/exportar")
+def exportar_inventario_endpoint(request, armazem_id: int = None, agendamento_id: int = None,
+                                 formato: str = "ndjson", compactar: bool = False):
+    """
+    Exporta todo o inventário de um armazém ou agendamento em streaming
+    - formato: "ndjson" (padrão) ou "csv"
+    - compactar: gzip aplicado durante o envio
+    """
+    if formato not in ["ndjson", "csv"]:
+        raise HttpError(400, "Formato inválido. Use 'ndjson' ou 'csv'")
+
+    if agendamento_id:
+        agendamento = get_object_or_404(models.Agendamento, id=agendamento_id)
+        armazem_id_alvo = agendamento.armazem_id
+        queryset = models.Inventario.objects.filter(agendamento_id=agendamento_id)
+        nome = f"inventario-agendamento-{agendamento_id}"
+    elif armazem_id:
+        armazem_id_alvo = armazem_id
+        queryset = models.Inventario.objects.filter(armazem_id=armazem_id)
+        nome = f"inventario-armazem-{armazem_id}"
+    else:
+        raise HttpError(400, "Informe armazem_id ou agendamento_id")
+
+    if request.user.tipo != "Master":
+        if armazem_id_alvo not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+
+    return exportar_inventario(queryset, formato, compactar, nome, assincrono=isinstance(request, ASGIRequest))
 
 
 @user_router.get("/inventario/dashboard", response=schemas.DashboardInventario)
@@ -113,21 +200,21 @@ def dashboard_inventario(request):
     if request.user.tipo in ["Master", "Admin"]:
         armazens = models.Armazem.objects.all()
     else:
-        armazens = request.user.armazens_permitidos.all()
-
-    resultados = []
-    for armazem in armazens:
-        count = models.Inventario.objects.filter(
-            agendamento__armazem=armazem
-        ).count()
-
-        resultados.append({
-            "armazem": armazem.nome,
-            "total_itens": count,
-            "ultimo_registro": models.Inventario.objects.filter(
-                agendamento__armazem=armazem
-            ).order_by('-data_hora').first().data_hora if count > 0 else None
-        })
+        armazens = filtrar_por_escopo(models.Armazem.objects.all(), request.user, 'id')
+
+    # Uma consulta: armazéns com LEFT JOIN nos contadores mantidos incrementalmente
+    linhas = armazens.order_by('nome').values(
+        'nome', 'contador_inventario__total_itens', 'contador_inventario__ultimo_registro'
+    )
+
+    resultados = [
+        {
+            "armazem": linha['nome'],
+            "total_itens": linha['contador_inventario__total_itens'] or 0,
+            "ultimo_registro": linha['contador_inventario__ultimo_registro'],
+        }
+        for linha in linhas
+    ]
 
     return {"armazens": resultados}
 
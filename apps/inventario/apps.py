@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class InventarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventario'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from sistema_sia.processo import eh_processo_servidor
+        from .estatisticas import iniciar_job_periodico
+
+        # Só no servidor (não em migrate/shell) e se INVENTARIO_ESTATISTICAS['INTERVALO_SEGUNDOS'] estiver configurado
+        if eh_processo_servidor():
+            iniciar_job_periodico()
@@ -0,0 +1,207 @@
+"""
+Cobertura de endereços por agendamento (bitmap em CoberturaAgendamento).
+
+O bitmap é montado na primeira leitura e depois mantido pelos registros de
+inventário. Cada palete confirmado entra, via transaction.on_commit (só
+inserts que de fato fizeram commit, inclusive com savepoints), em um buffer
+write-behind; uma thread grava os endereços acumulados a cada INTERVALO_MS,
+uma escrita por agendamento, fora das transações dos inserts. A leitura
+descarrega antes o que este processo ainda tem pendente do agendamento.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from apps.armazens.espaco_enderecos import EspacoEnderecos, MapaCobertura
+from .models import Agendamento, CoberturaAgendamento, Inventario
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return getattr(settings, "INVENTARIO_COBERTURA", {})
+
+
+def _espaco(agendamento):
+    return EspacoEnderecos.do_armazem(agendamento.armazem)
+
+
+def _montar(agendamento, espaco):
+    """Reconstrói o bitmap a partir dos itens do agendamento (uma leitura só de codigo_endereco)."""
+    mapa = MapaCobertura(espaco)
+    codigos = (
+        Inventario.objects.filter(agendamento_id=agendamento.id)
+        .values_list("codigo_endereco", flat=True)
+        .iterator(chunk_size=5000)
+    )
+    for codigo in codigos:
+        indice = espaco.indice(codigo)
+        if indice is not None:
+            mapa.marcar(indice)
+    return mapa
+
+
+def _salvar(registro, espaco, mapa):
+    registro.dimensoes = list(espaco.dimensoes)
+    registro.mapa = bytes(mapa.dados)
+    registro.enderecos_cobertos = mapa.cobertos()
+    registro.save()
+
+
+def obter_cobertura(agendamento):
+    """
+    Retorna (espaco, mapa) do agendamento. O bitmap é montado na primeira
+    leitura ou quando as dimensões do armazém mudaram; depois disso é
+    mantido pelos registros de inventário.
+    """
+    marcacoes.descarregar([agendamento.id])
+    espaco = _espaco(agendamento)
+    registro = CoberturaAgendamento.objects.filter(agendamento_id=agendamento.id).first()
+    if registro is not None and tuple(registro.dimensoes) == espaco.dimensoes:
+        return espaco, MapaCobertura(espaco, registro.mapa)
+
+    # A linha é gravada (sem dimensões) antes da montagem: uma marcação que chegue
+    # durante a leitura dos itens a encontra, espera a trava e marca sobre o bitmap novo
+    if registro is None:
+        CoberturaAgendamento.objects.get_or_create(
+            agendamento_id=agendamento.id, defaults={"dimensoes": [], "mapa": b"", "enderecos_cobertos": 0}
+        )
+    with transaction.atomic():
+        registro = CoberturaAgendamento.objects.select_for_update().get(agendamento_id=agendamento.id)
+        mapa = _montar(agendamento, espaco)
+        _salvar(registro, espaco, mapa)
+    return espaco, mapa
+
+
+def _tem_novos(registro, espaco, codigos):
+    mapa = MapaCobertura(espaco, registro.mapa)
+    indices = (espaco.indice(codigo) for codigo in codigos)
+    return any(indice is not None and indice not in mapa for indice in indices)
+
+
+def marcar_enderecos(agendamento_id, codigos):
+    """Marca os endereços como cobertos. Se ainda não há bitmap, ele será montado na leitura."""
+    agendamento = Agendamento.objects.select_related("armazem").get(id=agendamento_id)
+    espaco = _espaco(agendamento)
+
+    # Endereços já cobertos (releituras) não travam nem regravam o bitmap. Sem linha não há
+    # o que marcar: a montagem grava a linha antes de ler os itens, então este palete entra nela
+    atual = CoberturaAgendamento.objects.filter(agendamento_id=agendamento_id).first()
+    if atual is None or (tuple(atual.dimensoes) == espaco.dimensoes and not _tem_novos(atual, espaco, codigos)):
+        return
+
+    with transaction.atomic():
+        registro = CoberturaAgendamento.objects.select_for_update().filter(agendamento_id=agendamento_id).first()
+        if registro is None:
+            return
+        if tuple(registro.dimensoes) != espaco.dimensoes:
+            _salvar(registro, espaco, _montar(agendamento, espaco))
+            return
+
+        mapa = MapaCobertura(espaco, registro.mapa)
+        novos = 0
+        for codigo in codigos:
+            indice = espaco.indice(codigo)
+            if indice is not None and mapa.marcar(indice):
+                novos += 1
+        if novos:
+            registro.mapa = bytes(mapa.dados)
+            registro.enderecos_cobertos += novos
+            registro.save(update_fields=["mapa", "enderecos_cobertos", "atualizado_em"])
+
+
+class MarcacoesPendentes:
+    """Endereços de paletes confirmados, por agendamento, aguardando a gravação no bitmap."""
+
+    def __init__(self, intervalo_ms=None):
+        self.intervalo = (intervalo_ms or _config().get("INTERVALO_MS", 1000)) / 1000
+        self._pendentes = defaultdict(set)  # agendamento_id -> codigo_endereco
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.gravacoes = 0
+
+    def adicionar(self, agendamento_id, codigos):
+        with self._lock:
+            self._pendentes[agendamento_id].update(codigos)
+        self._garantir_thread()
+
+    def descarregar(self, agendamento_ids=None):
+        """Grava os pendentes (todos ou só dos agendamentos informados). Retorna quantos agendamentos."""
+        with self._lock:
+            if agendamento_ids is None:
+                lote, self._pendentes = self._pendentes, defaultdict(set)
+            else:
+                lote = {i: self._pendentes.pop(i) for i in agendamento_ids if i in self._pendentes}
+        for agendamento_id, codigos in lote.items():
+            try:
+                marcar_enderecos(agendamento_id, codigos)
+            except Exception:
+                logger.exception("Falha ao atualizar a cobertura do agendamento %s", agendamento_id)
+                try:
+                    invalidar_cobertura([agendamento_id])
+                except Exception:
+                    logger.exception("Falha ao invalidar a cobertura do agendamento %s", agendamento_id)
+        self.gravacoes += len(lote)
+        return len(lote)
+
+    def _rodar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.descarregar()
+            finally:
+                close_old_connections()
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._rodar, name="cobertura-inventario", daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self.descarregar()
+
+
+marcacoes = MarcacoesPendentes()
+atexit.register(marcacoes.parar)
+
+
+def marcar_ao_confirmar(agendamento_id, codigos):
+    """
+    Agenda a marcação para depois do commit da transação corrente (na hora,
+    fora de transação). Se o insert for desfeito, por rollback da transação
+    ou de um savepoint, o Django descarta o callback e nada é marcado.
+    """
+    codigos = list(codigos)
+    transaction.on_commit(lambda: marcacoes.adicionar(agendamento_id, codigos))
+
+
+def invalidar_cobertura(agendamento_ids):
+    """Descarta o bitmap (ex.: item removido ou movido); é remontado na próxima leitura."""
+    CoberturaAgendamento.objects.filter(agendamento_id__in=list(agendamento_ids)).delete()
+
+
+def resumo_cobertura(agendamento, limite_faltantes=100):
+    espaco, mapa = obter_cobertura(agendamento)
+    cobertos = mapa.cobertos()
+    return {
+        "agendamento_id": agendamento.id,
+        "total_enderecos": espaco.total,
+        "enderecos_cobertos": cobertos,
+        "percentual": round(cobertos * 100 / espaco.total, 2) if espaco.total else 0.0,
+        "por_cidade": [
+            {
+                "cidade": cidade,
+                "cobertos": cobertos_cidade,
+                "total": total,
+                "percentual": round(cobertos_cidade * 100 / total, 2) if total else 0.0,
+            }
+            for cidade, cobertos_cidade, total in mapa.cobertura_por_cidade()
+        ],
+        "faltantes": [espaco.endereco(indice) for indice in mapa.faltantes(limite_faltantes)],
+    }
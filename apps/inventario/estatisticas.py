@@ -0,0 +1,282 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.armazens.models import Armazem
+from .models import Inventario, EstatisticaInventario, ProgressoEstatisticaInventario
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return getattr(settings, "INVENTARIO_ESTATISTICAS", {})
+
+
+def decompor_cidade_bairro(codigo_endereco):
+    """'cidade:bairro:rua:predio:nivel:apto' -> ('cidade', 'cidade:bairro')."""
+    partes = (codigo_endereco or "").split(":")
+    cidade = partes[0].strip() or "indefinido"
+    bairro = partes[1].strip() if len(partes) > 1 and partes[1].strip() else "indefinido"
+    return cidade, f"{cidade}:{bairro}"
+
+
+class AgregadoPeriodo:
+    """Agregado parcial de um período; pode ser mesclado a uma estatística já salva."""
+
+    def __init__(self):
+        self.total = 0
+        self.divergentes = 0
+        self.por_cidade = Counter()
+        self.por_bairro = Counter()
+        self.primeiro = None
+        self.ultimo = None
+
+    def adicionar(self, codigo_endereco, status, data_hora):
+        cidade, bairro = decompor_cidade_bairro(codigo_endereco)
+        self.total += 1
+        self.por_cidade[cidade] += 1
+        self.por_bairro[bairro] += 1
+        if status == "divergente":
+            self.divergentes += 1
+        if self.primeiro is None or data_hora < self.primeiro:
+            self.primeiro = data_hora
+        if self.ultimo is None or data_hora > self.ultimo:
+            self.ultimo = data_hora
+
+    def remover(self, codigo_endereco, status):
+        """Desconta um item já somado ao período (movido ou excluído)."""
+        cidade, bairro = decompor_cidade_bairro(codigo_endereco)
+        self.total -= 1
+        self.por_cidade[cidade] -= 1
+        self.por_bairro[bairro] -= 1
+        if status == "divergente":
+            self.divergentes -= 1
+
+    def mesclar_em(self, estatistica):
+        por_cidade = Counter(estatistica.itens_por_cidade or {})
+        por_bairro = Counter(estatistica.itens_por_bairro or {})
+        por_cidade.update(self.por_cidade)
+        por_bairro.update(self.por_bairro)
+
+        estatistica.total_itens = max(0, (estatistica.total_itens or 0) + self.total)
+        estatistica.itens_divergentes = max(0, (estatistica.itens_divergentes or 0) + self.divergentes)
+        estatistica.itens_por_cidade = {chave: valor for chave, valor in por_cidade.items() if valor > 0}
+        estatistica.itens_por_bairro = {chave: valor for chave, valor in por_bairro.items() if valor > 0}
+        # Remoções não recuam primeiro/último registro (o tempo total pode ficar maior até um reprocessamento)
+        estatistica.primeiro_registro = min(filter(None, [estatistica.primeiro_registro, self.primeiro]), default=None)
+        estatistica.ultimo_registro = max(filter(None, [estatistica.ultimo_registro, self.ultimo]), default=None)
+        _derivar_metricas(estatistica)
+
+
+def _derivar_metricas(estatistica):
+    if estatistica.total_itens:
+        precisao = 100 - Decimal(estatistica.itens_divergentes) * 100 / Decimal(estatistica.total_itens)
+    else:
+        precisao = Decimal(100)
+    estatistica.precisao = precisao.quantize(Decimal("0.01"))
+
+    if estatistica.primeiro_registro and estatistica.ultimo_registro:
+        estatistica.tempo_total = estatistica.ultimo_registro - estatistica.primeiro_registro
+    else:
+        estatistica.tempo_total = timedelta(0)
+
+
+def _nova_estatistica(armazem_id, periodo):
+    return EstatisticaInventario(
+        armazem_id=armazem_id,
+        periodo_referencia=periodo,
+        total_itens=0,
+        itens_por_cidade={},
+        itens_por_bairro={},
+        precisao=Decimal(100),
+        tempo_total=timedelta(0),
+    )
+
+
+def _salvar_agregados(armazem_id, agregados):
+    existentes = {
+        estatistica.periodo_referencia: estatistica
+        for estatistica in EstatisticaInventario.objects.filter(
+            armazem_id=armazem_id, periodo_referencia__in=list(agregados)
+        )
+    }
+    for periodo, agregado in agregados.items():
+        estatistica = existentes.get(periodo) or _nova_estatistica(armazem_id, periodo)
+        agregado.mesclar_em(estatistica)
+        estatistica.save()
+
+
+def processar_armazem(armazem_id):
+    """
+    Processa apenas os itens com id acima da marca d'água do armazém,
+    agrupa por período (dia local de data_hora) e mescla os agregados
+    parciais nas estatísticas já existentes.
+
+    Itens mais novos que ATRASO_SEGUNDOS ficam para a próxima execução, para
+    não pular ids de transações que ainda não fizeram commit.
+    """
+    limite = timezone.now() - timedelta(seconds=_config().get("ATRASO_SEGUNDOS", 60))
+    chunk = _config().get("CHUNK", 5000)
+
+    with transaction.atomic():
+        progresso, _ = ProgressoEstatisticaInventario.objects.select_for_update().get_or_create(
+            armazem_id=armazem_id
+        )
+
+        itens = (
+            Inventario.objects.filter(armazem_id=armazem_id, id__gt=progresso.ultimo_item_id, data_hora__lt=limite)
+            .order_by("id")
+            .values_list("id", "codigo_endereco", "status", "data_hora")
+            .iterator(chunk_size=chunk)
+        )
+
+        agregados = {}
+        ultimo_id = progresso.ultimo_item_id
+        for item_id, codigo_endereco, status, data_hora in itens:
+            periodo = timezone.localtime(data_hora).date()
+            agregado = agregados.get(periodo)
+            if agregado is None:
+                agregado = agregados[periodo] = AgregadoPeriodo()
+            agregado.adicionar(codigo_endereco, status, data_hora)
+            ultimo_id = item_id
+
+        if not agregados:
+            return 0
+
+        _salvar_agregados(armazem_id, agregados)
+        progresso.ultimo_item_id = ultimo_id
+        progresso.save(update_fields=["ultimo_item_id", "atualizado_em"])
+
+    return sum(agregado.total for agregado in agregados.values())
+
+
+def reprocessar_periodo(armazem_id, periodo):
+    """
+    Recalcula um único período do zero lendo só a faixa de data_hora do dia
+    (índice armazem, data_hora). Itens acima da marca d'água são ignorados,
+    pois ainda serão somados pela execução incremental.
+    """
+    inicio = timezone.make_aware(datetime.combine(periodo, time.min))
+    fim = inicio + timedelta(days=1)
+
+    with transaction.atomic():
+        progresso, _ = ProgressoEstatisticaInventario.objects.select_for_update().get_or_create(
+            armazem_id=armazem_id
+        )
+        agregado = AgregadoPeriodo()
+        itens = (
+            Inventario.objects.filter(
+                armazem_id=armazem_id,
+                data_hora__gte=inicio,
+                data_hora__lt=fim,
+                id__lte=progresso.ultimo_item_id,
+            )
+            .values_list("codigo_endereco", "status", "data_hora")
+            .iterator(chunk_size=_config().get("CHUNK", 5000))
+        )
+        for codigo_endereco, status, data_hora in itens:
+            agregado.adicionar(codigo_endereco, status, data_hora)
+
+        EstatisticaInventario.objects.filter(armazem_id=armazem_id, periodo_referencia=periodo).delete()
+        if agregado.total:
+            estatistica = _nova_estatistica(armazem_id, periodo)
+            agregado.mesclar_em(estatistica)
+            estatistica.save()
+
+    return agregado.total
+
+
+def ajustar_itens(movimentos):
+    """
+    Corrige as estatísticas de itens já contabilizados que mudaram de
+    armazém, data_hora, endereço ou status, ou foram excluídos.
+
+    `movimentos` é uma lista de (item_id, antes, depois), com antes/depois
+    = (armazem_id, data_hora, codigo_endereco, status) ou None (excluído).
+    O estado anterior é descontado do seu período se o item já estava
+    abaixo da marca d'água do armazém de origem; o novo é somado se estiver
+    abaixo da marca do armazém de destino (caso contrário a execução
+    incremental o somará).
+    """
+    armazens = sorted({
+        estado[0] for _, antes, depois in movimentos for estado in (antes, depois)
+        if estado is not None and estado[0] is not None
+    })
+    if not armazens:
+        return 0
+
+    with transaction.atomic():
+        # Mesma trava da execução incremental (em ordem de armazém, contra deadlock)
+        marcas = dict(
+            ProgressoEstatisticaInventario.objects.select_for_update()
+            .filter(armazem_id__in=armazens)
+            .order_by("armazem_id")
+            .values_list("armazem_id", "ultimo_item_id")
+        )
+        ajustes = {}
+        for item_id, antes, depois in movimentos:
+            if antes == depois:
+                continue
+            for estado, somar in ((antes, False), (depois, True)):
+                if estado is None or estado[0] is None or item_id > marcas.get(estado[0], 0):
+                    continue
+                armazem_id, data_hora, codigo_endereco, status = estado
+                chave = (armazem_id, timezone.localtime(data_hora).date())
+                agregado = ajustes.get(chave)
+                if agregado is None:
+                    agregado = ajustes[chave] = AgregadoPeriodo()
+                if somar:
+                    agregado.adicionar(codigo_endereco, status, data_hora)
+                else:
+                    agregado.remover(codigo_endereco, status)
+
+        por_armazem = defaultdict(dict)
+        for (armazem_id, periodo), agregado in ajustes.items():
+            por_armazem[armazem_id][periodo] = agregado
+        for armazem_id, agregados in por_armazem.items():
+            _salvar_agregados(armazem_id, agregados)
+    return len(ajustes)
+
+
+def processar_todos():
+    processados = 0
+    for armazem_id in Armazem.objects.values_list("id", flat=True):
+        processados += processar_armazem(armazem_id)
+    return processados
+
+
+# --- Execução periódica dentro do processo ---
+_job = None
+_job_lock = threading.Lock()
+
+
+def iniciar_job_periodico(intervalo=None):
+    """Inicia (uma vez por processo) uma thread que roda processar_todos() a cada intervalo."""
+    global _job
+    intervalo = intervalo or _config().get("INTERVALO_SEGUNDOS")
+    if not intervalo:
+        return None
+
+    with _job_lock:
+        if _job is not None and _job.is_alive():
+            return _job
+
+        parar = threading.Event()
+
+        def executar():
+            while not parar.wait(intervalo):
+                try:
+                    processar_todos()
+                except Exception:
+                    logger.exception("Falha no cálculo incremental das estatísticas de inventário")
+                finally:
+                    close_old_connections()
+
+        _job = threading.Thread(target=executar, name="estatisticas-inventario", daemon=True)
+        _job.parar = parar
+        _job.start()
+        return _job
@@ -0,0 +1,113 @@
+import csv
+import json
+import zlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+CAMPOS_EXPORTACAO = (
+    "id", "agendamento_id", "armazem_id", "codigo_palete",
+    "codigo_endereco", "status", "data_hora",
+)
+
+# Agrupa as linhas em blocos antes de enviar, evitando um write por registro
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _chunk_size():
+    return getattr(settings, "INVENTARIO_EXPORTACAO_CHUNK", 2000)
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def _serializar(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else str(valor)
+
+
+def _linhas_ndjson(registros):
+    for registro in registros:
+        yield json.dumps(dict(zip(CAMPOS_EXPORTACAO, registro)), default=_serializar, ensure_ascii=False) + "\n"
+
+
+def _linhas_csv(registros):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(CAMPOS_EXPORTACAO)
+    for registro in registros:
+        yield escritor.writerow(registro)
+
+
+def _em_blocos(linhas):
+    bloco, tamanho = [], 0
+    for linha in linhas:
+        dados = linha.encode()
+        bloco.append(dados)
+        tamanho += len(dados)
+        if tamanho >= TAMANHO_BLOCO:
+            yield b"".join(bloco)
+            bloco, tamanho = [], 0
+    if bloco:
+        yield b"".join(bloco)
+
+
+def _gzip(blocos):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for bloco in blocos:
+        comprimido = compressor.compress(bloco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+async def _assincrono(blocos):
+    """
+    Sob ASGI o Django consome iteradores síncronos com sync_to_async(list),
+    ou seja, carrega a exportação inteira na memória. Aqui cada bloco é
+    pedido à thread síncrona (a mesma do cursor) e enviado em seguida.
+    """
+    proximo = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            bloco = await proximo(blocos, None)
+            if bloco is None:
+                break
+            yield bloco
+    finally:
+        await sync_to_async(blocos.close, thread_sensitive=True)()
+
+
+def exportar_inventario(queryset, formato="ndjson", compactar=False, nome="inventario", assincrono=False):
+    """
+    Exporta o queryset em NDJSON ou CSV via StreamingHttpResponse.
+
+    As linhas vêm de um cursor no servidor (`iterator(chunk_size=...)`) e
+    são escritas à medida que chegam, então a memória usada não depende da
+    quantidade de registros. Com `assincrono` (requisição ASGI) o corpo é
+    um iterador assíncrono, que o Django envia sem acumular.
+    """
+    registros = (
+        queryset.order_by("id")
+        .values_list(*CAMPOS_EXPORTACAO)
+        .iterator(chunk_size=_chunk_size())
+    )
+
+    if formato == "csv":
+        linhas, content_type, extensao = _linhas_csv(registros), "text/csv; charset=utf-8", "csv"
+    else:
+        linhas, content_type, extensao = _linhas_ndjson(registros), "application/x-ndjson", "ndjson"
+
+    corpo = _em_blocos(linhas)
+    if compactar:
+        corpo = _gzip(corpo)
+        content_type, extensao = "application/gzip", f"{extensao}.gz"
+
+    if assincrono:
+        corpo = _assincrono(corpo)
+
+    resposta = StreamingHttpResponse(corpo, content_type=content_type)
+    resposta["Content-Disposition"] = f'attachment; filename="{nome}.{extensao}"'
+    return resposta
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db.models import BigIntegerField, Count, ExpressionWrapper, F, Max, Q
+from django.utils import timezone
+from ninja.errors import HttpError
+from apps.armazens.enderecos import BITS_COMPONENTE, COMPONENTES, componente
+from apps.usuarios.cache import CacheLRU
+from .models import ContadorInventarioArmazem, Inventario
+
+# Nível do heatmap -> quantos componentes do endereço formam a célula
+NIVEIS_HEATMAP = {"cidade": 1, "bairro": 2, "rua": 3}
+
+
+def _criar_cache():
+    config = getattr(settings, "INVENTARIO_HEATMAP_CACHE", {})
+    return CacheLRU(
+        max_entradas=config.get("MAX_ENTRADAS", 256),
+        ttl=config.get("TTL", 300),
+    )
+
+
+heatmaps = _criar_cache()
+
+
+def _carimbo(armazem_id):
+    """Versão dos dados do armazém: muda sempre que um item novo entra (ou sai)."""
+    return tuple(
+        ContadorInventarioArmazem.objects.filter(armazem_id=armazem_id)
+        .values_list("total_itens", "ultimo_registro")
+        .first() or (0, None)
+    )
+
+
+def _calcular(armazem_id, componentes):
+    """
+    Agrega no banco, agrupando pelo prefixo de `chave_endereco` (divisão
+    inteira pela largura dos componentes descartados). Usa o índice
+    (armazem, chave_endereco) e devolve uma linha por célula.
+    """
+    divisor = 1 << BITS_COMPONENTE * (len(COMPONENTES) - componentes)
+    linhas = (
+        Inventario.objects.filter(armazem_id=armazem_id, chave_endereco__isnull=False)
+        .annotate(celula=ExpressionWrapper(F("chave_endereco") / divisor, output_field=BigIntegerField()))
+        .order_by()
+        .values("celula")
+        .annotate(
+            total=Count("id"),
+            divergentes=Count("id", filter=Q(status="divergente")),
+            verificados=Count("id", filter=Q(status="verificado")),
+            ultimo_registro=Max("data_hora"),
+        )
+        .order_by("celula")
+    )
+
+    celulas = []
+    for linha in linhas:
+        chave = linha["celula"] * divisor
+        endereco = ":".join(str(componente(chave, nome)) for nome in COMPONENTES[:componentes])
+        celulas.append({
+            "endereco": endereco,
+            "total": linha["total"],
+            "divergentes": linha["divergentes"],
+            "verificados": linha["verificados"],
+            "percentual_divergente": round(linha["divergentes"] * 100 / linha["total"], 2),
+            "ultimo_registro": linha["ultimo_registro"],
+        })
+    return celulas
+
+
+def heatmap_armazem(armazem_id, nivel="rua"):
+    """
+    Heatmap de atualidade e divergência por cidade/bairro/rua.
+
+    O resultado fica em cache por armazém e nível, marcado com o contador
+    do armazém; quando novos itens entram o carimbo muda e a próxima leitura
+    recalcula. Mudanças só de status são refletidas ao fim do TTL.
+    """
+    if nivel not in NIVEIS_HEATMAP:
+        raise HttpError(400, f"nivel deve ser um de: {', '.join(NIVEIS_HEATMAP)}")
+
+    chave = ("heatmap", armazem_id, nivel)
+    carimbo = _carimbo(armazem_id)
+    em_cache = heatmaps.get(chave)
+    if em_cache is not None and em_cache[0] == carimbo:
+        return em_cache[1]
+
+    resultado = {
+        "armazem_id": armazem_id,
+        "nivel": nivel,
+        "gerado_em": timezone.now(),
+        "celulas": _calcular(armazem_id, NIVEIS_HEATMAP[nivel]),
+    }
+    heatmaps.set(chave, (carimbo, resultado))
+    return resultado
@@ -0,0 +1,38 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from apps.inventario import estatisticas
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula as estatísticas de inventário de forma incremental (apenas itens "
+        "novos desde a última execução). Use --periodo para recalcular um dia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--armazem", type=int, help="Processa apenas este armazém")
+        parser.add_argument("--periodo", type=date.fromisoformat, help="Recalcula o período (AAAA-MM-DD)")
+        parser.add_argument("--loop", type=int, metavar="SEGUNDOS", help="Repete a cada N segundos")
+
+    def handle(self, *args, **options):
+        while True:
+            self._executar(options)
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
+
+    def _executar(self, options):
+        if options["periodo"]:
+            if not options["armazem"]:
+                self.stderr.write("--periodo exige --armazem")
+                return
+            total = estatisticas.reprocessar_periodo(options["armazem"], options["periodo"])
+            self.stdout.write(self.style.SUCCESS(f"Período {options['periodo']} recalculado: {total} itens."))
+            return
+
+        if options["armazem"]:
+            total = estatisticas.processar_armazem(options["armazem"])
+        else:
+            total = estatisticas.processar_todos()
+        self.stdout.write(self.style.SUCCESS(f"{total} novos itens processados."))
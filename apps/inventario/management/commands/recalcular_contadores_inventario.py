@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.inventario.services import recalcular_contadores
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os contadores de inventário por armazém a partir de um agregado agrupado."
+
+    def handle(self, *args, **options):
+        total = recalcular_contadores()
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados para {total} armazém(ns)."))
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_armazem(apps, schema_editor):
+    Inventario = apps.get_model('inventario', 'Inventario')
+    Agendamento = apps.get_model('agendamentos', 'Agendamento')
+    Inventario.objects.filter(armazem__isnull=True).update(
+        armazem_id=models.Subquery(
+            Agendamento.objects.filter(id=models.OuterRef('agendamento_id')).values('armazem_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_initial'),
+        ('armazens', '0001_initial'),
+        ('inventario', '0002_initial'),
+        ('robos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventario',
+            name='armazem',
+            field=models.ForeignKey(editable=False, help_text='Cópia de agendamento.armazem para listagens paginadas por armazém', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='itens_inventario', to='armazens.armazem', verbose_name='Armazém'),
+        ),
+        migrations.RunPython(preencher_armazem, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventario',
+            index=models.Index(fields=['-data_hora', '-id'], name='inv_data_hora_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventario',
+            index=models.Index(fields=['armazem', '-data_hora', '-id'], name='inv_armazem_data_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventario',
+            index=models.Index(fields=['agendamento', '-data_hora', '-id'], name='inv_agendamento_data_hora_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_contadores(apps, schema_editor):
+    Inventario = apps.get_model('inventario', 'Inventario')
+    Contador = apps.get_model('inventario', 'ContadorInventarioArmazem')
+    agregados = (
+        Inventario.objects.order_by()
+        .values('agendamento__armazem_id')
+        .annotate(total=models.Count('id'), ultimo=models.Max('data_hora'))
+    )
+    Contador.objects.bulk_create([
+        Contador(
+            armazem_id=linha['agendamento__armazem_id'],
+            total_itens=linha['total'],
+            ultimo_registro=linha['ultimo'],
+        )
+        for linha in agregados
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('armazens', '0001_initial'),
+        ('inventario', '0003_inventario_armazem_indices_paginacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorInventarioArmazem',
+            fields=[
+                ('armazem', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contador_inventario', serialize=False, to='armazens.armazem', verbose_name='Armazém')),
+                ('total_itens', models.PositiveBigIntegerField(default=0, verbose_name='Total de Itens')),
+                ('ultimo_registro', models.DateTimeField(blank=True, null=True, verbose_name='Último Registro')),
+            ],
+            options={
+                'verbose_name': 'Contador de Inventário',
+                'verbose_name_plural': 'Contadores de Inventário',
+            },
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
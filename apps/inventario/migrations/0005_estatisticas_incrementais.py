@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('armazens', '0001_initial'),
+        ('inventario', '0004_contador_inventario_armazem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressoEstatisticaInventario',
+            fields=[
+                ('armazem', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progresso_estatistica', serialize=False, to='armazens.armazem', verbose_name='Armazém')),
+                ('ultimo_item_id', models.BigIntegerField(default=0, verbose_name='Último Item Processado')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Progresso de Estatística',
+                'verbose_name_plural': 'Progresso das Estatísticas',
+            },
+        ),
+        migrations.AddField(
+            model_name='estatisticainventario',
+            name='itens_divergentes',
+            field=models.PositiveIntegerField(default=0, verbose_name='Itens Divergentes'),
+        ),
+        migrations.AddField(
+            model_name='estatisticainventario',
+            name='primeiro_registro',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Primeiro Registro do Período'),
+        ),
+        migrations.AddField(
+            model_name='estatisticainventario',
+            name='ultimo_registro',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último Registro do Período'),
+        ),
+    ]
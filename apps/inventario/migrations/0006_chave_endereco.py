@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from apps.armazens.enderecos import preencher_chaves_existentes
+
+
+def preencher_chaves(apps, schema_editor):
+    preencher_chaves_existentes(apps.get_model('inventario', 'Inventario'), 'codigo_endereco')
+    preencher_chaves_existentes(apps.get_model('inventario', 'Trajetoria'), 'codigo_localizacao')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_initial'),
+        ('armazens', '0001_initial'),
+        ('inventario', '0005_estatisticas_incrementais'),
+        ('robos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventario',
+            name='chave_endereco',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='codigo_endereco empacotado (apps.armazens.enderecos), para consultas por faixa', null=True, verbose_name='Chave do Endereço'),
+        ),
+        migrations.AddField(
+            model_name='trajetoria',
+            name='chave_endereco',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='codigo_localizacao empacotado (apps.armazens.enderecos), para consultas por faixa', null=True, verbose_name='Chave do Endereço'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventario',
+            index=models.Index(fields=['chave_endereco'], name='inv_chave_endereco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventario',
+            index=models.Index(fields=['armazem', 'chave_endereco'], name='inv_armazem_chave_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trajetoria',
+            index=models.Index(fields=['chave_endereco'], name='traj_inv_chave_endereco_idx'),
+        ),
+    ]
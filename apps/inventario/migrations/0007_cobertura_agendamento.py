@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_initial'),
+        ('inventario', '0006_chave_endereco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoberturaAgendamento',
+            fields=[
+                ('agendamento', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cobertura', serialize=False, to='agendamentos.agendamento', verbose_name='Agendamento')),
+                ('dimensoes', models.JSONField(default=list, help_text='Grade usada para montar o bitmap; se mudar, a cobertura é recalculada', verbose_name='Dimensões do Armazém')),
+                ('mapa', models.BinaryField(default=bytes, verbose_name='Bitmap de Endereços Cobertos')),
+                ('enderecos_cobertos', models.PositiveIntegerField(default=0, verbose_name='Endereços Cobertos')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Cobertura de Agendamento',
+                'verbose_name_plural': 'Coberturas de Agendamento',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from apps.agendamentos.models import Agendamento
 from apps.armazens.models import Armazem
+from apps.armazens.enderecos import preencher_chave
 from apps.robos.models import Robo  # Assumindo que você tem um modelo Robo
 
 class Inventario(models.Model):
@@ -10,6 +11,15 @@ class Inventario(models.Model):
         related_name='itens_inventario',
         verbose_name='Agendamento relacionado'
     )
+    armazem = models.ForeignKey(
+        Armazem,
+        on_delete=models.PROTECT,
+        null=True,
+        editable=False,
+        related_name='itens_inventario',
+        verbose_name='Armazém',
+        help_text='Cópia de agendamento.armazem para listagens paginadas por armazém'
+    )
     robo = models.ForeignKey(
         Robo,
         on_delete=models.SET_NULL,
@@ -28,6 +38,13 @@ class Inventario(models.Model):
         verbose_name='Código do Endereço Físico',
         help_text='Localização física no armazém'
     )
+    chave_endereco = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Chave do Endereço',
+        help_text='codigo_endereco empacotado (apps.armazens.enderecos), para consultas por faixa'
+    )
     data_hora = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Data/Hora do Registro'
@@ -58,6 +75,13 @@ class Inventario(models.Model):
             models.Index(fields=['codigo_endereco']),
             models.Index(fields=['status']),
             models.Index(fields=['agendamento', 'robo']),
+            # Paginação por cursor em (data_hora, id)
+            models.Index(fields=['-data_hora', '-id'], name='inv_data_hora_id_idx'),
+            models.Index(fields=['armazem', '-data_hora', '-id'], name='inv_armazem_data_hora_idx'),
+            models.Index(fields=['agendamento', '-data_hora', '-id'], name='inv_agendamento_data_hora_idx'),
+            # Consultas por cidade/bairro/rua como faixa de chave_endereco
+            models.Index(fields=['chave_endereco'], name='inv_chave_endereco_idx'),
+            models.Index(fields=['armazem', 'chave_endereco'], name='inv_armazem_chave_idx'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -69,6 +93,80 @@ class Inventario(models.Model):
     def __str__(self):
         return f"Inv-{self.id}: {self.codigo_palete} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        if self.armazem_id is None and self.agendamento_id is not None:
+            self.armazem_id = self.agendamento.armazem_id
+        preencher_chave(self, 'codigo_endereco', kwargs)
+        super().save(*args, **kwargs)
+
+
+class ContadorInventarioArmazem(models.Model):
+    """
+    Totais de inventário por armazém mantidos de forma incremental
+    (sinais de Inventario e registro em lote), lidos pelo dashboard.
+    """
+    armazem = models.OneToOneField(
+        Armazem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='contador_inventario',
+        verbose_name='Armazém'
+    )
+    total_itens = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Total de Itens'
+    )
+    ultimo_registro = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Último Registro'
+    )
+
+    class Meta:
+        verbose_name = 'Contador de Inventário'
+        verbose_name_plural = 'Contadores de Inventário'
+
+    def __str__(self):
+        return f"Contador-{self.armazem_id}: {self.total_itens}"
+
+
+class CoberturaAgendamento(models.Model):
+    """
+    Endereços já inventariados em um agendamento, como bitmap sobre o
+    espaço de endereços do armazém (apps.armazens.espaco_enderecos).
+    """
+    agendamento = models.OneToOneField(
+        Agendamento,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cobertura',
+        verbose_name='Agendamento'
+    )
+    dimensoes = models.JSONField(
+        default=list,
+        verbose_name='Dimensões do Armazém',
+        help_text='Grade usada para montar o bitmap; se mudar, a cobertura é recalculada'
+    )
+    mapa = models.BinaryField(
+        default=bytes,
+        verbose_name='Bitmap de Endereços Cobertos'
+    )
+    enderecos_cobertos = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Endereços Cobertos'
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Atualizado em'
+    )
+
+    class Meta:
+        verbose_name = 'Cobertura de Agendamento'
+        verbose_name_plural = 'Coberturas de Agendamento'
+
+    def __str__(self):
+        return f"Cobertura-{self.agendamento_id}: {self.enderecos_cobertos}"
+
 
 class Trajetoria(models.Model):
     agendamento = models.ForeignKey(
@@ -90,6 +188,13 @@ class Trajetoria(models.Model):
         verbose_name='Código de Localização',
         help_text='Formato: cidade:bairro:rua:predio:nivel:apto'
     )
+    chave_endereco = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Chave do Endereço',
+        help_text='codigo_localizacao empacotado (apps.armazens.enderecos), para consultas por faixa'
+    )
     data_hora_inicio = models.DateTimeField(
         verbose_name='Início da Trajetória'
     )
@@ -122,11 +227,16 @@ class Trajetoria(models.Model):
         indexes = [
             models.Index(fields=['codigo_localizacao']),
             models.Index(fields=['status']),
+            models.Index(fields=['chave_endereco'], name='traj_inv_chave_endereco_idx'),
         ]
 
     def __str__(self):
         return f"Traj-{self.id}: {self.codigo_localizacao} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        preencher_chave(self, 'codigo_localizacao', kwargs)
+        super().save(*args, **kwargs)
+
 
 class EstatisticaInventario(models.Model):
     armazem = models.ForeignKey(
@@ -165,6 +275,21 @@ class EstatisticaInventario(models.Model):
         blank=True,
         verbose_name='Relatório Completo'
     )
+    # Agregados parciais usados pelo cálculo incremental
+    itens_divergentes = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Itens Divergentes'
+    )
+    primeiro_registro = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Primeiro Registro do Período'
+    )
+    ultimo_registro = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Último Registro do Período'
+    )
 
     class Meta:
         verbose_name = 'Estatística de Inventário'
@@ -181,4 +306,30 @@ class EstatisticaInventario(models.Model):
             total_divergentes = sum(self.itens_por_cidade['itens_divergentes'].values())
             if self.total_itens > 0:
                 self.precisao = 100 - (total_divergentes / self.total_itens * 100)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ProgressoEstatisticaInventario(models.Model):
+    """Marca d'água do cálculo incremental: último Inventario.id processado por armazém."""
+    armazem = models.OneToOneField(
+        Armazem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='progresso_estatistica',
+        verbose_name='Armazém'
+    )
+    ultimo_item_id = models.BigIntegerField(
+        default=0,
+        verbose_name='Último Item Processado'
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Atualizado em'
+    )
+
+    class Meta:
+        verbose_name = 'Progresso de Estatística'
+        verbose_name_plural = 'Progresso das Estatísticas'
+
+    def __str__(self):
+        return f"Progresso-{self.armazem_id}: {self.ultimo_item_id}"
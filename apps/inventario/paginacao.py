@@ -0,0 +1,57 @@
+import base64
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from ninja.errors import HttpError
+
+
+def _config():
+    return getattr(settings, "INVENTARIO_PAGINACAO", {})
+
+
+def codificar_cursor(data_hora, item_id):
+    bruto = f"{data_hora.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        data_hora, item_id = base64.urlsafe_b64decode(preenchido).decode().split("|")
+        return datetime.fromisoformat(data_hora), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HttpError(400, "Cursor inválido")
+
+
+def paginar_inventario(queryset, cursor=None, limite=None):
+    """
+    Paginação por cursor (keyset) sobre (data_hora, id) em ordem decrescente.
+
+    Cada página é um range scan no índice composto a partir da última
+    posição lida, então o custo não cresce com o número de páginas ou de
+    registros do armazém.
+    """
+    maximo = _config().get("MAX_LIMITE", 500)
+    limite = min(limite or _config().get("LIMITE_PADRAO", 100), maximo)
+    if limite < 1:
+        raise HttpError(400, "O limite deve ser maior que zero")
+
+    queryset = queryset.order_by("-data_hora", "-id")
+    if cursor:
+        data_hora, item_id = decodificar_cursor(cursor)
+        # data_hora__lte é redundante, mas é o que o banco usa como início do range no índice;
+        # o OR sozinho vira filtro sobre um scan desde o topo (custo proporcional à página)
+        queryset = queryset.filter(
+            Q(data_hora__lt=data_hora) | Q(data_hora=data_hora, id__lt=item_id),
+            data_hora__lte=data_hora,
+        )
+
+    # Busca um item a mais só para saber se existe próxima página
+    itens = list(queryset[:limite + 1])
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor(ultimo.data_hora, ultimo.id)
+
+    return {"itens": itens, "proximo_cursor": proximo_cursor}
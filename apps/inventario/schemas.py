@@ -20,6 +20,11 @@ class InventarioOut(Schema):
         orm_mode = True
 
 
+class PaginaInventarioOut(Schema):
+    itens: List[InventarioOut]
+    proximo_cursor: Optional[str] = None
+
+
 class EstatisticasInventario(Schema):
     total_armazens: int
     total_registros: int
@@ -33,4 +38,54 @@ class DashboardArmazem(Schema):
 
 
 class DashboardInventario(Schema):
-    armazens: List[DashboardArmazem]
\ No newline at end of file
+    armazens: List[DashboardArmazem]
+
+class InventarioLoteIn(Schema):
+    itens: List[InventarioIn]
+
+
+class ResultadoItemLote(Schema):
+    indice: int
+    codigo_palete: str
+    resultado: str  # criado, atualizado, duplicado ou erro
+    id: Optional[int] = None
+    mensagem: Optional[str] = None
+
+
+class InventarioLoteOut(Schema):
+    criados: int
+    atualizados: int
+    rejeitados: int
+    itens: List[ResultadoItemLote]
+
+
+class CoberturaCidade(Schema):
+    cidade: int
+    cobertos: int
+    total: int
+    percentual: float
+
+
+class CoberturaAgendamentoOut(Schema):
+    agendamento_id: int
+    total_enderecos: int
+    enderecos_cobertos: int
+    percentual: float
+    por_cidade: List[CoberturaCidade]
+    faltantes: List[str]
+
+
+class CelulaHeatmap(Schema):
+    endereco: str  # prefixo cidade[:bairro[:rua]]
+    total: int
+    divergentes: int
+    verificados: int
+    percentual_divergente: float
+    ultimo_registro: Optional[datetime]
+
+
+class HeatmapArmazemOut(Schema):
+    armazem_id: int
+    nivel: str
+    gerado_em: datetime
+    celulas: List[CelulaHeatmap]
@@ -0,0 +1,237 @@
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from ninja.errors import HttpError
+from apps.armazens.enderecos import chave_endereco
+from apps.usuarios.escopo import escopo_do_usuario
+from .models import Agendamento, Inventario, ContadorInventarioArmazem
+from .cobertura import marcar_ao_confirmar, invalidar_cobertura
+from .estatisticas import ajustar_itens
+
+
+def _tamanho_chunk():
+    return getattr(settings, "INVENTARIO_LOTE", {}).get("CHUNK", 500)
+
+
+def _maximo_itens():
+    return getattr(settings, "INVENTARIO_LOTE", {}).get("MAX_ITENS", 5000)
+
+
+def registrar_lote(user, itens):
+    """
+    Registra (ou atualiza) paletes em lote.
+
+    Os agendamentos são validados uma única vez por lote, a escrita usa
+    `bulk_create` em chunks com upsert sobre `codigo_palete` (que também
+    cobre `unique_palete_por_agendamento`) e o retorno traz o resultado
+    de cada item, na ordem recebida.
+    """
+    if len(itens) > _maximo_itens():
+        raise HttpError(400, f"O lote aceita no máximo {_maximo_itens()} itens")
+
+    resultados = [
+        {"indice": i, "codigo_palete": item.codigo_palete, "resultado": "erro", "id": None, "mensagem": None}
+        for i, item in enumerate(itens)
+    ]
+
+    # Valida todos os agendamentos do lote em uma consulta
+    agendamentos = Agendamento.objects.only("id", "armazem_id").in_bulk(
+        {item.agendamento_id for item in itens}
+    )
+    escopo = escopo_do_usuario(user) if user.tipo == "Admin" else None
+
+    # Último item de cada palete vence; os anteriores ficam como duplicados
+    validos = {}
+    for i, item in enumerate(itens):
+        agendamento = agendamentos.get(item.agendamento_id)
+        if agendamento is None:
+            resultados[i]["mensagem"] = "Agendamento não encontrado"
+            continue
+        if escopo is not None and agendamento.armazem_id not in escopo:
+            resultados[i]["mensagem"] = "Acesso não autorizado a este armazém"
+            continue
+        if not item.codigo_palete or not item.codigo_endereco:
+            resultados[i]["mensagem"] = "codigo_palete e codigo_endereco são obrigatórios"
+            continue
+
+        anterior = validos.pop(item.codigo_palete, None)
+        if anterior is not None:
+            resultados[anterior]["resultado"] = "duplicado"
+            resultados[anterior]["mensagem"] = f"Substituído pelo item {i}"
+        validos[item.codigo_palete] = i
+
+    indices = list(validos.values())
+    chunk = _tamanho_chunk()
+
+    with transaction.atomic():
+        for inicio in range(0, len(indices), chunk):
+            parte = indices[inicio:inicio + chunk]
+            codigos = [itens[i].codigo_palete for i in parte]
+
+            # codigo_palete -> (armazem, agendamento, endereço, id, data_hora, status) atuais, para ajustar
+            # contadores, cobertura e estatísticas. As linhas ficam travadas até o commit: o escopo
+            # conferido abaixo não muda antes do upsert.
+            existentes = {
+                codigo: resto
+                for codigo, *resto in Inventario.objects.select_for_update()
+                .filter(codigo_palete__in=codigos)
+                .values_list(
+                    "codigo_palete", "armazem_id", "agendamento_id", "codigo_endereco", "id", "data_hora", "status"
+                )
+            }
+
+            # codigo_palete é único globalmente: um Admin não pode mover para o seu armazém
+            # (nem reescrever) um palete que hoje pertence a um armazém fora do seu escopo
+            if escopo is not None:
+                permitidos = []
+                for i in parte:
+                    atual = existentes.get(itens[i].codigo_palete)
+                    if atual is not None and atual[0] not in escopo:
+                        resultados[i]["mensagem"] = "Palete pertence a um armazém não autorizado"
+                    else:
+                        permitidos.append(i)
+                parte = permitidos
+                if not parte:
+                    continue
+
+            objetos = [
+                Inventario(
+                    agendamento=agendamentos[itens[i].agendamento_id],
+                    armazem_id=agendamentos[itens[i].agendamento_id].armazem_id,
+                    codigo_palete=itens[i].codigo_palete,
+                    codigo_endereco=itens[i].codigo_endereco,
+                    chave_endereco=chave_endereco(itens[i].codigo_endereco),
+                )
+                for i in parte
+            ]
+            Inventario.objects.bulk_create(
+                objetos,
+                update_conflicts=True,
+                unique_fields=["codigo_palete"],
+                update_fields=["agendamento", "armazem", "codigo_endereco", "chave_endereco", "data_hora"],
+            )
+
+            entradas, saidas = Counter(), Counter()
+            enderecos_por_agendamento = defaultdict(list)
+            coberturas_alteradas = set()
+            movimentos = []
+            for i, objeto in zip(parte, objetos):
+                resultados[i]["id"] = objeto.pk
+                enderecos_por_agendamento[objeto.agendamento_id].append(objeto.codigo_endereco)
+                if objeto.codigo_palete in existentes:
+                    resultados[i]["resultado"] = "atualizado"
+                    (armazem_anterior, agendamento_anterior, endereco_anterior,
+                     item_id, data_hora_anterior, status) = existentes[objeto.codigo_palete]
+                    if (agendamento_anterior, endereco_anterior) != (objeto.agendamento_id, objeto.codigo_endereco):
+                        coberturas_alteradas.add(agendamento_anterior)
+                    # O upsert mantém o id: o item sai do período/armazém antigo e entra no novo
+                    movimentos.append((
+                        item_id,
+                        (armazem_anterior, data_hora_anterior, endereco_anterior, status),
+                        (objeto.armazem_id, objeto.data_hora, objeto.codigo_endereco, status),
+                    ))
+                else:
+                    resultados[i]["resultado"] = "criado"
+                    armazem_anterior = None
+
+                # Atualização no mesmo armazém só avança o último registro (soma 0)
+                entradas[objeto.armazem_id] += int(armazem_anterior != objeto.armazem_id)
+                if armazem_anterior is not None and armazem_anterior != objeto.armazem_id:
+                    saidas[armazem_anterior] += 1
+
+            # bulk_create não dispara sinais: atualiza contadores e estatísticas uma vez por chunk
+            ajustar_itens(movimentos)
+            agora = timezone.now()
+            for armazem_id, quantidade in entradas.items():
+                incrementar_contador(armazem_id, quantidade, agora)
+            for armazem_id, quantidade in saidas.items():
+                decrementar_contador(armazem_id, quantidade)
+
+            # Cobertura: um update por agendamento após o commit; se um palete saiu de um endereço, o bitmap é remontado
+            invalidar_cobertura(coberturas_alteradas)
+            for agendamento_id, enderecos in enderecos_por_agendamento.items():
+                if agendamento_id not in coberturas_alteradas:
+                    marcar_ao_confirmar(agendamento_id, enderecos)
+
+    contagem = {"criado": 0, "atualizado": 0}
+    for resultado in resultados:
+        if resultado["resultado"] in contagem:
+            contagem[resultado["resultado"]] += 1
+
+    return {
+        "criados": contagem["criado"],
+        "atualizados": contagem["atualizado"],
+        "rejeitados": len(resultados) - contagem["criado"] - contagem["atualizado"],
+        "itens": resultados,
+    }
+
+
+# --- Contadores por armazém (dashboard) ---
+def incrementar_contador(armazem_id, quantidade=1, registrado_em=None):
+    """Soma `quantidade` ao total do armazém e avança o último registro."""
+    if armazem_id is None:
+        return
+
+    atualizacao = {"total_itens": F("total_itens") + quantidade}
+    if registrado_em is not None:
+        atualizacao["ultimo_registro"] = Greatest(Coalesce("ultimo_registro", registrado_em), registrado_em)
+
+    contadores = ContadorInventarioArmazem.objects.filter(armazem_id=armazem_id)
+    if contadores.update(**atualizacao):
+        return
+
+    _, criado = ContadorInventarioArmazem.objects.get_or_create(
+        armazem_id=armazem_id,
+        defaults={"total_itens": quantidade, "ultimo_registro": registrado_em},
+    )
+    if not criado:
+        contadores.update(**atualizacao)
+
+
+def decrementar_contador(armazem_id, quantidade=1):
+    """
+    Subtrai do total. O último registro não é recalculado (exigiria varrer a
+    tabela); só é limpo quando o armazém fica sem itens.
+    """
+    if armazem_id is None:
+        return
+
+    contadores = ContadorInventarioArmazem.objects.filter(armazem_id=armazem_id)
+    contadores.update(total_itens=Greatest(F("total_itens") - quantidade, 0))
+    contadores.filter(total_itens=0).update(ultimo_registro=None)
+
+
+def recalcular_contadores():
+    """
+    Reconstrói todos os contadores a partir de um único agregado agrupado
+    por armazém (Count + Max(data_hora)).
+    """
+    agregados = (
+        Inventario.objects.order_by()
+        .values("armazem_id")
+        .annotate(total=Count("id"), ultimo=Max("data_hora"))
+    )
+    contadores = [
+        ContadorInventarioArmazem(
+            armazem_id=linha["armazem_id"],
+            total_itens=linha["total"],
+            ultimo_registro=linha["ultimo"],
+        )
+        for linha in agregados
+        if linha["armazem_id"] is not None
+    ]
+
+    with transaction.atomic():
+        ContadorInventarioArmazem.objects.exclude(
+            armazem_id__in=[contador.armazem_id for contador in contadores]
+        ).update(total_itens=0, ultimo_registro=None)
+        ContadorInventarioArmazem.objects.bulk_create(
+            contadores,
+            update_conflicts=True,
+            unique_fields=["armazem"],
+            update_fields=["total_itens", "ultimo_registro"],
+        )
+    return len(contadores)
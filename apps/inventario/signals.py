@@ -0,0 +1,60 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Inventario
+from .services import incrementar_contador, decrementar_contador
+from .cobertura import marcar_ao_confirmar, invalidar_cobertura
+from .estatisticas import ajustar_itens
+
+
+# --- Contadores por armazém ---
+@receiver(post_save, sender=Inventario)
+def contar_item_inventario(sender, instance, created, **kwargs):
+    if created:
+        incrementar_contador(instance.armazem_id, 1, instance.data_hora)
+
+
+@receiver(post_delete, sender=Inventario)
+def descontar_item_inventario(sender, instance, **kwargs):
+    decrementar_contador(instance.armazem_id, 1)
+
+
+# --- Estatísticas: itens já contabilizados que mudam ou são excluídos ---
+CAMPOS_ESTATISTICA = ("armazem_id", "data_hora", "codigo_endereco", "status")
+
+
+@receiver(pre_save, sender=Inventario)
+def guardar_estado_anterior(sender, instance, update_fields=None, **kwargs):
+    instance._estado_anterior = None
+    campos = {"armazem", "data_hora", "codigo_endereco", "status"}
+    if instance.pk is None or (update_fields is not None and not campos & set(update_fields)):
+        return
+    instance._estado_anterior = Inventario.objects.filter(pk=instance.pk).values_list(*CAMPOS_ESTATISTICA).first()
+
+
+@receiver(post_save, sender=Inventario)
+def ajustar_estatistica_item(sender, instance, created, **kwargs):
+    anterior = getattr(instance, "_estado_anterior", None)
+    if created or anterior is None:
+        return
+    atual = tuple(getattr(instance, campo) for campo in CAMPOS_ESTATISTICA)
+    ajustar_itens([(instance.pk, anterior, atual)])
+
+
+@receiver(post_delete, sender=Inventario)
+def descontar_da_estatistica(sender, instance, **kwargs):
+    ajustar_itens([(instance.pk, tuple(getattr(instance, campo) for campo in CAMPOS_ESTATISTICA), None)])
+
+
+# --- Cobertura de endereços por agendamento ---
+@receiver(post_save, sender=Inventario)
+def atualizar_cobertura(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        marcar_ao_confirmar(instance.agendamento_id, [instance.codigo_endereco])
+    elif update_fields is None or {"codigo_endereco", "agendamento"} & set(update_fields):
+        # Endereço anterior desconhecido: o bitmap é remontado na próxima leitura
+        invalidar_cobertura([instance.agendamento_id])
+
+
+@receiver(post_delete, sender=Inventario)
+def remover_da_cobertura(sender, instance, **kwargs):
+    invalidar_cobertura([instance.agendamento_id])
@@ -1,10 +1,22 @@
 from ninja import Router
 from django.shortcuts import get_object_or_404
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta
+from django.utils import timezone
 from ninja.errors import HttpError
 from django.core.exceptions import PermissionDenied
 from . import schemas, models
+from .frota import registro as frota
+from .historico import serie_telemetria
+from .lotes import logs_erro
+from .services import (
+    comandos_pendentes, confirmar_comandos, publicar_comando, status_transmissao, transmitir_comando,
+)
+from .telemetria import buffer as telemetria, resolver_robo_id
+from .vivacidade import monitor as vivacidade
+from apps.armazens.models import Armazem
 from apps.usuarios.authentication import JWTAuth
+from apps.usuarios.escopo import escopo_do_usuario, filtrar_por_escopo
 
 router = Router()
 auth_router = Router(auth=JWTAuth())
@@ -25,6 +37,18 @@ def criar_robo(request, payload: schemas.RoboIn):
     return 201, robo
 
 
+@master_router.get("/telemetria/estatisticas", response={200: dict})
+def estatisticas_telemetria(request):
+    if request.user.tipo != "Master":
+        raise PermissionDenied("Acesso restrito a usuários Master")
+
+    return {
+        **telemetria.estatisticas(),
+        "logs_erro": logs_erro.estatisticas(),
+        "vivacidade": vivacidade.estatisticas(),
+    }
+
+
 # --- Rotas Admin ---
 @admin_router.get("/", response=List[schemas.RoboOut])
 def listar_robos(request, armazem_id: int = None):
@@ -34,17 +58,40 @@ def listar_robos(request, armazem_id: int = None):
         queryset = queryset.filter(armazem_id=armazem_id)
 
     if request.user.tipo == "Admin":
-        queryset = queryset.filter(armazem__in=request.user.armazens_permitidos.all())
+        queryset = filtrar_por_escopo(queryset, request.user)
 
     return queryset
 
 
+@admin_router.get("/estado", response=schemas.EstadoFrotaOut)
+def estado_frota(request, armazem_id: Optional[int] = None, desde: Optional[int] = None):
+    """
+    Estado da frota a partir do registro em memória (sem consultar o banco).
+    Com `desde`, devolve só o que mudou após essa versão.
+    """
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+    armazem_ids = [armazem_id] if armazem_id else None
+    if request.user.tipo == "Admin":
+        escopo = escopo_do_usuario(request.user)
+        if armazem_id and armazem_id not in escopo:
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+        armazem_ids = armazem_ids or escopo.ids
+
+    frota.garantir_carga()
+    if desde is not None:
+        versao, robos, removidos = frota.alteracoes(desde, armazem_ids)
+        return {"versao": versao, "robos": robos, "removidos": removidos}
+    versao, robos = frota.snapshot(armazem_ids)
+    return {"versao": versao, "robos": robos}
+
+
 @admin_router.post("/{robo_id}/comando", response={201: schemas.ComandoOut})
 def enviar_comando(request, robo_id: int, payload: schemas.ComandoIn):
     robo = get_object_or_404(models.Robo, id=robo_id)
 
     if request.user.tipo == "Admin":
-        if robo.armazem not in request.user.armazens_permitidos.all():
+        if robo.armazem_id not in escopo_do_usuario(request.user):
             raise PermissionDenied("Acesso não autorizado a este robô")
 
     comando = models.ComandoRobo.objects.create(
@@ -52,26 +99,95 @@ def enviar_comando(request, robo_id: int, payload: schemas.ComandoIn):
         tipo=payload.tipo,
         usuario=request.user
     )
+    publicar_comando(comando)
     return 201, comando
 
 
+@admin_router.get("/{robo_id}/telemetria", response=schemas.SerieTelemetriaOut)
+def historico_telemetria(
+    request,
+    robo_id: int,
+    metrica: str = "bateria",
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    resolucao: Optional[str] = None,
+):
+    """Série de uma métrica no período (padrão: última hora); resolução escolhida pelo tamanho do período."""
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+    robo = get_object_or_404(models.Robo, id=robo_id)
+
+    if request.user.tipo == "Admin":
+        if robo.armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este robô")
+
+    fim = fim or timezone.now()
+    inicio = inicio or fim - timedelta(hours=1)
+    if timezone.is_naive(inicio):
+        inicio = timezone.make_aware(inicio)
+    if timezone.is_naive(fim):
+        fim = timezone.make_aware(fim)
+    return serie_telemetria(robo.id, metrica, inicio, fim, resolucao)
+
+
+@admin_router.post("/armazem/{armazem_id}/comando", response={201: schemas.TransmissaoOut})
+def enviar_comando_armazem(request, armazem_id: int, payload: schemas.ComandoIn):
+    """Mesmo comando para todos os robôs habilitados do armazém (ex.: parada de emergência)."""
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+    if request.user.tipo == "Admin":
+        if armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a este armazém")
+    get_object_or_404(Armazem, id=armazem_id)
+
+    transmissao = transmitir_comando(armazem_id, payload.tipo, request.user)
+    return 201, status_transmissao(transmissao)
+
+
+@admin_router.get("/transmissoes/{transmissao_id}", response=schemas.TransmissaoOut)
+def obter_transmissao(request, transmissao_id: int):
+    if request.user.tipo not in ["Master", "Admin"]:
+        raise PermissionDenied("Acesso restrito a administradores")
+    transmissao = get_object_or_404(models.TransmissaoComando, id=transmissao_id)
+
+    if request.user.tipo == "Admin":
+        if transmissao.armazem_id not in escopo_do_usuario(request.user):
+            raise PermissionDenied("Acesso não autorizado a esta transmissão")
+
+    return status_transmissao(transmissao)
+
+
 # --- Rotas Robô (comunicação direta) ---
 @robo_router.post("/{identificador}/status", response={200: dict})
 def atualizar_status_robo(request, identificador: str, payload: schemas.SensorData):
-    try:
-        robo = models.Robo.objects.get(identificador=identificador)
-        robo.sensores = payload.dict()
-        robo.status = 'ativo' if payload.bateria and payload.bateria > 5 else 'inativo'
-        robo.save()
-        return 200, {"status": "success"}
-    except Exception as e:
-        raise HttpError(400, str(e))
+    robo_id = resolver_robo_id(identificador)
+    if robo_id is None:
+        raise HttpError(400, "Robo matching query does not exist.")
+
+    # Gravação em lote pelo buffer de telemetria (imediata em transições de estado)
+    telemetria.registrar(
+        robo_id,
+        status='ativo' if payload.bateria and payload.bateria > 5 else 'inativo',
+        sensores=payload.dict(),
+    )
+    return 200, {"status": "success"}
 
 
 @robo_router.get("/{identificador}/comandos", response=List[schemas.ComandoOut])
 def obter_comandos(request, identificador: str):
-    robo = get_object_or_404(models.Robo, identificador=identificador)
-    return robo.comandos.filter(executado=False)
+    """Pendentes do robô (entrega imediata só pelo WebSocket; ver apps.robos.services)."""
+    robo_id = resolver_robo_id(identificador)
+    if robo_id is None:
+        raise HttpError(404, "Robô não encontrado")
+    return comandos_pendentes(robo_id)
+
+
+@robo_router.post("/{identificador}/comandos/ack", response=schemas.AckComandosOut)
+def confirmar_execucao(request, identificador: str, payload: schemas.AckComandosIn):
+    robo_id = resolver_robo_id(identificador)
+    if robo_id is None:
+        raise HttpError(404, "Robô não encontrado")
+    return {"confirmados": confirmar_comandos(robo_id, payload.comandos)}
 
 
 # Montagem da hierarquia
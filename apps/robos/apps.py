@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RobosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.robos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from sistema_sia.processo import eh_processo_servidor
+
+        # Detector de robôs sem comunicação: desde a partida, mesmo sem nenhum batimento recebido
+        if getattr(settings, "ROBOS_VIVACIDADE", {}).get("ATIVO", True) and eh_processo_servidor():
+            from .vivacidade import monitor
+            monitor.iniciar()
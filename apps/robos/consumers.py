@@ -1,10 +1,23 @@
-import json
+import asyncio
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
+from pydantic import ValidationError as PydanticValidationError
+from apps.robos.frota import registro as frota
+from apps.robos.lotes import logs_erro
 from apps.robos.models import Robo
+from apps.robos.protocolo import ProtocoloMixin
+from apps.robos.schemas import SensorData, StatusRobo
+from apps.robos.services import comandos_pendentes, confirmar_comandos, dados_do_comando
+from apps.robos.telemetria import buffer as telemetria
+from apps.robos.vivacidade import GRUPO_ALERTAS, registrar_batimento
 
+logger = logging.getLogger(__name__)
 
-class RoboConsumer(AsyncWebsocketConsumer):
+
+class RoboConsumer(ProtocoloMixin, AsyncWebsocketConsumer):
     groups = ["robos_monitor"]
 
     async def connect(self):
@@ -12,14 +25,26 @@ class RoboConsumer(AsyncWebsocketConsumer):
 
         # Autenticação do robô via token
         try:
-            await self.authenticate_robo()
-            await self.accept()
+            robo = await self.authenticate_robo()
+            await self.aceitar()  # JSON ou MessagePack (ver apps.robos.protocolo)
+            frota.registrar_robo(robo, sobrescrever_status=False)
+            frota.conectar(robo.id)
+            registrar_batimento(robo.id)
 
-            # Adiciona à group específica do robô
+            # Adiciona à group específica do robô e à do armazém (envios para todos)
+            self.armazem_id = robo.armazem_id
             await self.channel_layer.group_add(
                 f"robo_{self.robo_id}",
                 self.channel_name
             )
+            await self.channel_layer.group_add(
+                f"armazem_{self.armazem_id}",
+                self.channel_name
+            )
+
+            # Entrega o que ficou pendente enquanto o robô estava desconectado
+            for comando in await self.pending_commands():
+                await self.enviar({'command': comando.tipo, **dados_do_comando(comando)})
 
         except Exception as e:
             await self.close(code=4001)
@@ -33,48 +58,156 @@ class RoboConsumer(AsyncWebsocketConsumer):
             raise PermissionError("Robô desabilitado")
         return robo
 
+    @database_sync_to_async
+    def pending_commands(self):
+        return list(comandos_pendentes(self.robo_id))
+
     async def disconnect(self, close_code):
+        if str(self.robo_id).isdigit():
+            frota.desconectar(int(self.robo_id))
+
         # Remove do group ao desconectar
         await self.channel_layer.group_discard(
             f"robo_{self.robo_id}",
             self.channel_name
         )
+        if getattr(self, 'armazem_id', None) is not None:
+            await self.channel_layer.group_discard(
+                f"armazem_{self.armazem_id}",
+                self.channel_name
+            )
 
-    async def receive(self, text_data):
-        """Recebe mensagens do robô"""
-        try:
-            data = json.loads(text_data)
-            message_type = data.get('type')
+    async def receber(self, data):
+        """Recebe mensagens do robô (já decodificadas de JSON ou MessagePack)"""
+        message_type = data.get('type')
 
-            if message_type == 'status_update':
-                await self.handle_status_update(data)
-            elif message_type == 'log_error':
-                await self.handle_log_error(data)
-            # Adicione outros tipos de mensagem conforme necessário
+        if message_type == 'status_update':
+            await self.handle_status_update(data)
+        elif message_type == 'log_error':
+            await self.handle_log_error(data)
+        elif message_type == 'ack':
+            await self.handle_ack(data)
+        # Adicione outros tipos de mensagem conforme necessário
 
-        except json.JSONDecodeError:
-            await self.send(json.dumps({
-                'error': 'Invalid JSON format'
-            }))
+    async def handle_status_update(self, data):
+        """Atualiza status do robô (gravado em lote pelo buffer de telemetria)"""
+        # Mesmo schema da rota HTTP de status: valores inválidos não chegam ao buffer
+        try:
+            if not isinstance(data.get('sensores') or {}, dict):
+                raise ValueError("sensores deve ser um objeto")
+            sensores = SensorData.model_validate(data.get('sensores') or {})
+            status = StatusRobo(data['status']) if data.get('status') is not None else None
+        except (PydanticValidationError, ValueError):
+            await self.enviar({'error': 'Invalid status_update payload'})
+            return
 
-    @database_sync_to_async
-    def handle_status_update(self, data):
-        """Atualiza status do robô no banco de dados"""
-        Robo.objects.filter(id=self.robo_id).update(
-            status=data.get('status'),
-            sensores=data.get('sensores', {})
+        telemetria.registrar(
+            int(self.robo_id),
+            status=status.value if status else None,
+            sensores=sensores.dict()
         )
 
-    @database_sync_to_async
-    def handle_log_error(self, data):
-        """Registra erro do robô"""
-        from logs_erro.models import LogErro
-        LogErro.objects.create(
-            robo_id=self.robo_id,
-            mensagem=data.get('message'),
-            origem=data.get('origin', 'websocket')
+    async def handle_ack(self, data):
+        """Confirma em lote os comandos executados pelo robô"""
+        confirmados = await database_sync_to_async(confirmar_comandos)(self.robo_id, data.get('comandos') or [])
+        await self.enviar({'type': 'ack', 'confirmados': confirmados})
+
+    async def handle_log_error(self, data):
+        """Enfileira o erro do robô (gravado em lote); avisa o robô se ele excedeu a cota"""
+        aceito = await logs_erro.adicionar(
+            int(self.robo_id),
+            data.get('message'),
+            data.get('origin', 'websocket')
         )
+        if not aceito:
+            await self.enviar({
+                'type': 'throttle',
+                'retry_ms': int(logs_erro.intervalo * 1000)
+            })
 
     async def send_command(self, event):
         """Envia comando para o robô"""
-        await self.send(text_data=json.dumps(event['data']))
\ No newline at end of file
+        await self.enviar(event['data'])
+
+    async def send_broadcast(self, event):
+        """Comando para o armazém inteiro: repassa com o comando_id deste robô"""
+        comando_id = event['comandos'].get(str(self.robo_id))
+        if comando_id is None:
+            return  # robô não incluído (ex.: desabilitado)
+        await self.enviar({'command': event['command'], 'comando_id': comando_id, **event['data']})
+
+
+class FrotaConsumer(ProtocoloMixin, AsyncWebsocketConsumer):
+    """
+    Painel da frota: envia um snapshot ao conectar e depois só os deltas do
+    registro em memória (apps.robos.frota), sem consultar o banco.
+    Autenticação pelo JWT do usuário em ?token=; filtro opcional ?armazem_id=.
+    """
+
+    async def connect(self):
+        parametros = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            self.armazem_ids = await self.autorizar(
+                (parametros.get('token') or [''])[0],
+                (parametros.get('armazem_id') or [None])[0],
+            )
+        except Exception as e:
+            await self.close(code=4001)
+            logger.warning("Conexão do painel da frota rejeitada: %s", e)
+            return
+
+        await self.aceitar()
+        await self.channel_layer.group_add(GRUPO_ALERTAS, self.channel_name)
+        await database_sync_to_async(frota.garantir_carga)()
+        self.versao, robos = frota.snapshot(self.armazem_ids)
+        await self.enviar({'type': 'snapshot', 'versao': self.versao, 'robos': robos})
+        self.tarefa = asyncio.create_task(self.enviar_deltas())
+
+    @database_sync_to_async
+    def autorizar(self, token, armazem_id):
+        """Armazéns visíveis (None = todos) para o usuário do token"""
+        from apps.usuarios.authentication import decodificar_token, resolver_principal
+        from apps.usuarios.escopo import escopo_do_usuario
+
+        claims = decodificar_token(token)
+        if claims.eh_robo:
+            raise PermissionError("Acesso restrito a usuários")
+        user = resolver_principal(claims)
+        if user.tipo not in ("Master", "Admin"):
+            raise PermissionError("Acesso restrito a administradores")
+
+        pedidos = {int(armazem_id)} if armazem_id else None
+        if user.tipo == "Master":
+            return pedidos
+        permitidos = set(escopo_do_usuario(user).ids)
+        return permitidos & pedidos if pedidos is not None else permitidos
+
+    async def enviar_deltas(self):
+        intervalo = getattr(settings, "ROBOS_FROTA", {}).get("INTERVALO_DELTA_MS", 1000) / 1000
+        while True:
+            await asyncio.sleep(intervalo)
+            versao, alterados, removidos = frota.alteracoes(self.versao, self.armazem_ids)
+            self.versao = versao
+            if alterados or removidos:
+                await self.enviar({'type': 'delta', 'versao': versao, 'robos': alterados, 'removidos': removidos})
+
+    async def receber(self, data):
+        # Reenvio do snapshot sob demanda (ex.: cliente perdeu deltas)
+        if data.get('type') == 'snapshot':
+            self.versao, robos = frota.snapshot(self.armazem_ids)
+            await self.enviar({'type': 'snapshot', 'versao': self.versao, 'robos': robos})
+
+    async def alerta_vivacidade(self, event):
+        """Robôs que pararam de se comunicar (apps.robos.vivacidade)"""
+        robos = [
+            robo for robo in event['robos']
+            if self.armazem_ids is None or robo['armazem_id'] in self.armazem_ids
+        ]
+        if robos:
+            await self.enviar({'type': 'alerta', 'motivo': 'sem_comunicacao', 'robos': robos})
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(GRUPO_ALERTAS, self.channel_name)
+        tarefa = getattr(self, 'tarefa', None)
+        if tarefa is not None:
+            tarefa.cancel()
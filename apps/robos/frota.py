@@ -0,0 +1,184 @@
+"""
+Registro em memória do estado da frota (por processo).
+
+Alimentado pelo buffer de telemetria (status, bateria, último contato),
+pelas conexões/desconexões do RoboConsumer (conectado, nó que atende o
+WebSocket) e pelos sinais de Robo (identificador, armazém). Serve o
+endpoint /robos/admin/estado e o FrotaConsumer sem consultar o banco: o
+banco só é lido uma vez, na primeira carga do processo.
+
+Cada mudança recebe um número de versão crescente; clientes pedem
+`alteracoes(desde=versao)` para receber só os deltas. O índice por armazém
+mantém as consultas de um armazém em O(robôs do armazém).
+
+Com vários processos cada um enxerga apenas o que recebeu; o estado
+persistido continua sendo o do banco (Robo).
+"""
+import os
+import socket
+import threading
+from collections import defaultdict
+from .models import Robo
+
+NO = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def bateria_dos_sensores(sensores):
+    """Nível de bateria em Robo.sensores; None se ausente ou se sensores não for um dicionário."""
+    if not isinstance(sensores, dict):
+        return None
+    try:
+        return float(sensores.get("bateria"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RegistroFrota:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estados = {}  # robo_id -> estado
+        self._por_armazem = defaultdict(set)  # armazem_id -> {robo_id}
+        self._versoes = {}  # robo_id -> versão da última mudança
+        self._removidos = {}  # robo_id -> (versão, armazem_id)
+        self._versao = 0
+        self._carregado = False
+
+    # --- Escrita ---
+    def _estado(self, robo_id):
+        estado = self._estados.get(robo_id)
+        if estado is None:
+            estado = self._estados[robo_id] = {
+                "robo_id": robo_id,
+                "identificador": None,
+                "armazem_id": None,
+                "status": None,
+                "bateria": None,
+                "ultima_comunicacao": None,
+                "conectado": False,
+                "no": None,
+            }
+            self._removidos.pop(robo_id, None)
+        return estado
+
+    def _mover(self, estado, armazem_id):
+        if estado["armazem_id"] == armazem_id:
+            return
+        if estado["armazem_id"] is not None:
+            self._por_armazem[estado["armazem_id"]].discard(estado["robo_id"])
+        estado["armazem_id"] = armazem_id
+        if armazem_id is not None:
+            self._por_armazem[armazem_id].add(estado["robo_id"])
+
+    def _marcar(self, robo_id):
+        self._versao += 1
+        self._versoes[robo_id] = self._versao
+
+    def atualizar(self, robo_id, status=None, bateria=None, ultima_comunicacao=None):
+        """Telemetria recebida (não acessa o banco; seguro em código async)."""
+        with self._lock:
+            estado = self._estado(robo_id)
+            if status is not None:
+                estado["status"] = status
+            if bateria is not None:
+                estado["bateria"] = bateria
+            if ultima_comunicacao is not None:
+                estado["ultima_comunicacao"] = ultima_comunicacao
+            self._marcar(robo_id)
+
+    def conectar(self, robo_id, no=NO):
+        with self._lock:
+            estado = self._estado(robo_id)
+            estado["conectado"], estado["no"] = True, no
+            self._marcar(robo_id)
+
+    def desconectar(self, robo_id, no=NO):
+        with self._lock:
+            estado = self._estados.get(robo_id)
+            # Ignora se o robô já reconectou por outro nó
+            if estado is None or estado["no"] not in (None, no):
+                return
+            estado["conectado"], estado["no"] = False, None
+            self._marcar(robo_id)
+
+    def registrar_robo(self, robo, sobrescrever_status=True):
+        """Dados cadastrais do Robo (sinal post_save ou conexão do robô)."""
+        with self._lock:
+            estado = self._estado(robo.id)
+            estado["identificador"] = robo.identificador
+            self._mover(estado, robo.armazem_id)
+            if sobrescrever_status or estado["status"] is None:
+                estado["status"] = robo.status
+            if estado["bateria"] is None:
+                estado["bateria"] = bateria_dos_sensores(robo.sensores)
+            if estado["ultima_comunicacao"] is None:
+                estado["ultima_comunicacao"] = robo.ultima_comunicacao
+            self._marcar(robo.id)
+
+    def remover(self, robo_id):
+        with self._lock:
+            estado = self._estados.pop(robo_id, None)
+            if estado is None:
+                return
+            self._mover(estado, None)
+            self._versoes.pop(robo_id, None)
+            self._versao += 1
+            self._removidos[robo_id] = (self._versao, estado["armazem_id"])
+
+    # --- Carga inicial ---
+    def garantir_carga(self):
+        """Lê a frota do banco uma vez por processo (não chamar direto do event loop)."""
+        if self._carregado:
+            return
+        linhas = list(Robo.objects.values_list(
+            "id", "identificador", "armazem_id", "status", "sensores", "ultima_comunicacao"
+        ))
+        with self._lock:
+            if self._carregado:
+                return
+            for robo_id, identificador, armazem_id, status, sensores, ultima_comunicacao in linhas:
+                estado = self._estado(robo_id)
+                estado["identificador"] = identificador
+                self._mover(estado, armazem_id)
+                # O que já chegou pela telemetria é mais novo que o banco
+                if estado["status"] is None:
+                    estado["status"] = status
+                if estado["bateria"] is None:
+                    estado["bateria"] = bateria_dos_sensores(sensores)
+                if estado["ultima_comunicacao"] is None:
+                    estado["ultima_comunicacao"] = ultima_comunicacao
+                self._marcar(robo_id)
+            self._carregado = True
+
+    # --- Leitura ---
+    def _ids(self, armazem_ids):
+        if armazem_ids is None:
+            return list(self._estados)
+        return [robo_id for armazem_id in armazem_ids for robo_id in self._por_armazem.get(armazem_id, ())]
+
+    def snapshot(self, armazem_ids=None):
+        """(versão, [estados]) de toda a frota ou só dos armazéns informados."""
+        with self._lock:
+            robos = [dict(self._estados[robo_id]) for robo_id in self._ids(armazem_ids)]
+            return self._versao, robos
+
+    def alteracoes(self, desde, armazem_ids=None):
+        """(versão, [estados alterados], [ids removidos]) após a versão `desde`."""
+        with self._lock:
+            alterados = [
+                dict(self._estados[robo_id])
+                for robo_id in self._ids(armazem_ids)
+                if self._versoes.get(robo_id, 0) > desde
+            ]
+            removidos = [
+                robo_id
+                for robo_id, (versao, armazem_id) in self._removidos.items()
+                if versao > desde and (armazem_ids is None or armazem_id in armazem_ids)
+            ]
+            return self._versao, alterados, removidos
+
+    @property
+    def versao(self):
+        return self._versao
+
+
+registro = RegistroFrota()
@@ -0,0 +1,296 @@
+"""
+Série temporal da telemetria dos robôs.
+
+- Bruto: TelemetriaRobo, gravado em lote pelo buffer (apps.robos.telemetria)
+  e particionado por dia no PostgreSQL; partições antigas são removidas
+  inteiras (DROP), sem DELETE linha a linha.
+- Rollups: TelemetriaAgregada em 1 minuto (a partir do bruto) e 1 hora (a
+  partir do de 1 minuto), calculados por GROUP BY no banco e gravados com
+  upsert; ProgressoRollupTelemetria guarda até onde cada um foi.
+- Consulta: serie_telemetria escolhe a resolução pelo tamanho do período.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from ninja.errors import HttpError
+from .models import ProgressoRollupTelemetria, TelemetriaAgregada, TelemetriaRobo
+
+METRICAS = ("temperatura", "bateria", "velocidade")
+TABELA_BRUTA = "robos_telemetriarobo"
+
+
+def _config():
+    return getattr(settings, "ROBOS_TELEMETRIA", {})
+
+
+def amostra_dos_sensores(robo_id, sensores, registrado_em):
+    """Linha de TelemetriaRobo a partir do dicionário de sensores (campos ausentes ficam nulos)."""
+    sensores = sensores or {}
+
+    def numero(chave):
+        try:
+            return float(sensores[chave]) if sensores.get(chave) is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    obstaculo = sensores.get("obstaculo_detectado")
+    return TelemetriaRobo(
+        robo_id=robo_id,
+        registrado_em=registrado_em,
+        temperatura=numero("temperatura"),
+        bateria=numero("bateria"),
+        velocidade=numero("velocidade"),
+        obstaculo_detectado=None if obstaculo is None else bool(obstaculo),
+    )
+
+
+# --- Partições (somente PostgreSQL) ---
+TABELA_PADRAO = f"{TABELA_BRUTA}_padrao"
+
+
+def _nome_particao(dia):
+    return f"{TABELA_BRUTA}_p{dia:%Y%m%d}"
+
+
+def _criar_particao(cursor, dia):
+    """
+    Cria a partição do dia. Se o job ficou parado, amostras do dia podem já
+    estar na partição padrão, e CREATE ... PARTITION OF falharia: a tabela é
+    criada solta, recebe essas linhas (removidas da padrão) e só então é
+    anexada, tudo na mesma transação.
+    """
+    nome = _nome_particao(dia)
+    cursor.execute("SELECT to_regclass(%s)", [nome])
+    if cursor.fetchone()[0] is not None:
+        return False
+    inicio = datetime.combine(dia, time.min, dt_timezone.utc)
+    faixa = [inicio, inicio + timedelta(days=1)]
+    cursor.execute(f"CREATE TABLE {nome} (LIKE {TABELA_BRUTA})")
+    cursor.execute(
+        f"WITH movidas AS (DELETE FROM {TABELA_PADRAO} WHERE registrado_em >= %s AND registrado_em < %s "
+        f"RETURNING *) INSERT INTO {nome} SELECT * FROM movidas",
+        faixa,
+    )
+    cursor.execute(f"ALTER TABLE {TABELA_BRUTA} ATTACH PARTITION {nome} FOR VALUES FROM (%s) TO (%s)", faixa)
+    return True
+
+
+def garantir_particoes(dias_a_frente=None, using="default"):
+    """Cria as partições diárias (UTC) que faltam de hoje até `dias_a_frente`."""
+    conexao = connections[using]
+    if conexao.vendor != "postgresql":
+        return 0
+    dias_a_frente = dias_a_frente if dias_a_frente is not None else _config().get("PARTICOES_A_FRENTE", 3)
+    hoje = timezone.now().astimezone(dt_timezone.utc).date()
+    criadas = 0
+    for deslocamento in range(dias_a_frente + 1):
+        with transaction.atomic(using=using), conexao.cursor() as cursor:
+            criadas += _criar_particao(cursor, hoje + timedelta(days=deslocamento))
+    return criadas
+
+
+def remover_particoes_antigas(retencao_dias=None, using="default"):
+    """
+    DROP das partições diárias inteiramente anteriores à retenção do bruto;
+    na partição padrão (dias sem partição própria) as linhas antigas são apagadas.
+    """
+    conexao = connections[using]
+    if conexao.vendor != "postgresql":
+        return []
+    retencao_dias = retencao_dias or _config().get("RETENCAO_BRUTA_DIAS", 7)
+    limite = (timezone.now() - timedelta(days=retencao_dias)).astimezone(dt_timezone.utc).date()
+    removidas = []
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABELA_BRUTA],
+        )
+        for (nome,) in cursor.fetchall():
+            sufixo = nome.rsplit("_p", 1)[-1]
+            if not sufixo.isdigit():
+                continue  # partição padrão
+            if datetime.strptime(sufixo, "%Y%m%d").date() < limite:
+                cursor.execute(f"DROP TABLE IF EXISTS {nome}")
+                removidas.append(nome)
+        cursor.execute(
+            f"DELETE FROM {TABELA_PADRAO} WHERE registrado_em < %s",
+            [datetime.combine(limite, time.min, dt_timezone.utc)],
+        )
+    return removidas
+
+
+# --- Rollups ---
+def _campos_agregados():
+    return [f"{metrica}_{sufixo}" for metrica in METRICAS for sufixo in ("min", "max", "media")] + [
+        "amostras", "obstaculos",
+    ]
+
+
+def _gravar_agregados(linhas):
+    TelemetriaAgregada.objects.bulk_create(
+        linhas,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["robo", "resolucao", "inicio"],
+        update_fields=_campos_agregados(),
+    )
+
+
+def _rollup_minuto(desde, ate):
+    """Agrega o bruto de [desde, ate) em baldes de 1 minuto."""
+    agregacoes = {"amostras": Count("id"), "obstaculos": Count("id", filter=Q(obstaculo_detectado=True))}
+    for metrica in METRICAS:
+        agregacoes[f"{metrica}_min"] = Min(metrica)
+        agregacoes[f"{metrica}_max"] = Max(metrica)
+        agregacoes[f"{metrica}_media"] = Avg(metrica)
+
+    grupos = (
+        TelemetriaRobo.objects.filter(registrado_em__gte=desde, registrado_em__lt=ate)
+        .annotate(balde=Trunc("registrado_em", "minute", tzinfo=dt_timezone.utc))
+        .order_by()
+        .values("robo_id", "balde")
+        .annotate(**agregacoes)
+    )
+    linhas = [
+        TelemetriaAgregada(robo_id=g.pop("robo_id"), resolucao="1m", inicio=g.pop("balde"), **g)
+        for g in grupos
+    ]
+    _gravar_agregados(linhas)
+    return len(linhas)
+
+
+def _rollup_hora(desde, ate):
+    """Agrega os baldes de 1 minuto de [desde, ate) em 1 hora (média ponderada pelas amostras)."""
+    # Os apelidos não podem repetir nomes de campos, senão F() passa a apontar para o agregado
+    agregacoes = {"total_amostras": Sum("amostras"), "total_obstaculos": Sum("obstaculos")}
+    for metrica in METRICAS:
+        com_valor = Q(**{f"{metrica}_media__isnull": False})
+        agregacoes[f"menor_{metrica}"] = Min(f"{metrica}_min")
+        agregacoes[f"maior_{metrica}"] = Max(f"{metrica}_max")
+        agregacoes[f"soma_{metrica}"] = Sum(F(f"{metrica}_media") * F("amostras"), filter=com_valor)
+        agregacoes[f"peso_{metrica}"] = Sum("amostras", filter=com_valor)
+
+    grupos = (
+        TelemetriaAgregada.objects.filter(resolucao="1m", inicio__gte=desde, inicio__lt=ate)
+        .annotate(balde=Trunc("inicio", "hour", tzinfo=dt_timezone.utc))
+        .order_by()
+        .values("robo_id", "balde")
+        .annotate(**agregacoes)
+    )
+    linhas = []
+    for g in grupos:
+        valores = {"amostras": g["total_amostras"], "obstaculos": g["total_obstaculos"]}
+        for metrica in METRICAS:
+            valores[f"{metrica}_min"] = g[f"menor_{metrica}"]
+            valores[f"{metrica}_max"] = g[f"maior_{metrica}"]
+            peso = g[f"peso_{metrica}"]
+            valores[f"{metrica}_media"] = g[f"soma_{metrica}"] / peso if peso else None
+        linhas.append(TelemetriaAgregada(robo_id=g["robo_id"], resolucao="1h", inicio=g["balde"], **valores))
+    _gravar_agregados(linhas)
+    return len(linhas)
+
+
+def _truncar(instante, passo):
+    instante = instante.astimezone(dt_timezone.utc)
+    if passo == timedelta(hours=1):
+        return instante.replace(minute=0, second=0, microsecond=0)
+    return instante.replace(second=0, microsecond=0)
+
+
+def _avancar(resolucao, limite, passo, calcular, inicio_padrao):
+    """
+    Processa [processado_ate, limite) em blocos de 6 horas. Cada bloco é
+    gravado junto com o progresso na sua própria transação: um backlog
+    longo não vira uma transação única e uma falha só perde o bloco atual.
+    """
+    bloco = timedelta(hours=6)
+    total = 0
+    while True:
+        with transaction.atomic():
+            progresso = ProgressoRollupTelemetria.objects.select_for_update().filter(resolucao=resolucao).first()
+            desde = progresso.processado_ate if progresso else inicio_padrao()
+            if desde is None:
+                return total
+            desde = _truncar(desde, passo)
+            if desde >= limite:
+                return total
+            ate = min(desde + bloco, limite)
+            total += calcular(desde, ate)
+            ProgressoRollupTelemetria.objects.update_or_create(resolucao=resolucao, defaults={"processado_ate": ate})
+
+
+def processar_rollups():
+    """Calcula os baldes fechados de 1 minuto e de 1 hora. Idempotente."""
+    atraso = timedelta(seconds=_config().get("ATRASO_ROLLUP_SEGUNDOS", 60))
+    limite_minuto = _truncar(timezone.now() - atraso, timedelta(minutes=1))
+
+    def primeiro_bruto():
+        return TelemetriaRobo.objects.aggregate(primeiro=Min("registrado_em"))["primeiro"]
+
+    minutos = _avancar("1m", limite_minuto, timedelta(minutes=1), _rollup_minuto, primeiro_bruto)
+
+    # A hora só fecha quando todos os seus minutos já foram agregados
+    progresso_minuto = ProgressoRollupTelemetria.objects.filter(resolucao="1m").first()
+    horas = 0
+    if progresso_minuto:
+        def primeiro_minuto():
+            return TelemetriaAgregada.objects.filter(resolucao="1m").aggregate(primeiro=Min("inicio"))["primeiro"]
+
+        limite_hora = _truncar(progresso_minuto.processado_ate, timedelta(hours=1))
+        horas = _avancar("1h", limite_hora, timedelta(hours=1), _rollup_hora, primeiro_minuto)
+    return {"1m": minutos, "1h": horas}
+
+
+def remover_rollups_antigos():
+    """Remove os baldes de 1 minuto além da retenção (os de 1 hora são mantidos)."""
+    limite = timezone.now() - timedelta(days=_config().get("RETENCAO_1M_DIAS", 30))
+    removidos, _ = TelemetriaAgregada.objects.filter(resolucao="1m", inicio__lt=limite).delete()
+    return removidos
+
+
+# --- Consulta ---
+def escolher_resolucao(inicio, fim):
+    """Bruto para períodos curtos, 1 minuto até alguns dias, 1 hora acima disso."""
+    periodo = fim - inicio
+    if periodo <= timedelta(hours=_config().get("LIMITE_BRUTO_HORAS", 2)):
+        return "bruto"
+    if periodo <= timedelta(days=_config().get("LIMITE_1M_DIAS", 2)):
+        return "1m"
+    return "1h"
+
+
+def serie_telemetria(robo_id, metrica, inicio, fim, resolucao=None):
+    if metrica not in METRICAS:
+        raise HttpError(400, f"metrica deve ser uma de: {', '.join(METRICAS)}")
+    if fim <= inicio:
+        raise HttpError(400, "O fim do período deve ser posterior ao início")
+    resolucao = resolucao or escolher_resolucao(inicio, fim)
+
+    if resolucao == "bruto":
+        pontos = [
+            {"instante": instante, "minimo": valor, "maximo": valor, "media": valor, "amostras": 1}
+            for instante, valor in TelemetriaRobo.objects.filter(
+                robo_id=robo_id, registrado_em__gte=inicio, registrado_em__lt=fim,
+                **{f"{metrica}__isnull": False},
+            ).order_by("registrado_em").values_list("registrado_em", metrica)
+        ]
+    elif resolucao in ("1m", "1h"):
+        pontos = [
+            {"instante": instante, "minimo": minimo, "maximo": maximo, "media": media, "amostras": amostras}
+            for instante, minimo, maximo, media, amostras in TelemetriaAgregada.objects.filter(
+                robo_id=robo_id, resolucao=resolucao, inicio__gte=inicio, inicio__lt=fim,
+                **{f"{metrica}_media__isnull": False},
+            ).order_by("inicio").values_list(
+                "inicio", f"{metrica}_min", f"{metrica}_max", f"{metrica}_media", "amostras"
+            )
+        ]
+    else:
+        raise HttpError(400, "resolucao deve ser bruto, 1m ou 1h")
+
+    return {"robo_id": robo_id, "metrica": metrica, "resolucao": resolucao, "pontos": pontos}
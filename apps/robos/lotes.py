@@ -0,0 +1,182 @@
+"""
+Lote assíncrono das mensagens de erro enviadas pelos robôs via WebSocket.
+
+O RoboConsumer só enfileira o LogErro em memória (sem trocar de thread por
+mensagem); uma tarefa no próprio event loop grava a fila com um bulk_create
+quando ela atinge TAMANHO_LOTE ou a cada INTERVALO_MS. O estado/sensores
+seguem pelo buffer de telemetria (apps.robos.telemetria), que já agrupa as
+escritas com bulk_update.
+
+Contrapressão:
+- um robô com MAXIMO_POR_ROBO mensagens ainda não gravadas tem as novas
+  recusadas (o consumer avisa o robô para reduzir o ritmo);
+- com MAXIMO_PENDENTES na fila, quem enfileira espera a gravação, o que
+  segura a leitura do socket em vez de crescer a memória.
+
+Mensagem e origem são normalizadas ao enfileirar (texto, sem NUL, origem
+truncada ao tamanho da coluna). Se o bulk_create ainda assim falhar, o lote
+é gravado linha a linha e as linhas inválidas são descartadas; só falhas de
+conexão devolvem o restante à fila.
+"""
+import asyncio
+import atexit
+import logging
+from collections import Counter
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, transaction
+from apps.logs_erro.models import LogErro
+
+logger = logging.getLogger(__name__)
+
+
+ORIGEM_PADRAO = "websocket"
+TAMANHO_ORIGEM = LogErro._meta.get_field("origem").max_length
+
+
+def _config():
+    return getattr(settings, "ROBOS_MENSAGENS", {})
+
+
+def _texto(valor):
+    """Valor enviado pelo robô como texto aceito pelo banco (None vira vazio; NUL é removido)."""
+    return ("" if valor is None else str(valor)).replace("\x00", "")
+
+
+def _gravar(lote, tamanho):
+    """
+    Grava o lote; se o bulk_create falhar por causa de alguma linha, grava
+    uma a uma e descarta as inválidas. Retorna (gravados, descartados).
+    Falhas de conexão sobem com `nao_gravados` para voltarem à fila.
+    """
+    try:
+        with transaction.atomic():
+            LogErro.objects.bulk_create(lote, batch_size=tamanho)
+        return len(lote), 0
+    except (OperationalError, InterfaceError) as erro:
+        erro.nao_gravados = lote
+        raise
+    except DatabaseError:
+        logger.warning("Lote de %s logs de erro recusado; gravando linha a linha", len(lote))
+
+    gravados = descartados = 0
+    for indice, log in enumerate(lote):
+        try:
+            with transaction.atomic():
+                log.save()
+            gravados += 1
+        except (OperationalError, InterfaceError) as erro:
+            erro.nao_gravados = lote[indice:]
+            raise
+        except DatabaseError as erro:
+            descartados += 1
+            logger.warning("Log de erro do robô %s descartado: %s", log.robo_id, erro)
+    return gravados, descartados
+
+
+class LoteLogsErro:
+    def __init__(self, tamanho=None, intervalo_ms=None, maximo_pendentes=None, maximo_por_robo=None):
+        self.tamanho = tamanho or _config().get("TAMANHO_LOTE", 500)
+        self.intervalo = (intervalo_ms or _config().get("INTERVALO_MS", 500)) / 1000
+        self.maximo_pendentes = maximo_pendentes or _config().get("MAXIMO_PENDENTES", 10000)
+        self.maximo_por_robo = maximo_por_robo or _config().get("MAXIMO_POR_ROBO", 200)
+        self._fila = []
+        self._por_robo = Counter()
+        self._loop = None
+        self._acordar = None
+        self._gravando = None
+        self._tarefa = None
+        self.recebidas = 0
+        self.gravadas = 0
+        self.recusadas = 0
+        self.descartadas = 0
+        self.gravacoes = 0
+
+    def _garantir_tarefa(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primitivas do asyncio pertencem a um loop; recria se o loop mudou
+            self._loop = loop
+            self._acordar = asyncio.Event()
+            self._gravando = asyncio.Lock()
+            self._tarefa = None
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = loop.create_task(self._rodar())
+
+    async def adicionar(self, robo_id, mensagem, origem=ORIGEM_PADRAO):
+        """Enfileira o log. Retorna False se o robô excedeu sua cota de pendentes."""
+        self._garantir_tarefa()
+        if self._por_robo[robo_id] >= self.maximo_por_robo:
+            self.recusadas += 1
+            return False
+        while len(self._fila) >= self.maximo_pendentes:
+            await self.descarregar()
+
+        self._fila.append(LogErro(
+            robo_id=robo_id,
+            mensagem=_texto(mensagem),
+            origem=_texto(origem)[:TAMANHO_ORIGEM] or ORIGEM_PADRAO,
+        ))
+        self._por_robo[robo_id] += 1
+        self.recebidas += 1
+        if len(self._fila) >= self.tamanho:
+            self._acordar.set()
+        return True
+
+    async def descarregar(self):
+        """Grava tudo o que está na fila. Retorna quantos logs foram gravados."""
+        self._garantir_tarefa()
+        async with self._gravando:
+            lote, self._fila = self._fila, []
+            self._por_robo = Counter()
+            if not lote:
+                return 0
+            try:
+                gravados, descartados = await database_sync_to_async(_gravar)(lote, self.tamanho)
+            except Exception as erro:
+                # Banco indisponível: devolve o que faltou (sem passar do limite) para o próximo ciclo
+                restantes = getattr(erro, "nao_gravados", lote)
+                devolvidos = restantes[: max(self.maximo_pendentes - len(self._fila), 0)]
+                self._fila = devolvidos + self._fila
+                self._por_robo.update(log.robo_id for log in devolvidos)
+                raise
+            self.gravadas += gravados
+            self.descartadas += descartados
+            self.gravacoes += 1
+            return gravados
+
+    async def _rodar(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._acordar.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+            try:
+                await self.descarregar()
+            except Exception:
+                logger.exception("Falha ao gravar os logs de erro dos robôs")
+
+    def estatisticas(self):
+        return {
+            "recebidas": self.recebidas,
+            "gravadas": self.gravadas,
+            "recusadas": self.recusadas,
+            "descartadas": self.descartadas,
+            "gravacoes": self.gravacoes,
+            "pendentes": len(self._fila),
+        }
+
+    def parar(self):
+        """Grava o restante de forma síncrona no encerramento do processo."""
+        lote, self._fila = self._fila, []
+        if not lote:
+            return
+        try:
+            _gravar(lote, self.tamanho)
+        except Exception:
+            logger.exception("Falha ao gravar %s logs de erro no encerramento", len(lote))
+
+
+logs_erro = LoteLogsErro()
+atexit.register(logs_erro.parar)
@@ -0,0 +1,78 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from apps.robos.protocolo import codificar, decodificar
+
+
+def mensagens_de_telemetria(quantidade, semente=42):
+    """Mistura típica: 80% status_update, 10% log_error, 10% metadados de imagem."""
+    aleatorio = random.Random(semente)
+    mensagens = []
+    for i in range(quantidade):
+        sorteio = aleatorio.random()
+        if sorteio < 0.8:
+            mensagens.append({
+                "type": "status_update",
+                "status": "ativo",
+                "sensores": {
+                    "temperatura": round(aleatorio.uniform(25, 45), 2),
+                    "bateria": round(aleatorio.uniform(10, 100), 1),
+                    "velocidade": round(aleatorio.uniform(0, 2), 3),
+                    "obstaculo_detectado": aleatorio.random() < 0.05,
+                },
+            })
+        elif sorteio < 0.9:
+            mensagens.append({
+                "type": "log_error",
+                "message": f"Falha no sensor {aleatorio.randint(1, 8)}: leitura fora da faixa",
+                "origin": "websocket",
+            })
+        else:
+            mensagens.append({
+                "codigo_lido": f"{aleatorio.randint(1, 20):02d}{aleatorio.randint(1, 50):03d}"
+                               f"{aleatorio.randint(1, 30):03d}{aleatorio.randint(1, 6)}{aleatorio.randint(1, 4)}",
+                "robo_id": aleatorio.randint(1, 50),
+                "sequencia": i,
+            })
+    return mensagens
+
+
+class Command(BaseCommand):
+    help = "Compara bytes trafegados e custo de codificação/decodificação entre JSON e MessagePack."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mensagens", type=int, default=50000)
+
+    def handle(self, *args, **options):
+        mensagens = mensagens_de_telemetria(options["mensagens"])
+        resultados = {}
+        for nome, binario in (("json", False), ("msgpack", True)):
+            inicio = time.perf_counter()
+            quadros = [codificar(mensagem, binario) for mensagem in mensagens]
+            codificacao = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for quadro in quadros:
+                if binario:
+                    decodificar(bytes_data=quadro)
+                else:
+                    decodificar(text_data=quadro)
+            decodificacao = time.perf_counter() - inicio
+
+            tamanho = sum(len(quadro.encode() if isinstance(quadro, str) else quadro) for quadro in quadros)
+            resultados[nome] = (tamanho, codificacao, decodificacao)
+
+        total = len(mensagens)
+        self.stdout.write(f"{total} mensagens")
+        self.stdout.write(f"{'formato':<10}{'bytes':>12}{'bytes/msg':>11}{'codif. µs/msg':>15}{'decodif. µs/msg':>17}")
+        for nome, (tamanho, codificacao, decodificacao) in resultados.items():
+            self.stdout.write(
+                f"{nome:<10}{tamanho:>12}{tamanho / total:>11.1f}"
+                f"{codificacao / total * 1e6:>15.2f}{decodificacao / total * 1e6:>17.2f}"
+            )
+        tamanho_json, _, decodificacao_json = resultados["json"]
+        tamanho_msgpack, _, decodificacao_msgpack = resultados["msgpack"]
+        self.stdout.write(self.style.SUCCESS(
+            f"msgpack: {100 * (1 - tamanho_msgpack / tamanho_json):.0f}% menos bytes, "
+            f"decodificação {decodificacao_json / decodificacao_msgpack:.1f}x mais rápida"
+        ))
@@ -0,0 +1,33 @@
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from apps.robos import historico
+
+
+class Command(BaseCommand):
+    help = (
+        "Manutenção do histórico de telemetria: cria as partições diárias à frente, "
+        "calcula os agregados de 1 minuto/1 hora e aplica a retenção."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Repete continuamente")
+        parser.add_argument("--intervalo", type=int, default=60, help="Segundos entre execuções com --loop")
+
+    def handle(self, *args, **options):
+        parar = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: parar.set())
+        while True:
+            self._executar()
+            if not options["loop"] or parar.wait(options["intervalo"]):
+                break
+
+    def _executar(self):
+        particoes = historico.garantir_particoes()
+        rollups = historico.processar_rollups()
+        removidas = historico.remover_particoes_antigas()
+        rollups_removidos = historico.remover_rollups_antigos()
+        self.stdout.write(
+            f"Partições criadas: {particoes}; agregados 1m: {rollups['1m']}, 1h: {rollups['1h']}; "
+            f"partições removidas: {len(removidas)}; agregados 1m removidos: {rollups_removidos}"
+        )
@@ -0,0 +1,23 @@
+import signal
+from django.core.management.base import BaseCommand
+from apps.robos.vivacidade import MonitorVivacidade
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa o detector de robôs sem comunicação: marca como 'inativo'/'erro' os robôs "
+        "que passaram da janela, notifica os agendamentos em andamento e avisa os painéis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--janela", type=int, help="Segundos sem contato até o robô ser marcado")
+
+    def handle(self, *args, **options):
+        monitor = MonitorVivacidade(janela=options["janela"])
+        signal.signal(signal.SIGTERM, lambda *_: monitor.parar())
+        self.stdout.write(self.style.SUCCESS("Monitor de vivacidade iniciado."))
+        try:
+            monitor.rodar()
+        except KeyboardInterrupt:
+            monitor.parar()
+        self.stdout.write("Monitor de vivacidade encerrado.")
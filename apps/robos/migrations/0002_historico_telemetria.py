@@ -0,0 +1,113 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CRIAR_TELEMETRIA_PARTICIONADA = """
+CREATE TABLE robos_telemetriarobo (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    robo_id bigint NOT NULL,
+    registrado_em timestamp with time zone NOT NULL,
+    temperatura double precision NULL,
+    bateria double precision NULL,
+    velocidade double precision NULL,
+    obstaculo_detectado boolean NULL,
+    PRIMARY KEY (id, registrado_em)
+) PARTITION BY RANGE (registrado_em);
+CREATE TABLE robos_telemetriarobo_padrao PARTITION OF robos_telemetriarobo DEFAULT;
+CREATE INDEX telemetria_robo_data_idx ON robos_telemetriarobo (robo_id, registrado_em);
+"""
+
+# Partições de hoje e dos próximos 3 dias (UTC); as seguintes são criadas por manter_telemetria
+CRIAR_PARTICOES_INICIAIS = """
+DO $$
+DECLARE
+    dia date;
+BEGIN
+    FOR dia IN SELECT generate_series(0, 3) + (now() AT TIME ZONE 'UTC')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF robos_telemetriarobo FOR VALUES FROM (%L) TO (%L)',
+            'robos_telemetriarobo_p' || to_char(dia, 'YYYYMMDD'),
+            dia::timestamp AT TIME ZONE 'UTC',
+            (dia + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressoRollupTelemetria',
+            fields=[
+                ('resolucao', models.CharField(max_length=2, primary_key=True, serialize=False)),
+                ('processado_ate', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Progresso do Rollup de Telemetria',
+                'verbose_name_plural': 'Progresso dos Rollups de Telemetria',
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetriaAgregada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolucao', models.CharField(choices=[('1m', '1 minuto'), ('1h', '1 hora')], max_length=2)),
+                ('inicio', models.DateTimeField()),
+                ('amostras', models.PositiveIntegerField(default=0)),
+                ('temperatura_min', models.FloatField(null=True)),
+                ('temperatura_max', models.FloatField(null=True)),
+                ('temperatura_media', models.FloatField(null=True)),
+                ('bateria_min', models.FloatField(null=True)),
+                ('bateria_max', models.FloatField(null=True)),
+                ('bateria_media', models.FloatField(null=True)),
+                ('velocidade_min', models.FloatField(null=True)),
+                ('velocidade_max', models.FloatField(null=True)),
+                ('velocidade_media', models.FloatField(null=True)),
+                ('obstaculos', models.PositiveIntegerField(default=0)),
+                ('robo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetria_agregada', to='robos.robo')),
+            ],
+            options={
+                'verbose_name': 'Telemetria Agregada',
+                'verbose_name_plural': 'Telemetria Agregada',
+                'constraints': [models.UniqueConstraint(fields=('robo', 'resolucao', 'inicio'), name='unique_telemetria_agregada')],
+            },
+        ),
+        # Tabela particionada por dia (PostgreSQL): a chave primária precisa
+        # incluir a coluna de partição, então o banco é criado à mão e o
+        # estado do Django continua vendo `id` como pk.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=CRIAR_TELEMETRIA_PARTICIONADA,
+                    reverse_sql="DROP TABLE IF EXISTS robos_telemetriarobo CASCADE;",
+                ),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='TelemetriaRobo',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('registrado_em', models.DateTimeField()),
+                        ('temperatura', models.FloatField(null=True)),
+                        ('bateria', models.FloatField(null=True)),
+                        ('velocidade', models.FloatField(null=True)),
+                        ('obstaculo_detectado', models.BooleanField(null=True)),
+                        ('robo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='robos.robo')),
+                    ],
+                    options={
+                        'verbose_name': 'Telemetria do Robô',
+                        'verbose_name_plural': 'Telemetria dos Robôs',
+                        'indexes': [models.Index(fields=['robo', 'registrado_em'], name='telemetria_robo_data_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunSQL(CRIAR_PARTICOES_INICIAIS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robos', '0002_historico_telemetria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comandorobo',
+            index=models.Index(condition=models.Q(('executado', False)), fields=['robo', 'data_criacao'], name='comando_pendente_idx'),
+        ),
+    ]
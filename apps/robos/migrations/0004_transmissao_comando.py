@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('armazens', '0001_initial'),
+        ('robos', '0003_indice_comandos_pendentes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransmissaoComando',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('desligar', 'Desligar'), ('reiniciar', 'Reiniciar'), ('pausar', 'Pausar Missão'), ('retomar', 'Retomar Missão'), ('emergencia', 'Parada de Emergência')], max_length=20)),
+                ('total_robos', models.PositiveIntegerField(default=0)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('armazem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transmissoes_comando', to='armazens.armazem')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transmissão de Comando',
+                'verbose_name_plural': 'Transmissões de Comando',
+                'ordering': ['-criada_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='comandorobo',
+            name='transmissao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comandos', to='robos.transmissaocomando'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robos', '0004_transmissao_comando'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comandorobo',
+            name='dados',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='comandorobo',
+            name='tipo',
+            field=models.CharField(choices=[('desligar', 'Desligar'), ('reiniciar', 'Reiniciar'), ('pausar', 'Pausar Missão'), ('retomar', 'Retomar Missão'), ('emergencia', 'Parada de Emergência'), ('iniciar_inventario', 'Iniciar Inventário'), ('finalizar_inventario', 'Finalizar Inventário')], max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='transmissaocomando',
+            name='tipo',
+            field=models.CharField(choices=[('desligar', 'Desligar'), ('reiniciar', 'Reiniciar'), ('pausar', 'Pausar Missão'), ('retomar', 'Retomar Missão'), ('emergencia', 'Parada de Emergência'), ('iniciar_inventario', 'Iniciar Inventário'), ('finalizar_inventario', 'Finalizar Inventário')], max_length=30),
+        ),
+    ]
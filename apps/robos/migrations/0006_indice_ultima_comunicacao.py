@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('armazens', '0001_initial'),
+        ('robos', '0005_comandos_agendador'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='robo',
+            index=models.Index(fields=['ultima_comunicacao'], name='robo_ultima_comunicacao_idx'),
+        ),
+    ]
@@ -25,6 +25,10 @@ class Robo(models.Model):
         verbose_name = 'Robô'
         verbose_name_plural = 'Robôs'
         ordering = ['identificador']
+        indexes = [
+            # Recarga incremental do monitor de vivacidade (robôs com contato recente)
+            models.Index(fields=['ultima_comunicacao'], name='robo_ultima_comunicacao_idx'),
+        ]
 
     def __str__(self):
         return f"{self.identificador} ({self.armazem.nome})"
@@ -36,20 +40,124 @@ class ComandoRobo(models.Model):
         ('reiniciar', 'Reiniciar'),
         ('pausar', 'Pausar Missão'),
         ('retomar', 'Retomar Missão'),
-        ('emergencia', 'Parada de Emergência')
+        ('emergencia', 'Parada de Emergência'),
+        # Enviados pelo agendador (apps.agendamentos.agendador)
+        ('iniciar_inventario', 'Iniciar Inventário'),
+        ('finalizar_inventario', 'Finalizar Inventário'),
     ]
 
     robo = models.ForeignKey(Robo, on_delete=models.CASCADE, related_name='comandos')
-    tipo = models.CharField(max_length=20, choices=TIPOS_COMANDO)
+    tipo = models.CharField(max_length=30, choices=TIPOS_COMANDO)
     usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
+    dados = models.JSONField(default=dict, blank=True)  # parâmetros enviados junto com o comando
     executado = models.BooleanField(default=False)
     data_criacao = models.DateTimeField(auto_now_add=True)
     data_execucao = models.DateTimeField(null=True, blank=True)
+    # Preenchido quando o comando faz parte de um envio para o armazém inteiro
+    transmissao = models.ForeignKey(
+        'TransmissaoComando', on_delete=models.SET_NULL, null=True, blank=True, related_name='comandos'
+    )
 
     class Meta:
         verbose_name = 'Comando para Robô'
         verbose_name_plural = 'Comandos para Robôs'
         ordering = ['-data_criacao']
+        indexes = [
+            # Só os pendentes: é o que comandos_pendentes consulta (reenvio na conexão do WS e GET /comandos)
+            models.Index(
+                fields=['robo', 'data_criacao'],
+                condition=models.Q(executado=False),
+                name='comando_pendente_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"Comando {self.get_tipo_display()} para {self.robo.identificador}"
\ No newline at end of file
+        return f"Comando {self.get_tipo_display()} para {self.robo.identificador}"
+
+
+class TransmissaoComando(models.Model):
+    """Um comando enviado a todos os robôs habilitados de um armazém (um ComandoRobo por robô)."""
+    armazem = models.ForeignKey(Armazem, on_delete=models.CASCADE, related_name='transmissoes_comando')
+    tipo = models.CharField(max_length=30, choices=ComandoRobo.TIPOS_COMANDO)
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
+    total_robos = models.PositiveIntegerField(default=0)
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Transmissão de Comando'
+        verbose_name_plural = 'Transmissões de Comando'
+        ordering = ['-criada_em']
+
+    def __str__(self):
+        return f"Transmissão {self.get_tipo_display()} para {self.armazem.nome}"
+
+
+class TelemetriaRobo(models.Model):
+    """
+    Histórico bruto da telemetria (append-only). No PostgreSQL a tabela é
+    particionada por dia em registrado_em (ver migração 0002 e
+    apps.robos.historico), com chave primária (id, registrado_em).
+    """
+    id = models.BigAutoField(primary_key=True)
+    robo = models.ForeignKey(Robo, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    registrado_em = models.DateTimeField()
+    temperatura = models.FloatField(null=True)
+    bateria = models.FloatField(null=True)
+    velocidade = models.FloatField(null=True)
+    obstaculo_detectado = models.BooleanField(null=True)
+
+    class Meta:
+        verbose_name = 'Telemetria do Robô'
+        verbose_name_plural = 'Telemetria dos Robôs'
+        indexes = [
+            models.Index(fields=['robo', 'registrado_em'], name='telemetria_robo_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"Telemetria {self.robo_id} @ {self.registrado_em:%Y-%m-%d %H:%M:%S}"
+
+
+class TelemetriaAgregada(models.Model):
+    """Rollups de 1 minuto e 1 hora (mín/máx/média) da telemetria, por robô."""
+    RESOLUCOES = [
+        ('1m', '1 minuto'),
+        ('1h', '1 hora'),
+    ]
+
+    robo = models.ForeignKey(Robo, on_delete=models.CASCADE, related_name='telemetria_agregada')
+    resolucao = models.CharField(max_length=2, choices=RESOLUCOES)
+    inicio = models.DateTimeField()
+    amostras = models.PositiveIntegerField(default=0)
+    temperatura_min = models.FloatField(null=True)
+    temperatura_max = models.FloatField(null=True)
+    temperatura_media = models.FloatField(null=True)
+    bateria_min = models.FloatField(null=True)
+    bateria_max = models.FloatField(null=True)
+    bateria_media = models.FloatField(null=True)
+    velocidade_min = models.FloatField(null=True)
+    velocidade_max = models.FloatField(null=True)
+    velocidade_media = models.FloatField(null=True)
+    obstaculos = models.PositiveIntegerField(default=0)  # amostras com obstáculo detectado
+
+    class Meta:
+        verbose_name = 'Telemetria Agregada'
+        verbose_name_plural = 'Telemetria Agregada'
+        constraints = [
+            models.UniqueConstraint(fields=['robo', 'resolucao', 'inicio'], name='unique_telemetria_agregada'),
+        ]
+
+    def __str__(self):
+        return f"Telemetria {self.resolucao} {self.robo_id} @ {self.inicio:%Y-%m-%d %H:%M}"
+
+
+class ProgressoRollupTelemetria(models.Model):
+    """Até onde cada resolução de rollup já foi calculada."""
+    resolucao = models.CharField(max_length=2, primary_key=True)
+    processado_ate = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Progresso do Rollup de Telemetria'
+        verbose_name_plural = 'Progresso dos Rollups de Telemetria'
+
+    def __str__(self):
+        return f"Rollup {self.resolucao} até {self.processado_ate}"
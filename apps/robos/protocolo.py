@@ -0,0 +1,115 @@
+"""
+Enquadramento das mensagens WebSocket dos robôs: JSON (texto) ou
+MessagePack (binário).
+
+Negociação:
+- subprotocolo: o cliente oferece "sia.msgpack" e/ou "sia.json" no
+  handshake; o servidor aceita o primeiro que conhece, preferindo msgpack;
+- primeiro quadro: sem subprotocolo, um quadro binário coloca a conexão em
+  msgpack (as respostas passam a ser binárias); quadros de texto mantêm JSON.
+
+Os dois formatos carregam o mesmo dicionário, então os handlers dos
+consumers não mudam com o formato.
+"""
+import json
+import math
+from datetime import date, datetime
+import msgpack
+
+SUBPROTOCOLO_MSGPACK = "sia.msgpack"
+SUBPROTOCOLO_JSON = "sia.json"
+SUBPROTOCOLOS = (SUBPROTOCOLO_MSGPACK, SUBPROTOCOLO_JSON)
+
+
+class ErroProtocolo(ValueError):
+    pass
+
+
+def _padrao(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def codificar(dados, binario):
+    if binario:
+        return msgpack.packb(dados, default=_padrao, use_bin_type=True)
+    return json.dumps(dados, default=_padrao)
+
+
+def _rejeitar_ext(codigo, dados):
+    raise ErroProtocolo("MessagePack ext types are not accepted")
+
+
+def _compativel_com_json(valor):
+    """
+    Só tipos que o JSONField grava: msgpack admite bin/ext e floats não
+    finitos, que fariam o bulk_update da telemetria falhar para o lote todo.
+    """
+    if valor is None or isinstance(valor, (str, bool, int)):
+        return True
+    if isinstance(valor, float):
+        return math.isfinite(valor)
+    if isinstance(valor, list):
+        return all(_compativel_com_json(item) for item in valor)
+    if isinstance(valor, dict):
+        return all(isinstance(chave, str) and _compativel_com_json(item) for chave, item in valor.items())
+    return False
+
+
+def decodificar(text_data=None, bytes_data=None):
+    """Dicionário da mensagem recebida (texto = JSON, binário = msgpack)."""
+    try:
+        if bytes_data is not None:
+            dados = msgpack.unpackb(bytes_data, raw=False, ext_hook=_rejeitar_ext)
+        else:
+            dados = json.loads(text_data)
+    except ErroProtocolo:
+        raise
+    except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as erro:
+        raise ErroProtocolo("Invalid message format") from erro
+    if not isinstance(dados, dict):
+        raise ErroProtocolo("Message must be an object")
+    if not _compativel_com_json(dados):
+        raise ErroProtocolo("Message contains values that are not JSON-compatible")
+    return dados
+
+
+def escolher_subprotocolo(oferecidos):
+    """Subprotocolo a aceitar entre os oferecidos pelo cliente (None se nenhum conhecido)."""
+    for subprotocolo in SUBPROTOCOLOS:
+        if subprotocolo in (oferecidos or ()):
+            return subprotocolo
+    return None
+
+
+class ProtocoloMixin:
+    """
+    Para AsyncWebsocketConsumer: chame `await self.aceitar()` no lugar de
+    `accept()`, implemente `receber(dados)` e responda com `enviar(dados)`.
+    """
+    binario = False
+
+    async def aceitar(self):
+        subprotocolo = escolher_subprotocolo(self.scope.get("subprotocols"))
+        self.binario = subprotocolo == SUBPROTOCOLO_MSGPACK
+        await self.accept(subprotocol=subprotocolo)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if bytes_data is not None:
+            self.binario = True
+        try:
+            dados = decodificar(text_data, bytes_data)
+        except ErroProtocolo as erro:
+            await self.enviar({"error": str(erro)})
+            return
+        await self.receber(dados)
+
+    async def receber(self, dados):
+        raise NotImplementedError
+
+    async def enviar(self, dados):
+        if self.binario:
+            await self.send(bytes_data=codificar(dados, True))
+        else:
+            await self.send(text_data=codificar(dados, False))
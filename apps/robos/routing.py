@@ -2,5 +2,6 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    re_path(r'ws/robos/frota/$', consumers.FrotaConsumer.as_asgi()),
     re_path(r'ws/robos/(?P<robo_id>\w+)/$', consumers.RoboConsumer.as_asgi()),
 ]
\ No newline at end of file
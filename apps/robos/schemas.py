@@ -1,6 +1,6 @@
 from ninja import Schema
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from enum import Enum
 
 
@@ -54,7 +54,8 @@ class ComandoIn(Schema):
 class ComandoOut(Schema):
     id: int
     robo_id: int
-    tipo: TipoComando
+    tipo: str  # TipoComando ou um comando do agendador (iniciar_inventario/finalizar_inventario)
+    dados: Dict[str, Any] = {}
     executado: bool
     data_criacao: datetime
 
@@ -62,8 +63,59 @@ class ComandoOut(Schema):
         orm_mode = True
 
 
+class TransmissaoOut(Schema):
+    id: int
+    armazem_id: int
+    tipo: TipoComando
+    criada_em: datetime
+    total_robos: int
+    confirmados: int
+    pendentes: int
+    robos_pendentes: List[int]
+    concluida_em: Optional[datetime] = None
+
+
+class AckComandosIn(Schema):
+    comandos: List[int]
+
+
+class AckComandosOut(Schema):
+    confirmados: int
+
+
 class SensorData(Schema):
     temperatura: Optional[float] = None
     bateria: Optional[float] = None
     velocidade: Optional[float] = None
-    obstaculo_detectado: Optional[bool] = None
\ No newline at end of file
+    obstaculo_detectado: Optional[bool] = None
+
+class PontoTelemetria(Schema):
+    instante: datetime
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    media: Optional[float] = None
+    amostras: int
+
+
+class SerieTelemetriaOut(Schema):
+    robo_id: int
+    metrica: str
+    resolucao: str
+    pontos: List[PontoTelemetria]
+
+
+class EstadoRobo(Schema):
+    robo_id: int
+    identificador: Optional[str] = None
+    armazem_id: Optional[int] = None
+    status: Optional[str] = None
+    bateria: Optional[float] = None
+    ultima_comunicacao: Optional[datetime] = None
+    conectado: bool = False
+    no: Optional[str] = None
+
+
+class EstadoFrotaOut(Schema):
+    versao: int
+    robos: List[EstadoRobo]
+    removidos: List[int] = []
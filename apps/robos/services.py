@@ -1,5 +1,24 @@
+"""
+Entrega de comandos aos robôs.
+
+Os comandos são empurrados pelo grupo `robo_{id}` do channel layer assim
+que a transação que os criou é confirmada, e o RoboConsumer os repassa pelo
+WebSocket (os pendentes são reenviados a cada conexão). Só o WebSocket tem
+entrega imediata: GET /comandos é uma consulta simples dos pendentes, sem
+long-poll, porque segurar uma requisição bloquearia o worker WSGI e o
+channel layer em memória não acorda esperas em outros processos. O robô
+confirma a execução com um ack em lote, aplicado com um único UPDATE.
+
+Comandos para o armazém inteiro (TransmissaoComando) criam todas as linhas
+com um bulk_create e saem em um único group_send para `armazem_{id}`, grupo
+em que cada RoboConsumer entra ao conectar.
+"""
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from .models import ComandoRobo, Robo, TransmissaoComando
 
 
 def send_command_to_robo(robo_id, command, data=None):
@@ -14,4 +33,96 @@ def send_command_to_robo(robo_id, command, data=None):
                 **(data or {})
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+def send_command_to_armazem(armazem_id, command, comandos, data=None):
+    """
+    Um único group_send para todos os robôs conectados do armazém; cada
+    consumer retira do mapa `comandos` (robo_id -> comando_id) o seu id.
+    """
+    channel_layer = get_channel_layer()
+
+    async_to_sync(channel_layer.group_send)(
+        f"armazem_{armazem_id}",
+        {
+            'type': 'send_broadcast',
+            'command': command,
+            'comandos': {str(robo_id): comando_id for robo_id, comando_id in comandos.items()},
+            'data': data or {},
+        }
+    )
+
+
+def dados_do_comando(comando):
+    dados = {**comando.dados, "comando_id": comando.id, "data_criacao": comando.data_criacao.isoformat()}
+    if comando.transmissao_id:
+        dados["transmissao_id"] = comando.transmissao_id
+    return dados
+
+
+def publicar_comando(comando):
+    """Empurra o comando ao robô depois do commit (nunca antes de ele existir no banco)."""
+    transaction.on_commit(
+        lambda: send_command_to_robo(comando.robo_id, comando.tipo, dados_do_comando(comando))
+    )
+
+
+def transmitir_comando(armazem_id, tipo, usuario):
+    """Cria a transmissão e um ComandoRobo por robô habilitado do armazém, e publica após o commit."""
+    with transaction.atomic():
+        robo_ids = list(
+            Robo.objects.filter(armazem_id=armazem_id, habilitado=True).values_list("id", flat=True)
+        )
+        transmissao = TransmissaoComando.objects.create(
+            armazem_id=armazem_id, tipo=tipo, usuario=usuario, total_robos=len(robo_ids)
+        )
+        comandos = ComandoRobo.objects.bulk_create([
+            ComandoRobo(robo_id=robo_id, tipo=tipo, usuario=usuario, transmissao=transmissao)
+            for robo_id in robo_ids
+        ], batch_size=500)
+        # Sem RETURNING (ex.: SQLite antigo) os ids não voltam do bulk_create
+        if comandos and comandos[0].pk is None:
+            comandos = list(ComandoRobo.objects.filter(transmissao=transmissao))
+
+        mapa = {comando.robo_id: comando.id for comando in comandos}
+        dados = {"transmissao_id": transmissao.id, "data_criacao": transmissao.criada_em.isoformat()}
+        transaction.on_commit(lambda: send_command_to_armazem(armazem_id, tipo, mapa, dados))
+    return transmissao
+
+
+def status_transmissao(transmissao):
+    """Confirmações dos robôs agregadas (uma contagem e, se faltar alguém, a lista dos pendentes)."""
+    resumo = transmissao.comandos.aggregate(
+        total=Count("id"),
+        confirmados=Count("id", filter=Q(executado=True)),
+        ultima_confirmacao=Max("data_execucao"),
+    )
+    pendentes = resumo["total"] - resumo["confirmados"]
+    return {
+        "id": transmissao.id,
+        "armazem_id": transmissao.armazem_id,
+        "tipo": transmissao.tipo,
+        "criada_em": transmissao.criada_em,
+        "total_robos": resumo["total"],
+        "confirmados": resumo["confirmados"],
+        "pendentes": pendentes,
+        "robos_pendentes": list(
+            transmissao.comandos.filter(executado=False).order_by("robo_id").values_list("robo_id", flat=True)
+        ) if pendentes else [],
+        "concluida_em": resumo["ultima_confirmacao"] if resumo["total"] and not pendentes else None,
+    }
+
+
+def comandos_pendentes(robo_id):
+    """Comandos ainda não confirmados, do mais antigo ao mais novo (índice comando_pendente_idx)."""
+    return ComandoRobo.objects.filter(robo_id=robo_id, executado=False).order_by("data_criacao")
+
+
+def confirmar_comandos(robo_id, comando_ids):
+    """Marca como executados, em um único UPDATE, os comandos confirmados pelo robô."""
+    if not comando_ids:
+        return 0
+    return ComandoRobo.objects.filter(
+        robo_id=robo_id, id__in=list(comando_ids), executado=False
+    ).update(executado=True, data_execucao=timezone.now())
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .frota import registro
+from .models import Robo
+
+
+# --- Registro da frota em memória ---
+@receiver(post_save, sender=Robo)
+def atualizar_registro_frota(sender, instance, **kwargs):
+    registro.registrar_robo(instance)
+
+
+@receiver(post_delete, sender=Robo)
+def remover_do_registro_frota(sender, instance, **kwargs):
+    registro.remover(instance.id)
@@ -0,0 +1,182 @@
+"""
+Buffer write-behind da telemetria dos robôs.
+
+Cada relatório (HTTP ou WebSocket) só atualiza o último estado do robô em
+memória; uma thread grava os robôs alterados a cada INTERVALO_MS com um
+único bulk_update. Vários relatórios do mesmo robô no intervalo viram uma
+escrita. Transições que mudam o estado do robô (status diferente, 'erro' ou
+bateria abaixo de BATERIA_CRITICA) acordam a thread para gravar na hora.
+
+Com HISTORICO ligado, cada relatório com sensores também vira uma amostra
+da série temporal (apps.robos.historico), gravada no mesmo ciclo com um
+bulk_create.
+"""
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .frota import bateria_dos_sensores, registro as frota
+from .historico import amostra_dos_sensores
+from .models import Robo, TelemetriaRobo
+from .vivacidade import registrar_batimento
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return getattr(settings, "ROBOS_TELEMETRIA", {})
+
+
+class BufferTelemetria:
+    def __init__(self, intervalo_ms=None, bateria_critica=None):
+        self.intervalo = (intervalo_ms or _config().get("INTERVALO_MS", 1000)) / 1000
+        self.bateria_critica = bateria_critica if bateria_critica is not None else _config().get("BATERIA_CRITICA", 15)
+        self._pendentes = {}  # robo_id -> {"status", "sensores", "ultima_comunicacao"}
+        self._status_conhecido = {}  # último status gravado/recebido por robô
+        self._ultimos = {}  # último estado completo recebido (gravado ou não)
+        self.historico = _config().get("HISTORICO", True)
+        self._amostras = []  # TelemetriaRobo ainda não gravadas
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self.mensagens = 0
+        self.linhas_gravadas = 0
+        self.gravacoes = 0
+        self.amostras_gravadas = 0
+
+    def registrar(self, robo_id, status=None, sensores=None, quando=None):
+        """
+        Guarda o último estado do robô (não acessa o banco; seguro em código async).
+        Retorna True se a mudança foi considerada urgente.
+        """
+        quando = quando or timezone.now()
+        with self._lock:
+            pendente = self._pendentes.setdefault(robo_id, {})
+            pendente["ultima_comunicacao"] = quando
+            if sensores is not None:
+                pendente["sensores"] = sensores
+            anterior = self._status_conhecido.get(robo_id)
+            if status is not None:
+                pendente["status"] = status
+                self._status_conhecido[robo_id] = status
+            self._ultimos[robo_id] = {**self._ultimos.get(robo_id, {}), **pendente}
+            if self.historico and sensores:
+                self._amostras.append(amostra_dos_sensores(robo_id, sensores, quando))
+            self.mensagens += 1
+
+        bateria = bateria_dos_sensores(sensores)
+        frota.atualizar(robo_id, status=status, bateria=bateria, ultima_comunicacao=quando)
+        registrar_batimento(robo_id, quando)
+        urgente = (
+            (status is not None and status != anterior)
+            or status == "erro"
+            or (bateria is not None and bateria < self.bateria_critica)
+        )
+        self._garantir_thread()
+        if urgente:
+            self._acordar.set()
+        return urgente
+
+    def ultimo_estado(self, robo_id):
+        """Último estado recebido do robô neste processo (pode ainda não estar no banco)."""
+        with self._lock:
+            ultimo = self._ultimos.get(robo_id)
+            return dict(ultimo) if ultimo else None
+
+    def descarregar(self):
+        """Grava os robôs pendentes. Retorna quantos foram gravados."""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, {}
+            amostras, self._amostras = self._amostras, []
+        if amostras:
+            self._gravar_amostras(amostras)
+        if not pendentes:
+            return 0
+
+        # bulk_update não aplica auto_now: ultima_comunicacao vai explícita.
+        # Agrupa pelos campos presentes para não sobrescrever o que não foi enviado.
+        grupos = {}
+        for robo_id, estado in pendentes.items():
+            campos = tuple(sorted(estado))
+            grupos.setdefault(campos, []).append(Robo(id=robo_id, **estado))
+        try:
+            for campos, robos in grupos.items():
+                Robo.objects.bulk_update(robos, campos, batch_size=500)
+        except Exception:
+            # Devolve ao buffer o que ainda não foi substituído por dados mais novos
+            with self._lock:
+                for robo_id, estado in pendentes.items():
+                    self._pendentes[robo_id] = {**estado, **self._pendentes.get(robo_id, {})}
+            raise
+        self.linhas_gravadas += len(pendentes)
+        self.gravacoes += 1
+        return len(pendentes)
+
+    def _gravar_amostras(self, amostras):
+        try:
+            TelemetriaRobo.objects.bulk_create(amostras, batch_size=1000)
+        except Exception:
+            # Histórico é melhor-esforço: não bloqueia a gravação do estado atual
+            logger.exception("Falha ao gravar %s amostras de telemetria", len(amostras))
+            return
+        self.amostras_gravadas += len(amostras)
+
+    def estatisticas(self):
+        with self._lock:
+            pendentes = len(self._pendentes)
+        return {
+            "mensagens": self.mensagens,
+            "gravacoes": self.gravacoes,
+            "linhas_gravadas": self.linhas_gravadas,
+            "pendentes": pendentes,
+            "amostras_gravadas": self.amostras_gravadas,
+            "intervalo_ms": int(self.intervalo * 1000),
+        }
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception("Falha ao gravar a telemetria dos robôs")
+            finally:
+                close_old_connections()
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._rodar, name="telemetria-robos", daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+        try:
+            self.descarregar()
+        except Exception:
+            logger.exception("Falha ao gravar a telemetria dos robôs no encerramento")
+
+
+# identificador -> id (identificador é único e não muda na prática); evita um SELECT por relatório
+_ids_por_identificador = {}
+
+
+def resolver_robo_id(identificador):
+    """Id do robô pelo identificador, ou None se não existir."""
+    robo_id = _ids_por_identificador.get(identificador)
+    if robo_id is None:
+        robo_id = Robo.objects.filter(identificador=identificador).values_list("id", flat=True).first()
+        if robo_id is not None:
+            _ids_por_identificador[identificador] = robo_id
+    return robo_id
+
+
+buffer = BufferTelemetria()
+atexit.register(buffer.parar)
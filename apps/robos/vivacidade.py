@@ -0,0 +1,250 @@
+"""
+Detector de robôs que pararam de se comunicar.
+
+Cada robô monitorado tem um prazo (último contato + JANELA_SEGUNDOS). Os
+prazos ficam em um heap com no máximo uma entrada por robô: um batimento só
+atualiza o prazo vigente no dicionário (O(1)); quando a entrada do heap
+vence e o prazo vigente é posterior, ela é reempilhada (O(log n)). Não há
+varredura da tabela de robôs: além de confirmar os vencidos, o banco é lido
+na carga inicial e, a cada RECARGA_SEGUNDOS, só para os robôs com contato
+desde a última leitura (índice em ultima_comunicacao), o que arma robôs que
+voltaram a operar e os atendidos por outros processos.
+
+Robôs vencidos viram 'erro' se têm agendamento em andamento e 'inativo' caso
+contrário, com um UPDATE por status. Antes disso o último contato gravado no
+banco é conferido: se outro processo recebeu o robô, o prazo é rearmado a
+partir dele (por isso o monitor também funciona em um processo dedicado,
+manage.py monitorar_robos, que não recebe batimentos). Os agendamentos em
+andamento recebem uma NotificacaoAgendamento e os painéis (FrotaConsumer)
+são avisados pelo grupo 'frota_alertas'.
+"""
+import heapq
+import logging
+import threading
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .frota import registro as frota
+from .models import Robo
+
+logger = logging.getLogger(__name__)
+
+GRUPO_ALERTAS = "frota_alertas"
+STATUS_IGNORADOS = ("inativo", "manutencao", "erro")
+
+
+def _config():
+    return getattr(settings, "ROBOS_VIVACIDADE", {})
+
+
+class MonitorVivacidade:
+    def __init__(self, janela=None):
+        self.janela = timedelta(seconds=janela or _config().get("JANELA_SEGUNDOS", 60))
+        self._heap = []  # (prazo, robo_id); no máximo uma entrada por robô
+        self._prazos = {}  # robo_id -> prazo vigente
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._thread = None
+        self.recarga = timedelta(seconds=_config().get("RECARGA_SEGUNDOS", 30))
+        self._recarregado_em = None
+        self._proxima_recarga = None
+        self.detectados = 0
+
+    # --- Batimentos ---
+    def _armar(self, robo_id, ultimo_contato):
+        prazo = ultimo_contato + self.janela
+        atual = self._prazos.get(robo_id)
+        if atual is not None and atual >= prazo:
+            return
+        self._prazos[robo_id] = prazo
+        if atual is None:
+            heapq.heappush(self._heap, (prazo, robo_id))
+            self._condicao.notify()
+
+    def batimento(self, robo_id, quando=None):
+        """Registra contato do robô (não acessa o banco; seguro em código async)."""
+        with self._condicao:
+            self._armar(robo_id, quando or timezone.now())
+
+    def carregar(self):
+        """
+        Arma os prazos dos robôs em atividade segundo o banco: todos na
+        partida; depois, só os com contato desde a leitura anterior (com
+        folga de uma recarga para gravações atrasadas do buffer de telemetria).
+        """
+        agora = timezone.now()
+        robos = Robo.objects.filter(habilitado=True).exclude(status__in=STATUS_IGNORADOS)
+        if self._recarregado_em is not None:
+            robos = robos.filter(ultima_comunicacao__gte=self._recarregado_em - self.recarga)
+        robos = robos.values_list("id", "ultima_comunicacao")
+        with self._condicao:
+            for robo_id, ultima_comunicacao in robos:
+                self._armar(robo_id, ultima_comunicacao)
+            self._recarregado_em = agora
+            self._proxima_recarga = agora + self.recarga
+
+    # --- Verificação ---
+    def _vencidos(self, agora):
+        vencidos = []
+        while self._heap and self._heap[0][0] <= agora:
+            prazo, robo_id = heapq.heappop(self._heap)
+            vigente = self._prazos.get(robo_id)
+            if vigente is None:
+                continue
+            if vigente > prazo:
+                heapq.heappush(self._heap, (vigente, robo_id))  # houve batimento depois
+                continue
+            del self._prazos[robo_id]
+            vencidos.append(robo_id)
+        return vencidos
+
+    def verificar(self):
+        """Trata os robôs cujo prazo venceu. Retorna os ids marcados."""
+        agora = timezone.now()
+        with self._condicao:
+            vencidos = self._vencidos(agora)
+        if not vencidos:
+            return []
+        return self._marcar(vencidos, agora)
+
+    def _marcar(self, robo_ids, agora):
+        from apps.agendamentos.models import Agendamento, NotificacaoAgendamento
+
+        limite = agora - self.janela
+        with transaction.atomic():
+            monitorados = (
+                Robo.objects.filter(id__in=robo_ids, habilitado=True).exclude(status__in=STATUS_IGNORADOS)
+            )
+            linhas = list(
+                monitorados.select_for_update(skip_locked=True)
+                .values_list("id", "identificador", "armazem_id", "ultima_comunicacao")
+            )
+            # Linhas travadas por outra transação ficam para uma nova tentativa em breve
+            travados = set(monitorados.values_list("id", flat=True)) - {linha[0] for linha in linhas}
+            retentativa = agora - self.janela + timedelta(seconds=_config().get("RETENTATIVA_SEGUNDOS", 5))
+            # Contato recente no banco (recebido por outro processo): rearma pelo banco
+            recentes = [(robo_id, ultima) for robo_id, _, _, ultima in linhas if ultima > limite]
+            recentes += [(robo_id, retentativa) for robo_id in travados]
+            parados = [linha for linha in linhas if linha[3] <= limite]
+            if not parados:
+                self._rearmar(recentes)
+                return []
+
+            parados_ids = [linha[0] for linha in parados]
+            agendamentos = list(
+                Agendamento.objects.filter(robo_id__in=parados_ids, status="em_andamento")
+                .values_list("id", "robo_id")
+            )
+            em_missao = {robo_id for _, robo_id in agendamentos}
+            novos_status = {robo_id: "erro" if robo_id in em_missao else "inativo" for robo_id in parados_ids}
+            for status in ("erro", "inativo"):
+                ids = [robo_id for robo_id, novo in novos_status.items() if novo == status]
+                if ids:
+                    Robo.objects.filter(id__in=ids).update(status=status)
+
+            por_robo = {robo_id: (identificador, ultima) for robo_id, identificador, _, ultima in parados}
+            NotificacaoAgendamento.objects.bulk_create([
+                NotificacaoAgendamento(
+                    agendamento_id=agendamento_id,
+                    tipo="alerta",
+                    mensagem=(
+                        f"Robô {por_robo[robo_id][0]} sem comunicação desde "
+                        f"{timezone.localtime(por_robo[robo_id][1]):%d/%m/%Y %H:%M:%S}"
+                    ),
+                )
+                for agendamento_id, robo_id in agendamentos
+            ])
+
+        self._rearmar(recentes)
+        self.detectados += len(parados)
+        alertas = [
+            {
+                "robo_id": robo_id,
+                "identificador": identificador,
+                "armazem_id": armazem_id,
+                "status": novos_status[robo_id],
+                "ultima_comunicacao": ultima.isoformat(),
+            }
+            for robo_id, identificador, armazem_id, ultima in parados
+        ]
+        transaction.on_commit(lambda: self._avisar(alertas))
+        return parados_ids
+
+    def _rearmar(self, recentes):
+        with self._condicao:
+            for robo_id, ultima_comunicacao in recentes:
+                self._armar(robo_id, ultima_comunicacao)
+
+    def _avisar(self, alertas):
+        for alerta in alertas:
+            frota.atualizar(alerta["robo_id"], status=alerta["status"])
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                GRUPO_ALERTAS, {"type": "alerta_vivacidade", "robos": alertas}
+            )
+        except Exception:
+            logger.exception("Falha ao avisar os painéis sobre robôs sem comunicação")
+        logger.warning("Robôs sem comunicação: %s", ", ".join(a["identificador"] for a in alertas))
+
+    # --- Execução ---
+    def _espera(self):
+        """Segundos até o próximo prazo ou recarga."""
+        agora = timezone.now()
+        proximos = [self._proxima_recarga or agora]
+        if self._heap:
+            proximos.append(self._heap[0][0])
+        return max(0.0, (min(proximos) - agora).total_seconds())
+
+    def rodar(self):
+        """Laço principal (bloqueia até parar())."""
+        while not self._parar.is_set():
+            try:
+                if self._proxima_recarga is None or timezone.now() >= self._proxima_recarga:
+                    self.carregar()
+                self.verificar()
+            except Exception:
+                logger.exception("Falha no monitor de vivacidade dos robôs")
+                self._parar.wait(1)
+            finally:
+                close_old_connections()
+
+            with self._condicao:
+                if not self._parar.is_set():
+                    self._condicao.wait(timeout=self._espera())
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self.rodar, name="vivacidade-robos", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def parar(self):
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify()
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def estatisticas(self):
+        with self._condicao:
+            monitorados = len(self._prazos)
+        return {"monitorados": monitorados, "detectados": self.detectados, "janela_segundos": int(self.janela.total_seconds())}
+
+
+monitor = MonitorVivacidade()
+
+
+def registrar_batimento(robo_id, quando=None):
+    """
+    Repassa o contato ao monitor. Ele é iniciado em RobosConfig.ready() nos
+    processos do servidor (ou pelo comando monitorar_robos); sem ele
+    rodando, o batimento só atualiza o prazo em memória.
+    """
+    if _config().get("ATIVO", True):
+        monitor.batimento(robo_id, quando)
@@ -3,6 +3,7 @@ from django.shortcuts import get_object_or_404
 from typing import List
 from ninja.errors import HttpError
 from . import schemas, models
+from apps.armazens.enderecos import q_prefixo
 from apps.usuarios.authentication import JWTAuth
 
 router = Router()
@@ -12,12 +13,19 @@ robo_router = Router()
 
 # --- Rotas Autenticadas ---
 @auth_router.get("/lista-trajetorias", response=List[schemas.TrajetoriaOut])
-def listar_trajetorias(request, agendamento_id: int = None):
+def listar_trajetorias(request, agendamento_id: int = None, endereco: str = None):
     queryset = models.Trajetoria.objects.all()
 
     if agendamento_id:
         queryset = queryset.filter(agendamento_id=agendamento_id)
 
+    if endereco:
+        # Prefixo cidade[:bairro[:rua...]] resolvido como faixa de chave_endereco
+        filtro = q_prefixo(endereco)
+        if filtro is None:
+            raise HttpError(400, "Prefixo de endereço inválido")
+        queryset = queryset.filter(filtro)
+
     return queryset.order_by('-data_hora')
 
 
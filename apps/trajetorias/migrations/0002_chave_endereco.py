@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from apps.armazens.enderecos import preencher_chaves_existentes
+
+
+def preencher_chaves(apps, schema_editor):
+    preencher_chaves_existentes(apps.get_model('trajetorias', 'Trajetoria'), 'codigo_localizacao')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_initial'),
+        ('trajetorias', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trajetoria',
+            name='chave_endereco',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='codigo_localizacao empacotado (apps.armazens.enderecos), para consultas por faixa', null=True, verbose_name='Chave do Endereço'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='trajetoria',
+            index=models.Index(fields=['chave_endereco'], name='traj_chave_endereco_idx'),
+        ),
+    ]
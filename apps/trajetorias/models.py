@@ -1,5 +1,6 @@
 from django.db import models
 from apps.agendamentos.models import Agendamento
+from apps.armazens.enderecos import preencher_chave
 
 class Trajetoria(models.Model):
     agendamento = models.ForeignKey(
@@ -14,6 +15,13 @@ class Trajetoria(models.Model):
         verbose_name='Código de Localização',
         help_text='Formato: cidade:bairro:rua:predio:nivel:apto'
     )
+    chave_endereco = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Chave do Endereço',
+        help_text='codigo_localizacao empacotado (apps.armazens.enderecos), para consultas por faixa'
+    )
     data_hora = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Data e Hora'
@@ -30,11 +38,16 @@ class Trajetoria(models.Model):
         ordering = ['-data_hora']
         indexes = [
             models.Index(fields=['codigo_localizacao']),
+            models.Index(fields=['chave_endereco'], name='traj_chave_endereco_idx'),
         ]
 
     def __str__(self):
         return f"Trajetória {self.id} - {self.codigo_localizacao}"
 
+    def save(self, *args, **kwargs):
+        preencher_chave(self, 'codigo_localizacao', kwargs)
+        super().save(*args, **kwargs)
+
 
 class PontoInteresse(models.Model):
     trajetoria = models.ForeignKey(
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from .models import Usuario
 from .authentication import JWTAuth
+from .cache import principais
+from .senhas import verificador, LoginSobrecarregado
 from ninja_jwt.tokens import RefreshToken
 from .schemas import UsuarioOut, AlterarSenha, LoginSchema, UsuarioCreate, AdminCriaUsuarioSchema
 
@@ -20,21 +22,33 @@ usuarios_router = Router()
 
 
 # --- ROTA PÚBLICA (ACESSÍVEL A TODOS) ---
-@router.post("/login", response={200: dict, 401: dict})
-def login(request, dados: LoginSchema):
+@router.post("/login", response={200: dict, 401: dict, 429: dict})
+async def login(request, dados: LoginSchema):
     try:
         # Busca usuário por email ou matrícula
         if dados.email:
-            usuario = Usuario.objects.get(email=dados.email)
+            conta = f"email:{dados.email}"
+            usuario = await Usuario.objects.aget(email=dados.email)
         elif dados.matricula:
-            usuario = Usuario.objects.get(matricula=dados.matricula)
+            conta = f"matricula:{dados.matricula}"
+            usuario = await Usuario.objects.aget(matricula=dados.matricula)
         else:
             return JsonResponse({"error": "Email ou matrícula é obrigatório"}, status=400)
 
-        # Verifica a senha
-        if not check_password(dados.senha, usuario.password):
+        # Verifica a senha no pool limitado, fora do worker da requisição
+        try:
+            senha_valida, novo_hash = await verificador.verificar(conta, dados.senha, usuario.password)
+        except LoginSobrecarregado as e:
+            return JsonResponse({"error": str(e)}, status=429, headers={"Retry-After": "1"})
+
+        if not senha_valida:
             return JsonResponse({"error": "Credenciais inválidas"}, status=401)
 
+        # Refaz o hash com o fator de trabalho atual (LOGIN_PBKDF2_ITERACOES)
+        if novo_hash:
+            usuario.password = novo_hash
+            await usuario.asave(update_fields=["password"])
+
         # Cria payload do token
         payload = {
             "token_type": "access",
@@ -258,6 +272,14 @@ def alterar_senha(request, dados: AlterarSenha):
     except Usuario.DoesNotExist:
         return JsonResponse({"error": "Usuário não encontrado"}, status=404)
 
+# Métricas do cache de autenticação (Master)
+@master_router.get("/cache-autenticacao", response={200: dict, 403: dict}, auth=JWTAuth())
+def estatisticas_cache_autenticacao(request):
+    if request.user.tipo != "Master":
+        return JsonResponse({"error": "Permissão negada"}, status=403)
+
+    return principais.estatisticas()
+
 # Combina todos os roteadores
 router.add_router("/master", master_router, tags=["Master"])
 router.add_router("/admin", admin_router, tags=["Admin"])
@@ -1,36 +1,123 @@
+from dataclasses import dataclass
+from typing import Optional
 from ninja.security import HttpBearer
 from django.conf import settings
 import jwt
 from ninja_extra.exceptions import AuthenticationFailed
 from .models import Usuario
+from .cache import principais
+from apps.robos.models import Robo
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class ClaimsToken:
+    """Claims já verificadas de um token JWT (usuário ou robô)."""
+    user_id: Optional[int] = None
+    robo_id: Optional[int] = None
+    tipo: Optional[str] = None
+    jti: Optional[str] = None
+    exp: Optional[int] = None
+    token_type: Optional[str] = None
+
+    @property
+    def eh_robo(self):
+        return self.robo_id is not None
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(
+            user_id=payload.get('user_id'),
+            robo_id=payload.get('robo_id'),
+            tipo=payload.get('tipo'),
+            jti=payload.get('jti'),
+            exp=payload.get('exp'),
+            token_type=payload.get('token_type'),
+        )
+
+
+def decodificar_token(token):
+    """Verifica assinatura e expiração do token e devolve as claims tipadas."""
+    payload = jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=["HS256"],
+        options={"verify_exp": True}
+    )
+    return ClaimsToken.from_payload(payload)
+
+
+def extrair_token_bearer(request):
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:]
+    return None
+
+
+def claims_da_requisicao(request, token):
+    """
+    Decodifica o token uma única vez por requisição. O resultado (ou o erro)
+    fica guardado no request e é reutilizado pelo middleware e por todas as
+    classes `auth=` do Ninja.
+    """
+    if getattr(request, '_jwt_token', None) != token:
+        request._jwt_token = token
+        request._jwt_erro = None
+        request.jwt_claims = None
+        try:
+            request.jwt_claims = decodificar_token(token)
+        except jwt.InvalidTokenError as e:
+            request._jwt_erro = e
+
+    if request._jwt_erro is not None:
+        raise request._jwt_erro
+    return request.jwt_claims
+
+
+def resolver_principal(claims):
+    """Devolve o Robo ou Usuario das claims, passando pelo cache do processo."""
+    if claims.eh_robo:
+        robo = _obter_principal(Robo, "robo", claims.robo_id, claims)
+        # Adiciona o robo_id ao objeto de autenticação
+        robo.auth_data = {'robo_id': robo.id}
+        return robo
+
+    if claims.user_id is None:
+        raise Usuario.DoesNotExist("Token sem user_id")
+    return _obter_principal(Usuario, "usuario", claims.user_id, claims)
+
+
+def _obter_principal(model, tipo, objeto_id, claims):
+    """
+    Busca o principal no cache do processo (chave: tipo, id e jti do token)
+    e só vai ao banco em caso de miss.
+    """
+    principal = principais.obter(tipo, objeto_id, claims.jti)
+    if principal is None:
+        principal = model.objects.get(id=objeto_id)
+        principais.guardar(tipo, objeto_id, claims.jti, principal, exp=claims.exp)
+    return principal
+
+
 class JWTAuth(HttpBearer):
     def authenticate(self, request, token):
         try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=["HS256"],
-                options={"verify_exp": True}
-            )
+            claims = claims_da_requisicao(request, token)
 
             # Se for um robô
-            if 'robo_id' in payload:
-                logger.debug(f"Autenticando robô ID: {payload['robo_id']}")
-                robo = Robo.objects.get(id=payload['robo_id'])
-                # Adiciona o robo_id ao objeto de autenticação
-                robo.auth_data = {'robo_id': robo.id}
-                return robo
+            if claims.eh_robo:
+                logger.debug(f"Autenticando robô ID: {claims.robo_id}")
+                return resolver_principal(claims)
 
             # Autenticação normal de usuário
-            user = Usuario.objects.get(id=payload['user_id'])
+            user = resolver_principal(claims)
+            # Substitui o objeto preguiçoso do middleware, evitando outra consulta
+            request.user = user
             return user
 
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token expirado")
         except (jwt.InvalidTokenError, Usuario.DoesNotExist, Robo.DoesNotExist) as e:
-            raise AuthenticationFailed("Credenciais inválidas")
\ No newline at end of file
+            raise AuthenticationFailed("Credenciais inválidas")
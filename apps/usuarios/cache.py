@@ -0,0 +1,133 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache em memória do processo com política LRU e expiração por TTL.
+
+    As chaves são tuplas cujo segundo elemento identifica o dono da entrada
+    (ex.: ("usuario", 42, jti)), o que permite invalidar todas as entradas
+    de um mesmo objeto de uma só vez.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._por_dono = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave):
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            valor, expira_em = entrada
+            if expira_em <= agora:
+                self._remover(chave)
+                self.misses += 1
+                return None
+
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def set(self, chave, valor, expira_em=None):
+        """
+        Armazena o valor. `expira_em` (em segundos, relógio monotônico)
+        limita o TTL padrão, ex.: à expiração do próprio token.
+        """
+        limite = time.monotonic() + self.ttl
+        if expira_em is not None:
+            limite = min(limite, expira_em)
+
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+
+            self._dados[chave] = (valor, limite)
+            self._por_dono.setdefault(chave[:2], set()).add(chave)
+
+            while len(self._dados) > self.max_entradas:
+                mais_antiga = next(iter(self._dados))
+                self._remover(mais_antiga)
+                self.evictions += 1
+
+    def invalidar(self, tipo, objeto_id):
+        """Remove todas as entradas do objeto (qualquer jti)."""
+        with self._lock:
+            for chave in list(self._por_dono.get((tipo, objeto_id), ())):
+                self._remover(chave)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._por_dono.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+            }
+
+    def _remover(self, chave):
+        self._dados.pop(chave, None)
+        dono = self._por_dono.get(chave[:2])
+        if dono is not None:
+            dono.discard(chave)
+            if not dono:
+                del self._por_dono[chave[:2]]
+
+
+class CachePrincipais(CacheLRU):
+    """
+    Cache de principais autenticados (Usuario ou Robo) indexado por
+    tipo, id e `jti` do token. O cache guarda a sua própria cópia e cada
+    leitura devolve outra cópia rasa, sem os memos por requisição (ex.: o
+    escopo de armazéns), para que uma requisição não altere o objeto de
+    outra nem herde um escopo já invalidado.
+    """
+    MEMOS_DA_REQUISICAO = ("_escopo_armazens",)
+
+    def _copiar(self, principal):
+        copia = copy.copy(principal)
+        for atributo in self.MEMOS_DA_REQUISICAO:
+            copia.__dict__.pop(atributo, None)
+        return copia
+
+    def obter(self, tipo, objeto_id, jti):
+        principal = self.get((tipo, objeto_id, jti))
+        return self._copiar(principal) if principal is not None else None
+
+    def guardar(self, tipo, objeto_id, jti, principal, exp=None):
+        expira_em = None
+        if exp is not None:
+            # Converte o `exp` (epoch) do token para o relógio monotônico
+            expira_em = time.monotonic() + (exp - time.time())
+        self.set((tipo, objeto_id, jti), self._copiar(principal), expira_em)
+
+
+def _criar_cache_principais():
+    from django.conf import settings
+    config = getattr(settings, "AUTH_CACHE_PRINCIPAIS", {})
+    return CachePrincipais(
+        max_entradas=config.get("MAX_ENTRADAS", 2048),
+        ttl=config.get("TTL", 60),
+    )
+
+
+principais = _criar_cache_principais()
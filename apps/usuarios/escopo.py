@@ -0,0 +1,104 @@
+from django.conf import settings
+from .cache import CacheLRU
+from .models import Usuario
+
+# Usa bitmap quando a faixa de ids não passa de N vezes a quantidade de ids
+DENSIDADE_BITMAP = 8
+
+
+class EscopoArmazens:
+    """
+    Conjunto imutável dos ids de Armazem que um usuário pode acessar.
+
+    Ids densos são guardados como bitmap (um int do Python, 1 bit por id);
+    os demais ficam em um frozenset. Em ambos os casos `in` é O(1) e não
+    consulta o banco.
+    """
+    __slots__ = ("_ids", "_base", "_bitmap", "_tamanho")
+
+    def __init__(self, ids):
+        ids = frozenset(ids)
+        self._ids = ids
+        self._base = None
+        self._bitmap = None
+        self._tamanho = len(ids)
+
+        if ids:
+            base = min(ids)
+            amplitude = max(ids) - base + 1
+            if amplitude <= len(ids) * DENSIDADE_BITMAP:
+                bitmap = 0
+                for armazem_id in ids:
+                    bitmap |= 1 << (armazem_id - base)
+                self._base = base
+                self._bitmap = bitmap
+                self._ids = None
+
+    def __contains__(self, armazem_id):
+        if armazem_id is None:
+            return False
+        if self._bitmap is not None:
+            deslocamento = armazem_id - self._base
+            return deslocamento >= 0 and (self._bitmap >> deslocamento) & 1 == 1
+        return armazem_id in self._ids
+
+    def __len__(self):
+        return self._tamanho
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    @property
+    def ids(self):
+        if self._bitmap is None:
+            return sorted(self._ids)
+        bitmap, base, resultado = self._bitmap, self._base, []
+        while bitmap:
+            bit = bitmap & -bitmap
+            resultado.append(base + bit.bit_length() - 1)
+            bitmap ^= bit
+        return resultado
+
+    def filtrar(self, queryset, campo="armazem_id"):
+        """Aplica o escopo como um único filtro `campo IN (...)` com ids literais."""
+        if not self._tamanho:
+            return queryset.none()
+        return queryset.filter(**{f"{campo}__in": self.ids})
+
+
+def _criar_cache_escopos():
+    config = getattr(settings, "ESCOPO_ARMAZENS_CACHE", {})
+    return CacheLRU(
+        max_entradas=config.get("MAX_ENTRADAS", 4096),
+        ttl=config.get("TTL", 300),
+    )
+
+
+escopos = _criar_cache_escopos()
+
+
+def escopo_do_usuario(user):
+    """
+    Devolve o EscopoArmazens do usuário. O resultado fica memorizado na
+    instância (uma consulta no máximo por requisição) e no cache do processo,
+    invalidado por m2m_changed em `armazens_permitidos`.
+    """
+    escopo = getattr(user, "_escopo_armazens", None)
+    if escopo is not None:
+        return escopo
+
+    chave = ("usuario", user.pk)
+    escopo = escopos.get(chave)
+    if escopo is None:
+        ids = Usuario.armazens_permitidos.through.objects.filter(
+            usuario_id=user.pk
+        ).values_list("armazem_id", flat=True)
+        escopo = EscopoArmazens(ids)
+        escopos.set(chave, escopo)
+
+    user._escopo_armazens = escopo
+    return escopo
+
+
+def filtrar_por_escopo(queryset, user, campo="armazem_id"):
+    return escopo_do_usuario(user).filtrar(queryset, campo)
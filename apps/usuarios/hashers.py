@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2AjustavelHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 com fator de trabalho configurável em
+    settings.LOGIN_PBKDF2_ITERACOES. Mantém o algoritmo "pbkdf2_sha256",
+    então os hashes existentes continuam válidos e são refeitos com o novo
+    número de iterações no próximo login bem-sucedido.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "LOGIN_PBKDF2_ITERACOES", PBKDF2PasswordHasher.iterations)
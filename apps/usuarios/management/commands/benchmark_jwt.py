@@ -0,0 +1,86 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from apps.usuarios.authentication import claims_da_requisicao
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark da verificação de JWT: compara a decodificação dupla "
+        "(middleware + JWTAuth) com o pipeline de decodificação única, "
+        "reproduzindo um segundo de tráfego a 1k RPS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rps", type=int, default=1000)
+        parser.add_argument("--usuarios", type=int, default=200)
+        parser.add_argument("--rodadas", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rps = options["rps"]
+        requisicoes = self._montar_requisicoes(rps, options["usuarios"])
+
+        antigo = self._medir(requisicoes, self._decodificacao_dupla, options["rodadas"])
+        novo = self._medir(requisicoes, self._decodificacao_unica, options["rodadas"])
+
+        por_req_antigo = antigo / rps * 1e6
+        por_req_novo = novo / rps * 1e6
+        self.stdout.write(f"Requisições por rodada: {rps}")
+        self.stdout.write(f"Decodificação dupla: {por_req_antigo:.1f} µs/req ({antigo * 1000:.1f} ms CPU por segundo)")
+        self.stdout.write(f"Decodificação única: {por_req_novo:.1f} µs/req ({novo * 1000:.1f} ms CPU por segundo)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Economia: {por_req_antigo - por_req_novo:.1f} µs/req "
+            f"({(1 - novo / antigo) * 100:.0f}% do custo de verificação)"
+        ))
+
+    def _montar_requisicoes(self, total, usuarios):
+        fabrica = RequestFactory()
+        tokens = []
+        for user_id in range(1, usuarios + 1):
+            payload = {
+                "token_type": "access",
+                "exp": datetime.utcnow() + timedelta(hours=2),
+                "iat": datetime.utcnow(),
+                "jti": str(uuid.uuid4()),
+                "user_id": user_id,
+                "tipo": "Usuario",
+            }
+            tokens.append(jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256"))
+
+        return [
+            fabrica.get("/api/inventario/user/inventario/meus", HTTP_AUTHORIZATION=f"Bearer {tokens[i % usuarios]}")
+            for i in range(total)
+        ]
+
+    @staticmethod
+    def _medir(requisicoes, fluxo, rodadas):
+        """Menor tempo de CPU (s) entre as rodadas para processar todas as requisições."""
+        melhor = None
+        for _ in range(rodadas):
+            for request in requisicoes:
+                request.__dict__.pop("_jwt_token", None)
+            inicio = time.process_time()
+            for request in requisicoes:
+                fluxo(request)
+            decorrido = time.process_time() - inicio
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+        return melhor
+
+    @staticmethod
+    def _decodificacao_dupla(request):
+        token = request.headers["Authorization"][7:]
+        # Middleware antigo
+        jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        # JWTAuth antigo
+        jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"], options={"verify_exp": True})
+
+    @staticmethod
+    def _decodificacao_unica(request):
+        token = request.headers["Authorization"][7:]
+        # Middleware e JWTAuth compartilham as claims guardadas no request
+        claims_da_requisicao(request, token)
+        claims_da_requisicao(request, token)
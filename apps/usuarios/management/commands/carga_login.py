@@ -0,0 +1,75 @@
+import asyncio
+import statistics
+import time
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from apps.usuarios.senhas import LoginSobrecarregado, VerificadorSenhas
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga do login: dispara uma rajada de verificações de senha "
+        "e mede a latência (p50/p99) de requisições não relacionadas servidas "
+        "pelo mesmo worker, com a verificação inline e no pool limitado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=64)
+        parser.add_argument("--contas", type=int, default=32)
+        parser.add_argument("--intervalo-ms", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        encoded = make_password("senha-de-teste")
+
+        for modo in ("inline", "pool"):
+            latencias, rejeitados, duracao = asyncio.run(self._cenario(modo, encoded, options))
+            latencias.sort()
+            p50 = statistics.median(latencias)
+            p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+            self.stdout.write(
+                f"[{modo:6}] rajada de {options['logins']} logins em {duracao:.2f}s | "
+                f"outras requisições: p50={p50:.2f}ms p99={p99:.2f}ms "
+                f"(n={len(latencias)}) | rejeitados={rejeitados}"
+            )
+
+    async def _cenario(self, modo, encoded, options):
+        verificador = VerificadorSenhas()
+        rejeitados = 0
+
+        async def login(i):
+            nonlocal rejeitados
+            conta = f"conta-{i % options['contas']}"
+            if modo == "inline":
+                # Comportamento antigo: PBKDF2 executado no próprio worker
+                check_password("senha-de-teste", encoded)
+                return
+            try:
+                await verificador.verificar(conta, "senha-de-teste", encoded)
+            except LoginSobrecarregado:
+                rejeitados += 1
+
+        async def outras_requisicoes(parar):
+            """Requisição leve a cada intervalo; mede o atraso até ser atendida."""
+            latencias = []
+            intervalo = options["intervalo_ms"] / 1000
+            while not parar.is_set():
+                agendado = time.perf_counter()
+                await asyncio.sleep(0)
+                latencias.append((time.perf_counter() - agendado) * 1000)
+                await asyncio.sleep(intervalo)
+            return latencias
+
+        parar = asyncio.Event()
+        medidor = asyncio.create_task(outras_requisicoes(parar))
+        await asyncio.sleep(0)
+
+        inicio = time.perf_counter()
+        tarefas = []
+        for i in range(options["logins"]):
+            tarefas.append(asyncio.create_task(login(i)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tarefas)
+        duracao = time.perf_counter() - inicio
+
+        parar.set()
+        return await medidor, rejeitados, duracao
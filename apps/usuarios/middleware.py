@@ -1,20 +1,24 @@
 import jwt
-from django.conf import settings
+import logging
 from django.utils.functional import SimpleLazyObject
-from .models import Usuario
+from .authentication import claims_da_requisicao, extrair_token_bearer, resolver_principal
+
+logger = logging.getLogger(__name__)
+
 
 class JWTAuthenticationMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        auth_header = request.headers.get('Authorization', '')
-        if auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
+        token = extrair_token_bearer(request)
+        if token:
             try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-                request.user = SimpleLazyObject(lambda: Usuario.objects.get(id=payload['user_id']))
-                print(f"Usuário autenticado: {request.user.email}")  # Debug
-            except Exception as e:
-                print(f"Falha na autenticação: {e}")  # Debug
-        return self.get_response(request)
\ No newline at end of file
+                # As claims ficam em request.jwt_claims para as classes auth= do Ninja
+                claims = claims_da_requisicao(request, token)
+            except jwt.InvalidTokenError as e:
+                logger.debug(f"Falha na autenticação: {e}")
+            else:
+                if not claims.eh_robo:
+                    request.user = SimpleLazyObject(lambda: resolver_principal(claims))
+        return self.get_response(request)
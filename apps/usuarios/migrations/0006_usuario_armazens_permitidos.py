@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('armazens', '0001_initial'),
+        ('usuarios', '0005_usuario_unique_matricula'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='armazens_permitidos',
+            field=models.ManyToManyField(blank=True, related_name='usuarios_permitidos', to='armazens.armazem'),
+        ),
+    ]
@@ -36,6 +36,13 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     cargo = models.CharField(max_length=50, blank=True)
     tipo = models.CharField(max_length=10, choices=TIPOS_USUARIO, default="Usuario")
 
+    # Armazéns que usuários comuns/Admin podem acessar
+    armazens_permitidos = models.ManyToManyField(
+        "armazens.Armazem",
+        blank=True,
+        related_name="usuarios_permitidos"
+    )
+
     # Campos obrigatórios para integração com Django Admin e autenticação
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class LoginSobrecarregado(Exception):
+    """Fila de verificação cheia (global ou da conta): rejeitar sem esperar."""
+
+
+def _verificar_hash(senha, encoded):
+    """
+    Executa no pool: confere a senha e, se o hash estiver com fator de
+    trabalho desatualizado, já devolve o novo hash pronto para salvar.
+    """
+    precisa_atualizar = []
+    valida = check_password(senha, encoded, setter=lambda raw: precisa_atualizar.append(True))
+    novo_hash = make_password(senha) if valida and precisa_atualizar else None
+    return valida, novo_hash
+
+
+class VerificadorSenhas:
+    """
+    Verificação de senha fora do loop/worker da requisição, em um pool de
+    threads limitado. A admissão é não bloqueante: quando as vagas globais
+    (workers + fila) ou as da conta acabam, a tentativa é rejeitada na hora.
+    """
+
+    def __init__(self, workers=4, fila=32, por_conta=2):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login-hash")
+        self._vagas = threading.BoundedSemaphore(workers + fila)
+        self._por_conta = por_conta
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def _reservar_conta(self, conta):
+        with self._lock:
+            atual = self._em_andamento.get(conta, 0)
+            if atual >= self._por_conta:
+                return False
+            self._em_andamento[conta] = atual + 1
+            return True
+
+    def _liberar_conta(self, conta):
+        with self._lock:
+            atual = self._em_andamento.get(conta, 1) - 1
+            if atual:
+                self._em_andamento[conta] = atual
+            else:
+                self._em_andamento.pop(conta, None)
+
+    async def verificar(self, conta, senha, encoded):
+        """
+        Devolve (valida, novo_hash). `novo_hash` só vem preenchido quando o
+        hash armazenado precisa ser refeito com o fator de trabalho atual.
+        """
+        if not self._reservar_conta(conta):
+            raise LoginSobrecarregado("Muitas tentativas simultâneas para esta conta")
+
+        if not self._vagas.acquire(blocking=False):
+            self._liberar_conta(conta)
+            raise LoginSobrecarregado("Serviço de login sobrecarregado")
+
+        def liberar(_futuro):
+            # As vagas só voltam quando o hash termina, mesmo se a requisição for cancelada
+            self._vagas.release()
+            self._liberar_conta(conta)
+
+        try:
+            futuro = self._executor.submit(_verificar_hash, senha, encoded)
+        except Exception:
+            liberar(None)
+            raise
+        futuro.add_done_callback(liberar)
+        return await asyncio.wrap_future(futuro)
+
+
+def _criar_verificador():
+    config = getattr(settings, "LOGIN_VERIFICACAO", {})
+    return VerificadorSenhas(
+        workers=config.get("WORKERS", 4),
+        fila=config.get("FILA", 32),
+        por_conta=config.get("POR_CONTA", 2),
+    )
+
+
+verificador = _criar_verificador()
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from apps.armazens.models import Armazem
+from apps.robos.models import Robo
+from .models import Usuario
+from .cache import principais
+from .escopo import escopos
+
+
+# --- Invalidação do cache de principais autenticados ---
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_usuario_autenticado(sender, instance, **kwargs):
+    principais.invalidar("usuario", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Robo)
+def invalidar_robo_autenticado(sender, instance, **kwargs):
+    principais.invalidar("robo", instance.pk)
+
+
+# --- Invalidação do escopo de armazéns por usuário ---
+@receiver(m2m_changed, sender=Usuario.armazens_permitidos.through)
+def invalidar_escopo_armazens(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+
+    if not reverse:
+        escopos.invalidar("usuario", instance.pk)
+    elif pk_set:
+        for usuario_id in pk_set:
+            escopos.invalidar("usuario", usuario_id)
+    else:
+        # clear() a partir do Armazem: não sabemos quais usuários foram afetados
+        escopos.limpar()
+
+
+@receiver(post_delete, sender=Armazem)
+def invalidar_escopos_armazem_removido(sender, instance, **kwargs):
+    # A remoção em cascata da tabela intermediária não dispara m2m_changed
+    escopos.limpar()
+
+
+@receiver(post_delete, sender=Usuario)
+def invalidar_escopo_usuario_removido(sender, instance, **kwargs):
+    escopos.invalidar("usuario", instance.pk)
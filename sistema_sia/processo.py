@@ -0,0 +1,28 @@
+"""
+Identifica se o processo atual atende requisições (servidor web/ASGI).
+
+Threads de fundo iniciadas em AppConfig.ready() só devem rodar nesses
+processos, e não em migrate, shell, makemigrations ou outros comandos.
+PROCESSO_SERVIDOR=1/0 no ambiente força a decisão.
+"""
+import os
+import sys
+
+SERVIDORES = ("daphne", "gunicorn", "uvicorn", "hypercorn")
+COMANDOS_SERVIDOR = ("runserver", "runworker")
+
+
+def eh_processo_servidor():
+    forcado = os.getenv("PROCESSO_SERVIDOR", "").lower()
+    if forcado in ("1", "true"):
+        return True
+    if forcado in ("0", "false"):
+        return False
+
+    executavel = os.path.basename(sys.argv[0]) if sys.argv else ""
+    if executavel in SERVIDORES:
+        return True
+    if len(sys.argv) > 1 and sys.argv[1] in COMANDOS_SERVIDOR:
+        # Com o autoreload, quem atende é o processo filho (RUN_MAIN)
+        return "--noreload" in sys.argv or os.environ.get("RUN_MAIN") == "true"
+    return False
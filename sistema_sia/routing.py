@@ -1,10 +1,11 @@
 from django.urls import re_path
 
 def websocket_urlpatterns():
-    from apps.robos.consumers import RoboConsumer
+    from apps.robos.consumers import FrotaConsumer, RoboConsumer
     from apps.imagens.consumers import ImagemConsumer
 
     return [
+        re_path(r'ws/robos/frota/$', FrotaConsumer.as_asgi()),
         re_path(r'ws/robos/(?P<robo_id>\w+)/$', RoboConsumer.as_asgi()),
         re_path(r'ws/imagens/$', ImagemConsumer.as_asgi()),
     ]
@@ -185,6 +185,23 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Hash de senhas: PBKDF2 com fator de trabalho ajustável (rehash no login)
+PASSWORD_HASHERS = [
+    'apps.usuarios.hashers.PBKDF2AjustavelHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+LOGIN_PBKDF2_ITERACOES = int(os.getenv("LOGIN_PBKDF2_ITERACOES", "870000"))
+
+# Verificação de senha do login: pool limitado e rejeição rápida
+LOGIN_VERIFICACAO = {
+    'WORKERS': int(os.getenv("LOGIN_WORKERS", "4")),
+    'FILA': int(os.getenv("LOGIN_FILA", "32")),
+    'POR_CONTA': 2,
+}
+
 # Configurações do REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -212,6 +229,116 @@ NINJA_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Cache em memória dos principais autenticados (Usuario/Robo) por token
+AUTH_CACHE_PRINCIPAIS = {
+    'MAX_ENTRADAS': int(os.getenv("AUTH_CACHE_MAX_ENTRADAS", "2048")),
+    'TTL': int(os.getenv("AUTH_CACHE_TTL", "60")),  # segundos
+}
+
+# Cache em memória dos armazéns permitidos por usuário
+ESCOPO_ARMAZENS_CACHE = {
+    'MAX_ENTRADAS': 4096,
+    'TTL': 300,  # segundos
+}
+
+# Registro de inventário em lote
+INVENTARIO_LOTE = {
+    'MAX_ITENS': 5000,
+    'CHUNK': 500,
+}
+
+# Cobertura de endereços: gravação em lote dos paletes confirmados no bitmap
+INVENTARIO_COBERTURA = {
+    'INTERVALO_MS': 1000,
+}
+
+# Paginação por cursor das listagens de inventário
+INVENTARIO_PAGINACAO = {
+    'LIMITE_PADRAO': 100,
+    'MAX_LIMITE': 500,
+}
+
+# Exportação em streaming: linhas lidas por vez do cursor no servidor
+INVENTARIO_EXPORTACAO_CHUNK = 2000
+
+# Criação de agendamentos em lote
+AGENDAMENTOS_LOTE = {
+    'MAX_ITENS': 1000,
+}
+
+# Atribuição automática de robôs a agendamentos
+AGENDAMENTOS_ATRIBUICAO = {
+    'BATERIA_MINIMA': 20,  # % em sensores['bateria']; robôs sem leitura continuam elegíveis
+    'JANELA_CARGA_HORAS': 24,  # carga = tempo agendado nesta janela em torno do período
+}
+
+# Consulta de disponibilidade dos robôs
+AGENDAMENTOS_DISPONIBILIDADE = {
+    'JANELA_MAXIMA_DIAS': 31,
+}
+
+# Agendador (início/fim automático dos agendamentos)
+AGENDADOR = {
+    # Roda dentro do servidor (modo suportado: disparo imediato e push aos robôs conectados).
+    # Desligue só se usar o comando executar_agendador com camada de canais compartilhada (Redis).
+    'NO_PROCESSO': os.getenv("AGENDADOR_NO_PROCESSO", "1").lower() in ("1", "true"),
+    'HORIZONTE_SEGUNDOS': 600,  # janela mantida em memória
+    'RECARGA_SEGUNDOS': 30,
+}
+
+# Expansão das regras de recorrência de agendamentos
+AGENDAMENTOS_RECORRENCIA = {
+    'HORIZONTE_DIAS': 14,
+}
+
+# Cache do heatmap de inventário (por armazém e nível)
+INVENTARIO_HEATMAP_CACHE = {
+    'MAX_ENTRADAS': 256,
+    'TTL': 300,  # segundos; também limita o atraso de mudanças só de status
+}
+
+# Estatísticas de inventário incrementais
+INVENTARIO_ESTATISTICAS = {
+    # Intervalo do job dentro do processo; None desativa (use o comando calcular_estatisticas_inventario)
+    'INTERVALO_SEGUNDOS': int(os.getenv("INVENTARIO_ESTATISTICAS_INTERVALO", "0")) or None,
+    'ATRASO_SEGUNDOS': 60,
+    'CHUNK': 5000,
+}
+
+# Mensagens de erro dos robôs (gravação em lote)
+ROBOS_MENSAGENS = {
+    'TAMANHO_LOTE': 500,  # logs de erro por bulk_create
+    'INTERVALO_MS': 500,
+    'MAXIMO_PENDENTES': 10000,  # acima disso quem enfileira espera a gravação
+    'MAXIMO_POR_ROBO': 200,  # acima disso as mensagens do robô são recusadas
+}
+
+# Estado da frota em memória (painéis em tempo real)
+ROBOS_FROTA = {
+    'INTERVALO_DELTA_MS': 1000,  # envio dos deltas aos painéis (FrotaConsumer)
+}
+
+# Detecção de robôs sem comunicação
+ROBOS_VIVACIDADE = {
+    'ATIVO': True,  # inicia com o processo do servidor (ou use o comando monitorar_robos)
+    'JANELA_SEGUNDOS': 60,  # sem contato por mais que isso: 'inativo' (ou 'erro' se em missão)
+    'RETENTATIVA_SEGUNDOS': 5,  # robôs travados por outra transação são conferidos de novo
+    'RECARGA_SEGUNDOS': 30,  # lê do banco os robôs com contato recente (novos, reativados ou de outro processo)
+}
+
+# Telemetria dos robôs (buffer write-behind)
+ROBOS_TELEMETRIA = {
+    'INTERVALO_MS': 1000,  # gravação em lote dos robôs alterados
+    'BATERIA_CRITICA': 15,  # abaixo disso grava na hora
+    'HISTORICO': True,  # grava cada relatório com sensores em TelemetriaRobo
+    'RETENCAO_BRUTA_DIAS': 7,  # partições diárias mais antigas são removidas
+    'RETENCAO_1M_DIAS': 30,  # agregados de 1 minuto mais antigos que isso são apagados (os de 1 hora ficam)
+    'PARTICOES_A_FRENTE': 3,
+    'ATRASO_ROLLUP_SEGUNDOS': 60,  # espera relatórios atrasados antes de fechar o minuto
+    'LIMITE_BRUTO_HORAS': 2,  # consultas até isso usam o bruto
+    'LIMITE_1M_DIAS': 2,  # até isso usam 1 minuto; acima, 1 hora
+}
+
 # Autenticação
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
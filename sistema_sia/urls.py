@@ -15,10 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
 from django.urls import path
 from ninja import NinjaAPI
 from apps.usuarios.api import router as usuarios_router
 from apps.armazens.api import router as armazens_router
+from apps.agendamentos.api import router as agendamentos_router
 from apps.imagens.api import router as imagens_router
 from apps.inventario.api import router as inventario_router
 from apps.robos.api import router as robos_router
@@ -28,7 +30,16 @@ from apps.api_client.api import api as api_cliente_router
 
 
 api = NinjaAPI(title="Sistema de Inventário de Armazém")
+
+
+@api.exception_handler(PermissionDenied)
+def acesso_negado(request, exc):
+    # As rotas sinalizam falta de permissão com PermissionDenied: responde 403, não 500
+    return api.create_response(request, {"detail": str(exc) or "Acesso negado"}, status=403)
+
+
 api.add_router("/armazens/", armazens_router)
+api.add_router("/agendamentos/", agendamentos_router)
 api.add_router("/usuarios", usuarios_router)
 api.add_router("/imagens/", imagens_router)
 api.add_router("/inventario/", inventario_router)